@@ -0,0 +1,312 @@
+"""
+Допуск запросов перед пулом БД (ASGI-middleware).
+
+Один пользователь, заваливающий /orders/all или /payments/add, не должен
+выбирать весь пул соединений у остальных. Поэтому на каждый запрос:
+
+1. Лимиты пользователя (ключ — sub из JWT, без валидного токена — IP):
+   token bucket ADMISSION_USER_RATE запросов/с с запасом ADMISSION_USER_BURST
+   и не больше ADMISSION_USER_INFLIGHT запросов одновременно. Превышение —
+   429 с Retry-After.
+2. Общий адаптивный лимит одновременных запросов процесса (AIMD): раз в
+   ADMISSION_ADJUST_INTERVAL смотрим среднее ожидание соединения в пуле
+   (app/pool.py). Дольше ADMISSION_TARGET_WAIT_MS или были таймауты пула —
+   лимит умножается на ADMISSION_BACKOFF, иначе растёт на
+   ADMISSION_INCREASE, в пределах ADMISSION_MIN/MAX_CONCURRENCY. Сверх
+   лимита — 503 с Retry-After: лучше быстро отказать, чем держать запрос
+   в очереди пула до DB_POOL_TIMEOUT.
+
+ADMISSION_BACKEND:
+- memory — лимиты пользователя в памяти процесса (у каждого воркера свои);
+- redis — общие для всех воркеров (REDIS_URL), одна Lua-операция на запрос.
+  Redis недоступен — пропускаем без лимитов пользователя.
+
+IP берётся из scope["client"]. За балансировщиком это его адрес, и все
+анонимные запросы делили бы одно ведро — поэтому uvicorn в Procfile
+запускается с --proxy-headers и берёт адрес клиента из X-Forwarded-For.
+--forwarded-allow-ips (FORWARDED_ALLOW_IPS) — от кого этому заголовку
+верить; «*» годится, только если до процесса нельзя достучаться в обход
+прокси.
+
+Общий лимит всегда свой у процесса: он защищает пул этого процесса.
+Пути из ADMISSION_EXEMPT (health, метрики, долгий /changes/stream) не лимитируются.
+"""
+import logging
+import math
+import time
+
+import orjson
+from cachetools import TTLCache
+from jose import JWTError, jwt
+from starlette.requests import cookie_parser
+
+from app.config import (
+    ADMISSION_ADJUST_INTERVAL,
+    ADMISSION_BACKEND,
+    ADMISSION_BACKOFF,
+    ADMISSION_EXEMPT,
+    ADMISSION_INCREASE,
+    ADMISSION_MAX_CONCURRENCY,
+    ADMISSION_MAX_KEYS,
+    ADMISSION_MIN_CONCURRENCY,
+    ADMISSION_TARGET_WAIT_MS,
+    ADMISSION_USER_BURST,
+    ADMISSION_USER_INFLIGHT,
+    ADMISSION_USER_RATE,
+    ALGORITHM,
+    CACHE_NAMESPACE,
+    REDIS_URL,
+    SECRET_KEY,
+)
+from app.database import engine
+from app.security.principal_cache import get_token_payload, set_token_payload
+
+logger = logging.getLogger(__name__)
+
+# Результат проверки лимитов пользователя; UNTRACKED — пропущен без учёта
+# (бэкенд недоступен), release для него не вызывается
+ADMITTED, RATE_LIMITED, TOO_MANY_INFLIGHT, UNTRACKED = 0, 1, 2, 3
+
+# Запись бакета живёт, пока он не наполнится заново: после этого она не нужна
+_BUCKET_TTL = math.ceil(ADMISSION_USER_BURST / ADMISSION_USER_RATE) + 1
+
+
+class MemoryLimiter:
+    def __init__(self):
+        # ключ -> (токены, время последнего пересчёта)
+        self._buckets: TTLCache = TTLCache(maxsize=ADMISSION_MAX_KEYS, ttl=_BUCKET_TTL, timer=time.monotonic)
+        self._inflight: dict[str, int] = {}
+
+    async def acquire(self, key: str) -> tuple[int, float]:
+        """(результат, через сколько секунд повторить)."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key) or (ADMISSION_USER_BURST, now)
+        tokens = min(ADMISSION_USER_BURST, tokens + (now - updated) * ADMISSION_USER_RATE)
+        if tokens < 1:
+            return RATE_LIMITED, (1 - tokens) / ADMISSION_USER_RATE
+        inflight = self._inflight.get(key, 0)
+        if inflight >= ADMISSION_USER_INFLIGHT:
+            return TOO_MANY_INFLIGHT, 1.0
+        self._buckets[key] = (tokens - 1, now)
+        self._inflight[key] = inflight + 1
+        return ADMITTED, 0.0
+
+    async def release(self, key: str) -> None:
+        inflight = self._inflight.pop(key, 1) - 1
+        if inflight > 0:
+            self._inflight[key] = inflight
+
+    async def close(self) -> None:
+        pass
+
+
+# KEYS: бакет (hash t/s), счётчик запросов в работе.
+# ARGV: rate, burst, now, inflight cap, ttl ключей.
+_ACQUIRE_LUA = """
+local v = redis.call('HMGET', KEYS[1], 't', 's')
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local tokens = tonumber(v[1]) or burst
+local updated = tonumber(v[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+if tokens < 1 then
+  return {1, tostring((1 - tokens) / rate)}
+end
+if tonumber(redis.call('GET', KEYS[2]) or '0') >= tonumber(ARGV[4]) then
+  return {2, '1'}
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens - 1), 's', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+return {0, '0'}
+"""
+
+# Счётчик мог истечь, пока шёл долгий запрос, — ниже нуля не уходим
+_RELEASE_LUA = """
+if redis.call('DECR', KEYS[1]) <= 0 then
+  redis.call('DEL', KEYS[1])
+end
+"""
+
+# Счётчик в работе защищён TTL на случай падения воркера с незакрытыми запросами
+_INFLIGHT_TTL = max(_BUCKET_TTL, 60)
+
+
+class RedisLimiter:
+    def __init__(self, url: str, namespace: str):
+        # redis — опциональная зависимость, нужна только при ADMISSION_BACKEND=redis
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._errors = (redis.RedisError, OSError)
+        self._ns = f"{namespace}admission:"
+        self._acquire = self._redis.register_script(_ACQUIRE_LUA)
+        self._release = self._redis.register_script(_RELEASE_LUA)
+        self._available = True
+
+    def _failed(self, e: Exception) -> None:
+        if self._available:
+            logger.warning("admission backend unavailable, per-user limits are off: %s", e)
+        self._available = False
+
+    async def acquire(self, key: str) -> tuple[int, float]:
+        try:
+            result, retry_after = await self._acquire(
+                keys=[self._ns + "b:" + key, self._ns + "f:" + key],
+                args=[ADMISSION_USER_RATE, ADMISSION_USER_BURST, time.time(),
+                      ADMISSION_USER_INFLIGHT, _INFLIGHT_TTL],
+            )
+        except self._errors as e:
+            self._failed(e)
+            return UNTRACKED, 0.0
+        self._available = True
+        return int(result), float(retry_after)
+
+    async def release(self, key: str) -> None:
+        try:
+            await self._release(keys=[self._ns + "f:" + key])
+        except self._errors as e:
+            self._failed(e)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def _create_limiter():
+    if ADMISSION_BACKEND == "redis":
+        return RedisLimiter(REDIS_URL, CACHE_NAMESPACE)
+    return MemoryLimiter()
+
+
+_limiter = _create_limiter()
+
+_state = {
+    "limit": float(ADMISSION_MAX_CONCURRENCY),
+    "inflight": 0,
+    # максимум одновременных запросов за текущий интервал
+    "peak": 0,
+    "adjusted_at": time.monotonic(),
+    "wait_total": 0.0,
+    "wait_count": 0,
+    "timeouts": 0,
+}
+stats = {"admitted": 0, "rate_limited": 0, "inflight_limited": 0, "shed": 0,
+         "decreases": 0, "last_wait_ms": 0.0}
+
+
+def _adjust_limit(now: float) -> None:
+    """AIMD по среднему ожиданию соединения в пуле за прошедший интервал."""
+    pool = engine.pool
+    waits = pool.wait_count - _state["wait_count"]
+    # waits <= 0 — пул пересоздан и счётчики начались заново
+    wait_ms = (pool.wait_total - _state["wait_total"]) / waits * 1000 if waits > 0 else 0.0
+    timed_out = pool.timeouts > _state["timeouts"]
+    peak = _state["peak"]
+    _state.update(adjusted_at=now, wait_total=pool.wait_total, wait_count=pool.wait_count,
+                  timeouts=pool.timeouts, peak=_state["inflight"])
+    stats["last_wait_ms"] = round(wait_ms, 3)
+    limit = _state["limit"]
+    if timed_out or wait_ms > ADMISSION_TARGET_WAIT_MS:
+        # от фактической нагрузки, а не от лимита, который до неё не доходил
+        limit = max(ADMISSION_MIN_CONCURRENCY, min(limit, peak) * ADMISSION_BACKOFF)
+        stats["decreases"] += 1
+    else:
+        limit = min(ADMISSION_MAX_CONCURRENCY, limit + ADMISSION_INCREASE)
+    _state["limit"] = limit
+
+
+def _principal_key(scope) -> str:
+    """sub из JWT (заголовок или кука, как в get_current_user_release), иначе IP."""
+    token = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, credentials = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer":
+                token = credentials
+        elif name == b"cookie" and token is None:
+            cookie = cookie_parser(value.decode("latin-1")).get("access_token")
+            if cookie:
+                token = cookie.removeprefix("Bearer ")
+    if token:
+        payload = get_token_payload(token)
+        if payload is None:
+            try:
+                # подпись проверяем: иначе чужой sub в поддельном токене
+                # выедал бы лимиты другого пользователя
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            except JWTError:
+                payload = None
+            else:
+                set_token_payload(token, payload)
+        if payload and payload.get("sub") is not None:
+            return f"u:{payload['sub']}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """Чистый ASGI, как и остальные middleware (см. app/middleware.py)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"].startswith(ADMISSION_EXEMPT):
+            await self.app(scope, receive, send)
+            return
+
+        now = time.monotonic()
+        if now - _state["adjusted_at"] >= ADMISSION_ADJUST_INTERVAL:
+            _adjust_limit(now)
+        if _state["inflight"] >= _state["limit"]:
+            stats["shed"] += 1
+            await _reject(send, 503, "Сервер перегружен, повторите позже", ADMISSION_ADJUST_INTERVAL)
+            return
+
+        key = _principal_key(scope)
+        result, retry_after = await _limiter.acquire(key)
+        if result == RATE_LIMITED:
+            stats["rate_limited"] += 1
+            await _reject(send, 429, "Слишком много запросов", retry_after)
+            return
+        if result == TOO_MANY_INFLIGHT:
+            stats["inflight_limited"] += 1
+            await _reject(send, 429, "Слишком много одновременных запросов", retry_after)
+            return
+
+        stats["admitted"] += 1
+        _state["inflight"] += 1
+        _state["peak"] = max(_state["peak"], _state["inflight"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _state["inflight"] -= 1
+            if result == ADMITTED:
+                await _limiter.release(key)
+
+
+async def close_admission() -> None:
+    await _limiter.close()
+
+
+def admission_stats() -> dict:
+    return {
+        **stats,
+        "backend": ADMISSION_BACKEND,
+        "limit": round(_state["limit"], 1),
+        "inflight": _state["inflight"],
+    }
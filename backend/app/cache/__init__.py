@@ -0,0 +1,185 @@
+"""
+Кэш ответов. Ключ — строка (например, f"clients_all:{user_id}"),
+значение — сериализуемые данные.
+
+Бэкенд выбирается через CACHE_BACKEND:
+- memory (по умолчанию) — TTL кэш в памяти процесса, для одного инстанса;
+- redis — общий кэш для нескольких реплик с рассылкой сбросов через pub/sub.
+
+`get_or_load` добавляет поверх бэкенда защиту от stampede: на один ключ
+одновременно работает только один загрузчик, остальные ждут его результат.
+Запись свежая CACHE_SOFT_TTL секунд; после этого и до CACHE_TTL она
+отдаётся как есть, а обновление идёт в фоне (stale-while-revalidate).
+
+Ключи помечаются тегами (`app/cache/keys.py`); `invalidate_tags` сбрасывает
+ровно те ключи, что помечены тегом, через индекс в бэкенде, без прохода по
+всему кэшу. `patch_cached` правит закэшированное значение на месте —
+так из списков убираются удалённые строки без повторного запроса в БД.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from app.cache.backends import CacheBackend, MemoryBackend
+from app.config import (
+    CACHE_BACKEND,
+    CACHE_LOCAL_TTL,
+    CACHE_MAXSIZE,
+    CACHE_NAMESPACE,
+    CACHE_SOFT_TTL,
+    CACHE_TTL,
+    REDIS_URL,
+)
+
+
+def _create_backend() -> CacheBackend:
+    if CACHE_BACKEND == "redis":
+        from app.cache.redis_backend import RedisBackend
+
+        return RedisBackend(REDIS_URL, ttl=CACHE_TTL, namespace=CACHE_NAMESPACE,
+                            local_maxsize=CACHE_MAXSIZE, local_ttl=CACHE_LOCAL_TTL)
+    return MemoryBackend(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL)
+
+
+_backend: CacheBackend = _create_backend()
+
+logger = logging.getLogger(__name__)
+
+# Загрузки, которые сейчас выполняются: ключ -> задача.
+# Сброс убирает отсюда задачи по префиксу или тегу — их результат уже не сохраняется.
+_inflight: dict[str, asyncio.Task] = {}
+# Теги незавершённых загрузок: тег -> ключи из _inflight
+_inflight_tags: dict[str, set[str]] = {}
+
+stats = {"hits": 0, "stale_hits": 0, "misses": 0, "loads": 0,
+         "coalesced": 0, "load_errors": 0, "patched": 0, "invalidated_keys": 0}
+
+
+class _Entry(NamedTuple):
+    value: Any
+    fresh_until: float
+
+
+async def init_cache() -> None:
+    await _backend.start()
+
+
+async def close_cache() -> None:
+    await _backend.close()
+
+
+async def get_cached(key: str) -> Any | None:
+    return await _backend.get(key)
+
+
+async def set_cached(key: str, value: Any, tags: tuple[str, ...] = ()) -> None:
+    await _backend.set(key, value, tags)
+
+
+async def invalidate_tags(*tags: str, keep: tuple[str, ...] = ()) -> None:
+    """
+    Удалить все ключи, помеченные любым из tags, кроме keep.
+    Незавершённые загрузки отвязываются для всех помеченных ключей, включая keep:
+    они могли прочитать данные до записи.
+    """
+    if not tags:
+        return
+    for tag in tags:
+        for key in _inflight_tags.pop(tag, ()):
+            _inflight.pop(key, None)
+    stats["invalidated_keys"] += await _backend.delete_tags(tags, frozenset(keep))
+
+
+async def patch_cached(key: str, fn: Callable[[Any], Any | None]) -> bool:
+    """
+    Заменить закэшированное значение на fn(value), сохранив его свежесть.
+    fn вернул None — ключ удаляется. Вернуть False, если ключа в кэше нет.
+    """
+    def apply(entry: _Entry) -> _Entry | None:
+        value = fn(entry.value)
+        return None if value is None else _Entry(value, entry.fresh_until)
+
+    patched = await _backend.update(key, apply)
+    if patched:
+        stats["patched"] += 1
+    return patched
+
+
+async def invalidate_cached(*prefixes: str) -> None:
+    """
+    Удалить все ключи, начинающиеся с любого из prefixes (например, 'clients_all:42:').
+    Несколько префиксов сбрасываются за один проход.
+    """
+    if not prefixes:
+        return
+    # Новые запросы не должны присоединяться к загрузке, начатой до записи
+    for key in [k for k in _inflight if k.startswith(prefixes)]:
+        del _inflight[key]
+    await _backend.delete_prefixes(prefixes)
+
+
+async def get_or_load(key: str, loader: Callable[[], Awaitable[Any]],
+                      soft_ttl: int = CACHE_SOFT_TTL, tags: tuple[str, ...] = ()) -> Any:
+    """
+    Вернуть значение по ключу, при промахе вызвав loader() не более одного
+    раза на все конкурентные запросы. Загруженное значение помечается tags.
+    """
+    entry = await _backend.get(key)
+    if entry is not None:
+        if entry.fresh_until > time.time():
+            stats["hits"] += 1
+        else:
+            stats["stale_hits"] += 1
+            if key not in _inflight:
+                _start_load(key, loader, soft_ttl, tags)
+        return entry.value
+
+    stats["misses"] += 1
+    task = _inflight.get(key)
+    if task is None:
+        task = _start_load(key, loader, soft_ttl, tags)
+    else:
+        stats["coalesced"] += 1
+    # shield: отмена одного ожидающего (клиент ушёл) не отменяет общую загрузку
+    return await asyncio.shield(task)
+
+
+def _start_load(key: str, loader: Callable[[], Awaitable[Any]], soft_ttl: int,
+                tags: tuple[str, ...]) -> asyncio.Task:
+    stats["loads"] += 1
+    task = asyncio.create_task(_load(key, loader, soft_ttl, tags))
+    _inflight[key] = task
+    for tag in tags:
+        _inflight_tags.setdefault(tag, set()).add(key)
+    task.add_done_callback(lambda t: _load_done(key, tags, t))
+    return task
+
+
+async def _load(key: str, loader: Callable[[], Awaitable[Any]], soft_ttl: int,
+                tags: tuple[str, ...]) -> Any:
+    value = await loader()
+    # Если за время загрузки ключ сбросили, результат мог устареть
+    if _inflight.get(key) is asyncio.current_task():
+        await _backend.set(key, _Entry(value, time.time() + soft_ttl), tags)
+    return value
+
+
+def _load_done(key: str, tags: tuple[str, ...], task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    # загрузку могли отвязать сбросом; новой загрузки ключа нет — убрать из тегов
+    if key not in _inflight:
+        for tag in tags:
+            keys = _inflight_tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del _inflight_tags[tag]
+    if not task.cancelled() and task.exception() is not None:
+        stats["load_errors"] += 1
+        logger.warning("cache loader for %s failed: %r", key, task.exception())
+
+
+def cache_stats() -> dict:
+    return {**stats, "evictions": _backend.evictions, "inflight": len(_inflight)}
@@ -0,0 +1,143 @@
+"""
+Интерфейс бэкенда кэша и in-memory реализация.
+"""
+from typing import Any, Callable, Iterable
+
+from cachetools import TTLCache
+
+
+class CacheBackend:
+    """Хранилище ключ -> значение с TTL, тегами и сбросом по тегу или префиксу."""
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def get(self, key: str) -> Any | None:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, tags: tuple[str, ...] = ()) -> None:
+        raise NotImplementedError
+
+    async def update(self, key: str, fn: Callable[[Any], Any | None]) -> bool:
+        """
+        Атомарно заменить значение на fn(value) (None — удалить ключ).
+        Вернуть False, если ключа нет; fn тогда не вызывается.
+        """
+        raise NotImplementedError
+
+    async def delete_tags(self, tags: tuple[str, ...], keep: frozenset[str] = frozenset()) -> int:
+        """Удалить ключи с любым из tags, кроме keep, во всех репликах; вернуть их число."""
+        raise NotImplementedError
+
+    async def delete_prefixes(self, prefixes: tuple[str, ...]) -> None:
+        """Удалить все ключи, начинающиеся с любого из prefixes, во всех репликах."""
+        raise NotImplementedError
+
+    @property
+    def evictions(self) -> int:
+        """Сколько ключей вытеснено из-за переполнения (не по TTL и не сбросом)."""
+        return 0
+
+
+class _TrackingTTLCache(TTLCache):
+    """TTLCache, который сообщает об удалении ключа любым путём и считает вытеснения."""
+
+    def __init__(self, maxsize: int, ttl: int, on_remove: Callable[[str], None]):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._on_remove = on_remove
+        self.evictions = 0
+
+    def popitem(self):
+        # TTLCache зовёт popitem, только когда места нет и надо вытеснить ключ;
+        # сам ключ удаляется через pop -> __delitem__
+        self.evictions += 1
+        return super().popitem()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._on_remove(key)
+
+    def expire(self, time=None):
+        # истёкшие ключи TTLCache удаляет в обход __delitem__
+        expired = super().expire(time)
+        for key, _ in expired or ():
+            self._on_remove(key)
+        return expired
+
+
+class MemoryBackend(CacheBackend):
+    """
+    TTL кэш в памяти процесса. Подходит только для одного инстанса:
+    у каждого воркера своя копия, сброс в другие процессы не доходит.
+
+    Рядом с кэшем — индекс тег -> ключи, поэтому сброс по тегу стоит
+    O(затронутых ключей), а не проход по всему кэшу. Ключ уходит из
+    индекса, когда удаляется из кэша (сброс, вытеснение или TTL).
+
+    Операции синхронные и не содержат await, поэтому лок не нужен —
+    внутри одного event loop они атомарны.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._cache: TTLCache[str, Any] = _TrackingTTLCache(maxsize, ttl, self._unindex)
+        self._tags: dict[str, set[str]] = {}
+        self._key_tags: dict[str, tuple[str, ...]] = {}
+
+    async def get(self, key: str) -> Any | None:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any, tags: tuple[str, ...] = ()) -> None:
+        self._cache[key] = value
+        self._unindex(key)
+        if tags:
+            self._key_tags[key] = tags
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    async def update(self, key: str, fn: Callable[[Any], Any | None]) -> bool:
+        value = self._cache.get(key)
+        if value is None:
+            return False
+        new = fn(value)
+        if new is None:
+            self._cache.pop(key, None)
+        else:
+            # ключ уже есть: __setitem__ не трогает индекс тегов
+            self._cache[key] = new
+        return True
+
+    async def delete_tags(self, tags: tuple[str, ...], keep: frozenset[str] = frozenset()) -> int:
+        return len(self.evict_tags(tags, keep))
+
+    async def delete_prefixes(self, prefixes: tuple[str, ...]) -> None:
+        self.evict_local(prefixes)
+
+    @property
+    def evictions(self) -> int:
+        return self._cache.evictions
+
+    def evict_tags(self, tags: tuple[str, ...], keep: frozenset[str] = frozenset()) -> "set[str]":
+        keys = set().union(*(self._tags.get(tag, ()) for tag in tags)) - keep
+        self.evict_keys(keys)
+        return keys
+
+    def evict_keys(self, keys: Iterable[str]) -> None:
+        for k in keys:
+            self._cache.pop(k, None)
+            # просроченный, но ещё не вычищенный ключ pop не удаляет
+            self._unindex(k)
+
+    def evict_local(self, prefixes: tuple[str, ...]) -> None:
+        to_del = [k for k in self._cache if k.startswith(prefixes)]
+        self.evict_keys(to_del)
+
+    def _unindex(self, key: str) -> None:
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
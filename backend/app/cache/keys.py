@@ -0,0 +1,71 @@
+"""
+Ключи и теги кэша ответов.
+
+Ключи сохраняют прежний вид (`clients_all:{user}:...`, `orders_all:{user}:{client}:...`),
+поэтому сброс по префиксу по-прежнему работает. Теги:
+- user:{user} — все ключи пользователя (импорт);
+- clients:{user} — списки клиентов;
+- orders:{user}:{client} — списки заказов клиента и его карточка;
+- client_detail:{user}:{client} — только карточка (платежи, правка клиента);
+- ledger:{user}:{order} — платежи и баланс заказа (/payments/ledger).
+"""
+from app.schemas.client_scheme import ClientSort
+from app.schemas.order_scheme import OrderSort
+
+
+def user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def clients_tag(user_id: int) -> str:
+    return f"clients:{user_id}"
+
+
+def orders_tag(user_id: int, client_id: int) -> str:
+    return f"orders:{user_id}:{client_id}"
+
+
+def detail_tag(user_id: int, client_id: int) -> str:
+    return f"client_detail:{user_id}:{client_id}"
+
+
+def ledger_tag(user_id: int, order_id: int) -> str:
+    return f"ledger:{user_id}:{order_id}"
+
+
+def clients_list(user_id: int, sort: ClientSort = ClientSort.ID,
+                 cursor: str | None = None, limit: int | None = None) -> str:
+    return f"clients_all:{user_id}:{sort.value}|{cursor}|{limit}"
+
+
+def clients_list_tags(user_id: int) -> tuple[str, ...]:
+    return clients_tag(user_id), user_tag(user_id)
+
+
+def orders_list(user_id: int, client_id: int, status=None, is_paid: bool | None = None,
+                min_price: int | None = None, max_price: int | None = None,
+                sort: OrderSort = OrderSort.ID, cursor: str | None = None,
+                limit: int | None = None) -> str:
+    query = (status, is_paid, min_price, max_price, sort, cursor, limit)
+    query_key = "|".join(str(getattr(v, "value", v)) for v in query)
+    return f"orders_all:{user_id}:{client_id}:{query_key}"
+
+
+def orders_list_tags(user_id: int, client_id: int) -> tuple[str, ...]:
+    return orders_tag(user_id, client_id), user_tag(user_id)
+
+
+def client_detail(user_id: int, client_id: int) -> str:
+    return f"orders_all:{user_id}:{client_id}:detail"
+
+
+def client_detail_tags(user_id: int, client_id: int) -> tuple[str, ...]:
+    return orders_tag(user_id, client_id), detail_tag(user_id, client_id), user_tag(user_id)
+
+
+def order_ledger(user_id: int, order_id: int) -> str:
+    return f"payments_ledger:{user_id}:{order_id}"
+
+
+def order_ledger_tags(user_id: int, order_id: int) -> tuple[str, ...]:
+    return ledger_tag(user_id, order_id), user_tag(user_id)
@@ -0,0 +1,58 @@
+"""
+Обновление закэшированных списков после записи.
+
+Полный список по id (без фильтров, сортировки и курсора) — самый частый
+запрос и самый дорогой для перечитывания, поэтому после удаления его не
+сбрасывают, а убирают строки на месте: удаление окончательно (id не
+переиспользуются), и правки в любом порядке дают один результат.
+Созданные и изменённые строки так вставлять нельзя: две записи одной строки
+могут дойти до кэша не в порядке commit, и в списке осталась бы старая
+версия, — после них список сбрасывается. Остальные ключи сущности (фильтры,
+страницы, карточка клиента) сбрасываются по тегу. CACHE_WRITE_THROUGH=false —
+сбрасывать всё.
+"""
+from typing import Any, Iterable
+
+from app.cache import invalidate_tags, keys, patch_cached
+from app.config import CACHE_WRITE_THROUGH
+from app.responses import patch_list_body
+
+
+async def write_clients(user_id: int, upserts: Iterable[Any] = (), removes: Iterable[int] = (),
+                        extra_tags: tuple[str, ...] = ()) -> None:
+    """Клиенты upserts (ORM-объекты) созданы/изменены, клиенты removes удалены."""
+    await _write(keys.clients_list(user_id), upserts, removes,
+                 (keys.clients_tag(user_id), *extra_tags))
+
+
+async def write_orders(user_id: int, client_id: int, upserts: Iterable[Any] = (),
+                       removes: Iterable[int] = ()) -> None:
+    """Заказы одного клиента созданы/изменены (upserts) или удалены (removes)."""
+    upserts, removes = list(upserts), list(removes)
+    # цена и баланс заказа есть и в его выписке (/payments/ledger)
+    ledgers = [keys.ledger_tag(user_id, order_id) for order_id in (*(o.id for o in upserts), *removes)]
+    await _write(keys.orders_list(user_id, client_id), upserts, removes,
+                 (keys.orders_tag(user_id, client_id), *ledgers))
+
+
+async def write_orders_batch(user_id: int, orders: Iterable[Any] = (),
+                             removed: Iterable[tuple[int, int]] = ()) -> None:
+    """Заказы разных клиентов: orders — изменённые, removed — (id, client_id) удалённых."""
+    upserts: dict[int, list] = {}
+    removes: dict[int, list[int]] = {}
+    for order in orders:
+        upserts.setdefault(order.client_id, []).append(order)
+    for order_id, client_id in removed:
+        removes.setdefault(client_id, []).append(order_id)
+    for client_id in upserts.keys() | removes.keys():
+        await write_orders(user_id, client_id, upserts.get(client_id, ()), removes.get(client_id, ()))
+
+
+async def _write(list_key: str, upserts: Iterable[Any], removes: Iterable[int],
+                 tags: tuple[str, ...]) -> None:
+    if not CACHE_WRITE_THROUGH or list(upserts):
+        await invalidate_tags(*tags)
+        return
+    await invalidate_tags(*tags, keep=(list_key,))
+    removes = list(removes)
+    await patch_cached(list_key, lambda cached: patch_list_body(cached, removes))
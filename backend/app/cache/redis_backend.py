@@ -0,0 +1,163 @@
+"""
+Общий кэш в Redis (или любом сервере с протоколом Redis: KeyDB, Valkey,
+локальный redis-server) для нескольких реплик/воркеров.
+
+Значения лежат в Redis, а поверх него у каждого процесса есть маленький
+локальный L1 с коротким TTL. Сброс удаляет ключи в Redis и рассылает их
+(или префиксы) через pub/sub, чтобы остальные реплики вычистили свой L1.
+
+Теги хранятся множествами `<namespace>tag:<тег>` с тем же TTL, что и ключи;
+ключи, которых уже нет, в множестве безвредны — UNLINK их просто пропустит.
+"""
+import asyncio
+import logging
+import pickle
+from typing import Any, Callable
+
+from app.cache.backends import CacheBackend, MemoryBackend
+
+logger = logging.getLogger(__name__)
+
+_GLOB_SPECIAL = str.maketrans({c: f"\\{c}" for c in "*?[]\\"})
+
+
+class RedisBackend(CacheBackend):
+    def __init__(self, url: str, ttl: int, namespace: str = "crm:",
+                 local_maxsize: int = 500, local_ttl: int = 5):
+        # redis — опциональная зависимость, нужна только при CACHE_BACKEND=redis
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._errors = (redis.RedisError, OSError)
+        self._ttl = ttl
+        self._ns = namespace
+        self._channel = f"{namespace}invalidate"
+        self._watch_error = redis.WatchError
+        self._local = MemoryBackend(maxsize=local_maxsize, ttl=local_ttl)
+        self._listener: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self._channel)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._redis.aclose()
+
+    async def _listen(self, pubsub) -> None:
+        try:
+            while True:
+                try:
+                    async for message in pubsub.listen():
+                        if message.get("type") != "message":
+                            continue
+                        kind, _, body = message["data"].decode().partition("\n")
+                        items = body.split("\n")
+                        if kind == "k":
+                            self._local.evict_keys(items)
+                        else:
+                            self._local.evict_local(tuple(items))
+                except self._errors as e:
+                    # Пока нет связи, L1 устаревает максимум на local_ttl
+                    logger.warning("cache invalidation channel lost: %s", e)
+                    await asyncio.sleep(1)
+                    await pubsub.subscribe(self._channel)
+        finally:
+            await pubsub.aclose()
+
+    @property
+    def evictions(self) -> int:
+        # вытеснения из Redis видны только в INFO stats самого сервера
+        return self._local.evictions
+
+    async def get(self, key: str) -> Any | None:
+        value = await self._local.get(key)
+        if value is not None:
+            return value
+        raw = await self._redis.get(self._ns + key)
+        if raw is None:
+            return None
+        value = pickle.loads(raw)
+        await self._local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any, tags: tuple[str, ...] = ()) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(self._ns + key, pickle.dumps(value), ex=self._ttl)
+            for tag in tags:
+                pipe.sadd(self._tag_key(tag), key)
+                pipe.expire(self._tag_key(tag), self._ttl)
+            await pipe.execute()
+        await self._local.set(key, value, tags)
+
+    async def update(self, key: str, fn: Callable[[Any], Any | None]) -> bool:
+        name = self._ns + key
+        async with self._redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(name)
+                    raw = await pipe.get(name)
+                    if raw is None:
+                        await pipe.reset()
+                        self._local.evict_keys((key,))
+                        return False
+                    new = fn(pickle.loads(raw))
+                    pipe.multi()
+                    if new is None:
+                        pipe.unlink(name)
+                    else:
+                        pipe.set(name, pickle.dumps(new), keepttl=True)
+                    await pipe.execute()
+                    break
+                except self._watch_error:
+                    # ключ поменяла другая реплика между GET и EXEC — повторить
+                    continue
+        # у остальных реплик L1 со старым значением — пусть перечитают из Redis
+        self._local.evict_keys((key,))
+        await self._redis.publish(self._channel, "k\n" + key)
+        return True
+
+    async def delete_tags(self, tags: tuple[str, ...], keep: frozenset[str] = frozenset()) -> int:
+        keys: set[str] = set()
+        for tag in tags:
+            keys.update(k.decode() for k in await self._redis.smembers(self._tag_key(tag)))
+        keys -= keep
+        self._local.evict_tags(tags, keep)
+        self._local.evict_keys(keys)
+        if not keys:
+            return 0
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                # убираем только прочитанные члены: ключ, добавленный после
+                # SMEMBERS, остаётся в индексе
+                pipe.srem(self._tag_key(tag), *keys)
+            pipe.unlink(*(self._ns + k for k in keys))
+            await pipe.execute()
+        await self._redis.publish(self._channel, "k\n" + "\n".join(keys))
+        return len(keys)
+
+    async def delete_prefixes(self, prefixes: tuple[str, ...]) -> None:
+        self._local.evict_local(prefixes)
+        batch = []
+        for prefix in prefixes:
+            pattern = self._ns + prefix.translate(_GLOB_SPECIAL) + "*"
+            async for k in self._redis.scan_iter(match=pattern, count=500):
+                batch.append(k)
+                if len(batch) >= 500:
+                    await self._redis.unlink(*batch)
+                    batch.clear()
+        if batch:
+            await self._redis.unlink(*batch)
+        # Одно сообщение на весь сброс: тип (p — префиксы, k — ключи),
+        # затем элементы, всё через перевод строки
+        await self._redis.publish(self._channel, "p\n" + "\n".join(prefixes))
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self._ns}tag:{tag}"
@@ -0,0 +1,48 @@
+"""
+Каскадное удаление клиента вместе с заказами и платежами.
+
+Общее для DELETE /clients/delete/{id} и фоновой задачи clients.delete,
+поэтому живёт вне роутера.
+"""
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import changefeed
+from app.cache import keys
+from app.cache.lists import write_clients
+from app.models.client_table import Client
+from app.models.orders_table import Order
+from app.models.payments_table import Payment
+
+
+async def delete_client_cascade(session: AsyncSession, user_id: int, client_id: int) -> dict | None:
+    """
+    Удалить клиента вместе с заказами и платежами тремя DELETE в одной
+    транзакции, обновить кэш и ленту. None — клиента нет (или он чужой).
+    """
+    order_ids = select(Order.id).where(Order.user_id == user_id, Order.client_id == client_id)
+    payments = await session.execute(
+        delete(Payment).where(Payment.order_id.in_(order_ids))
+        .execution_options(synchronize_session=False)
+    )
+    orders = await session.execute(
+        delete(Order).where(Order.user_id == user_id, Order.client_id == client_id)
+        .returning(Order.id).execution_options(synchronize_session=False)
+    )
+    deleted_orders = orders.scalars().all()
+    clients = await session.execute(
+        delete(Client).where(Client.user_id == user_id, Client.id == client_id)
+        .execution_options(synchronize_session=False)
+    )
+
+    if not clients.rowcount:
+        await session.rollback()
+        return None
+
+    # заказы и платежи клиента удаляются вместе с ним, отдельных событий для них нет
+    await changefeed.publish(session, user_id, changefeed.deleted("clients", [client_id]))
+    await session.commit()
+    await write_clients(user_id, removes=[client_id],
+                        extra_tags=(keys.orders_tag(user_id, client_id),
+                                    *(keys.ledger_tag(user_id, order_id) for order_id in deleted_orders)))
+    return {"clients": clients.rowcount, "orders": len(deleted_orders), "payments": payments.rowcount}
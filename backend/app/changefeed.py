@@ -0,0 +1,298 @@
+"""
+Лента изменений пользователя вместо периодического перечитывания списков.
+
+Роутеры публикуют компактные дельты по клиентам, заказам и платежам в
+транзакции записи, до commit, а GET /changes/stream отдаёт их открытым
+вкладкам через Server-Sent Events. Событие — один коммит:
+
+    id: 1712345
+    event: change
+    data: {"seq": 1712345, "changes": [{"entity": "orders", "op": "update", "id": 7, "data": {...}}]}
+
+op — insert / update / delete (без data) или reload (импорт: перечитать
+сущность целиком). Если data нет у insert/update, пакет был слишком велик —
+такие строки клиент перечитывает сам.
+
+seq растёт монотонно. Последние CHANGEFEED_BUFFER событий пользователя лежат
+в кольцевом буфере, и переподключение с Last-Event-ID (или ?since=) дочитывает
+пропущенное. Если нужных событий уже нет (буфер переполнился, процесс
+перезапускался, терялась связь с базой), приходит event: reset — клиент
+перечитывает данные целиком и продолжает с присланного id.
+
+CHANGEFEED_BACKEND:
+- memory — рассылка внутри процесса; seq начинается с текущего времени в мс,
+  поэтому id, выданные до перезапуска, всегда меньше новых и дают reset;
+- postgres — pg_notify в канал changefeed с seq из последовательности
+  changefeed_seq (миграция 5); каждая реплика слушает канал своим
+  соединением вне пула и раздаёт события своим подписчикам.
+
+В postgres NOTIFY уходит при commit транзакции записи и пропадает при её
+откате, а nextval берётся под pg_advisory_xact_lock пользователя: его
+транзакции получают seq в порядке commit, и события приходят по возрастанию
+seq. В memory событие рассылается после commit сессии (after_commit).
+"""
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Iterable
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import (
+    CHANGEFEED_BACKEND,
+    CHANGEFEED_BUFFER,
+    CHANGEFEED_HEARTBEAT,
+    CHANGEFEED_MAX_USERS,
+    CHANGEFEED_QUEUE,
+)
+from app.database import RoutingSession, engine
+from app.schemas.client_scheme import ClientOutputData
+from app.schemas.order_scheme import OrderOutputData
+from app.schemas.payment_scheme import PaymentOutputData
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "changefeed"
+# NOTIFY принимает до 8000 байт; что не влезает, уходит без data
+_NOTIFY_MAX_BYTES = 7500
+
+_ADAPTERS = {
+    "clients": TypeAdapter(ClientOutputData),
+    "orders": TypeAdapter(OrderOutputData),
+    "payments": TypeAdapter(PaymentOutputData),
+}
+
+# класс ключа для двухаргументного advisory lock: (класс, user_id)
+_LOCK_CLASS = 727_002
+_LOCK = text("SELECT pg_advisory_xact_lock(:lock_class, CAST(:user_id AS integer))")
+_NOTIFY = text(
+    "SELECT pg_notify(:channel, json_build_object("
+    "'seq', nextval('changefeed_seq'), 'user_id', CAST(:user_id AS bigint), "
+    "'changes', CAST(:changes AS json))::text)"
+)
+
+
+class _Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self):
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=CHANGEFEED_QUEUE)
+        self.dropped = False
+
+
+class _Feed:
+    """Буфер последних событий пользователя и его подписчики."""
+
+    def __init__(self, floor: int):
+        self.events: deque[tuple[int, bytes]] = deque(maxlen=CHANGEFEED_BUFFER)
+        # события с seq <= floor могли пройти мимо буфера
+        self.floor = floor
+        self.subscribers: set[_Subscriber] = set()
+
+    def append(self, seq: int, frame: bytes) -> None:
+        if len(self.events) == self.events.maxlen:
+            self.floor = self.events[0][0]
+        self.events.append((seq, frame))
+        self.broadcast(frame)
+
+    def broadcast(self, frame: bytes) -> None:
+        for sub in list(self.subscribers):
+            try:
+                sub.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # медленный клиент: закрыть поток, он переподключится с Last-Event-ID
+                sub.dropped = True
+                self.subscribers.discard(sub)
+                stats["dropped"] += 1
+
+
+_feeds: OrderedDict[int, _Feed] = OrderedDict()
+_counter = itertools.count(time.time_ns() // 1_000_000)
+_last_seq = next(_counter)
+_listener: asyncio.Task | None = None
+
+stats = {"published": 0, "dropped": 0}
+
+
+def rows(entity: str, op: str, objs: Iterable[Any]) -> list[dict]:
+    """Дельты insert/update по ORM-объектам в том же виде, что и ответы API."""
+    adapter = _ADAPTERS[entity]
+    return [
+        {"entity": entity, "op": op, "id": obj.id,
+         "data": adapter.dump_python(adapter.validate_python(obj, from_attributes=True), mode="json")}
+        for obj in objs
+    ]
+
+
+def deleted(entity: str, ids: Iterable[int]) -> list[dict]:
+    return [{"entity": entity, "op": "delete", "id": row_id} for row_id in ids]
+
+
+def reload(*entities: str) -> list[dict]:
+    return [{"entity": entity, "op": "reload"} for entity in entities]
+
+
+async def publish(session: AsyncSession, user_id: int, changes: list[dict]) -> None:
+    """
+    Отправить изменения подписчикам пользователя. Вызывать в транзакции
+    записи до commit: без commit событие не уйдёт.
+    """
+    if not changes:
+        return
+    if CHANGEFEED_BACKEND != "postgres":
+        session.info.setdefault("changefeed", []).append((user_id, changes))
+        return
+    # lock до commit: следующая транзакция пользователя возьмёт seq только после неё
+    await session.execute(_LOCK, {"lock_class": _LOCK_CLASS, "user_id": user_id})
+    await session.execute(_NOTIFY, {"channel": CHANNEL, "user_id": user_id,
+                                    "changes": _notify_payload(changes).decode()})
+    stats["published"] += 1
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _dispatch_after_commit(session):
+    for user_id, changes in session.info.pop("changefeed", ()):
+        stats["published"] += 1
+        _dispatch(user_id, next(_counter), changes)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("changefeed", None)
+
+
+def _notify_payload(changes: list[dict]) -> bytes:
+    payload = orjson.dumps(changes)
+    if len(payload) > _NOTIFY_MAX_BYTES:
+        payload = orjson.dumps([{k: v for k, v in c.items() if k != "data"} for c in changes])
+    if len(payload) > _NOTIFY_MAX_BYTES:
+        payload = orjson.dumps(reload(*dict.fromkeys(c["entity"] for c in changes)))
+    return payload
+
+
+def _frame(seq: int, event: str, data: dict) -> bytes:
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (seq, event.encode(), orjson.dumps(data))
+
+
+def _feed(user_id: int) -> _Feed:
+    feed = _feeds.get(user_id)
+    if feed is not None:
+        _feeds.move_to_end(user_id)
+        return feed
+    if len(_feeds) >= CHANGEFEED_MAX_USERS:
+        # вытесняем самый давний буфер без подписчиков
+        for old_id, old in _feeds.items():
+            if not old.subscribers:
+                del _feeds[old_id]
+                break
+    # всё, что было у пользователя до этого момента, буфер не видел
+    feed = _feeds[user_id] = _Feed(_last_seq)
+    return feed
+
+
+def _dispatch(user_id: int, seq: int, changes: list[dict]) -> None:
+    global _last_seq
+    feed = _feed(user_id)
+    _last_seq = max(_last_seq, seq)
+    feed.append(seq, _frame(seq, "change", {"seq": seq, "changes": changes}))
+
+
+async def stream(user_id: int, last_seq: int | None) -> AsyncIterator[bytes]:
+    """SSE-поток пользователя: пропущенное после last_seq, затем новые события."""
+    feed = _feed(user_id)
+    sub = _Subscriber()
+    # подписка и снимок буфера без await между ними: событие попадёт ровно в одно из двух
+    feed.subscribers.add(sub)
+    if last_seq is None:
+        backlog = [_frame(_last_seq, "ready", {"seq": _last_seq})]
+    elif last_seq < feed.floor or (CHANGEFEED_BACKEND != "postgres" and last_seq > _last_seq):
+        backlog = [_frame(_last_seq, "reset", {"seq": _last_seq})]
+    else:
+        backlog = [frame for seq, frame in feed.events if seq > last_seq]
+    try:
+        yield b"retry: 3000\n\n"
+        for frame in backlog:
+            yield frame
+        while not (sub.dropped and sub.queue.empty()):
+            try:
+                frame = await asyncio.wait_for(sub.queue.get(), CHANGEFEED_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # комментарий SSE: держит прокси открытыми и выявляет ушедших клиентов
+                yield b": ping\n\n"
+                continue
+            yield frame
+    finally:
+        feed.subscribers.discard(sub)
+
+
+def _on_notify(conn, pid, channel, payload: str) -> None:
+    message = orjson.loads(payload)
+    _dispatch(message["user_id"], message["seq"], message["changes"])
+
+
+def _resync(seq: int) -> None:
+    """(Пере)подключились к каналу: события до seq могли потеряться."""
+    global _last_seq
+    _last_seq = max(_last_seq, seq)
+    frame = _frame(_last_seq, "reset", {"seq": _last_seq})
+    for feed in _feeds.values():
+        feed.floor = _last_seq
+        feed.broadcast(frame)
+
+
+async def _listen() -> None:
+    import asyncpg
+
+    dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    while True:
+        try:
+            conn = await asyncpg.connect(dsn)
+            lost = asyncio.get_running_loop().create_future()
+            conn.add_termination_listener(lambda c: lost.done() or lost.set_result(None))
+            try:
+                await conn.add_listener(CHANNEL, _on_notify)
+                _resync(await conn.fetchval(
+                    "SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END "
+                    "FROM changefeed_seq"
+                ))
+                await lost
+                logger.warning("change feed listener connection lost")
+            finally:
+                if not conn.is_closed():
+                    await conn.close()
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            # пока слушателя нет, подписчики этой реплики событий не получают
+            logger.warning("change feed listener failed: %s", e)
+        await asyncio.sleep(1)
+
+
+async def start() -> None:
+    global _listener
+    if CHANGEFEED_BACKEND == "postgres":
+        _listener = asyncio.create_task(_listen())
+
+
+async def stop() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.cancel()
+        try:
+            await _listener
+        except asyncio.CancelledError:
+            pass
+        _listener = None
+
+
+def changefeed_stats() -> dict:
+    return {
+        **stats,
+        "backend": CHANGEFEED_BACKEND,
+        "last_seq": _last_seq,
+        "users": len(_feeds),
+        "subscribers": sum(len(feed.subscribers) for feed in _feeds.values()),
+    }
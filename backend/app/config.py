@@ -7,6 +7,27 @@ SECRET_KEY = os.getenv("SECRET_KEY", "change-me-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 
+# Кэш аутентифицированных пользователей (см. app/security/principal_cache.py)
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+
+# bcrypt: cost и пул, в котором считаются хэши (thread | process)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread")
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "32"))
+
+# Кэш ответов (см. app/cache): memory | redis
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+CACHE_SOFT_TTL = int(os.getenv("CACHE_SOFT_TTL", "60"))
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", "500"))
+CACHE_LOCAL_TTL = int(os.getenv("CACHE_LOCAL_TTL", "5"))
+CACHE_NAMESPACE = os.getenv("CACHE_NAMESPACE", "crm:")
+# Из полных списков удалённые строки убираются на месте, а не сбросом (app/cache/lists.py)
+CACHE_WRITE_THROUGH = os.getenv("CACHE_WRITE_THROUGH", "true").lower() in ("1", "true", "yes")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 if not DATABASE_URL:
@@ -17,6 +38,96 @@ DATABASE_URL = DATABASE_URL.replace(
     "postgresql+asyncpg://"
 )
 
+# Пул соединений (см. app/pool.py). DB_POOL_WARMUP — сколько соединений
+# открыть при старте, чтобы первые запросы не ждали TCP/TLS и авторизации.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", str(DB_POOL_SIZE)))
+# Кэш подготовленных запросов asyncpg на соединение; за pgbouncer в режиме
+# transaction нужно 0
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+# Реплика только для чтения (см. app/database.py). GET-запросы читают с неё,
+# пока она отвечает и отстаёт не больше DB_REPLICA_MAX_LAG секунд; после
+# записи пользователь DB_REPLICA_PIN_SECONDS читает с основной базы.
+# Пул реплики настраивается теми же DB_POOL_*.
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "").replace(
+    "postgresql://",
+    "postgresql+asyncpg://"
+) or None
+DB_REPLICA_PIN_SECONDS = float(os.getenv("DB_REPLICA_PIN_SECONDS", "5"))
+DB_REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+
+# Допуск запросов перед пулом БД (см. app/admission.py): лимиты пользователя
+# (memory | redis) и адаптивный общий лимит одновременных запросов процесса
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_BACKEND = os.getenv("ADMISSION_BACKEND", "memory")
+ADMISSION_USER_RATE = float(os.getenv("ADMISSION_USER_RATE", "50"))
+ADMISSION_USER_BURST = float(os.getenv("ADMISSION_USER_BURST", "100"))
+ADMISSION_USER_INFLIGHT = int(os.getenv("ADMISSION_USER_INFLIGHT", "8"))
+ADMISSION_MAX_KEYS = int(os.getenv("ADMISSION_MAX_KEYS", "100000"))
+ADMISSION_MIN_CONCURRENCY = int(os.getenv("ADMISSION_MIN_CONCURRENCY", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "256"))
+ADMISSION_TARGET_WAIT_MS = float(os.getenv("ADMISSION_TARGET_WAIT_MS", "50"))
+ADMISSION_ADJUST_INTERVAL = float(os.getenv("ADMISSION_ADJUST_INTERVAL", "1"))
+ADMISSION_BACKOFF = float(os.getenv("ADMISSION_BACKOFF", "0.75"))
+ADMISSION_INCREASE = float(os.getenv("ADMISSION_INCREASE", "2"))
+ADMISSION_EXEMPT = tuple(
+    p.strip() for p in os.getenv("ADMISSION_EXEMPT", "/health,/metrics,/changes/stream").split(",") if p.strip()
+)
+
+# Максимальный размер страницы для списков (?limit=)
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+# Максимум элементов в одном batch-запросе (/orders/batch/*, /payments/batch/*)
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+# Потоковый импорт/экспорт (/transfer): сколько ошибок строк возвращать
+# и по сколько строк читать из серверного курсора при экспорте
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+
+# Лента изменений /changes/stream (см. app/changefeed.py): memory — только
+# этот процесс, postgres — рассылка между репликами через LISTEN/NOTIFY.
+# CHANGEFEED_BUFFER — сколько последних событий пользователя хранить для
+# переподключения с Last-Event-ID, CHANGEFEED_QUEUE — очередь одного
+# подписчика (переполнилась — поток закрывается, клиент переподключается)
+CHANGEFEED_BACKEND = os.getenv("CHANGEFEED_BACKEND", "memory")
+CHANGEFEED_BUFFER = int(os.getenv("CHANGEFEED_BUFFER", "1000"))
+CHANGEFEED_MAX_USERS = int(os.getenv("CHANGEFEED_MAX_USERS", "10000"))
+CHANGEFEED_QUEUE = int(os.getenv("CHANGEFEED_QUEUE", "256"))
+CHANGEFEED_HEARTBEAT = float(os.getenv("CHANGEFEED_HEARTBEAT", "15"))
+
+# Фоновые задачи (см. app/jobs): JOBS_WORKERS — сколько задач одновременно
+# выполняет процесс `python -m app.jobs.worker` (Procfile: worker). Ему нужны
+# общие с веб-процессами кэш и лента (CACHE_BACKEND=redis,
+# CHANGEFEED_BACKEND=postgres), иначе он не стартует. JOBS_EMBEDDED_WORKERS —
+# воркеры внутри веб-процесса; по умолчанию они есть, только пока общих
+# бэкендов нет. Неудачная попытка повторяется через
+# JOBS_BACKOFF_BASE * 2^(попытка-1) с, но не дольше JOBS_BACKOFF_MAX; после
+# JOBS_MAX_ATTEMPTS задача — failed. JOBS_LEASE_SECONDS — аренда задачи
+# воркером (продлевается, пока он жив): после её истечения задачу упавшего
+# воркера берёт другой
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "4"))
+JOBS_SHARED_BACKENDS = CACHE_BACKEND == "redis" and CHANGEFEED_BACKEND == "postgres"
+JOBS_EMBEDDED_WORKERS = int(os.getenv("JOBS_EMBEDDED_WORKERS", "0" if JOBS_SHARED_BACKENDS else str(JOBS_WORKERS)))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "1"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+JOBS_BACKOFF_BASE = float(os.getenv("JOBS_BACKOFF_BASE", "2"))
+JOBS_BACKOFF_MAX = float(os.getenv("JOBS_BACKOFF_MAX", "300"))
+JOBS_LEASE_SECONDS = float(os.getenv("JOBS_LEASE_SECONDS", "60"))
+JOBS_SHUTDOWN_TIMEOUT = float(os.getenv("JOBS_SHUTDOWN_TIMEOUT", "30"))
+JOBS_RETENTION_HOURS = float(os.getenv("JOBS_RETENTION_HOURS", "168"))
+
+# Метрики Prometheus на /metrics (см. app/metrics.py); METRICS_ENABLED=false
+# отключает middleware, события SQLAlchemy и замер лага event loop
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5"))
+
 # CORS — список допустимых origins через запятую (URL фронта на Vercel)
 _CORS_ORIGINS = os.getenv("CORS_ORIGINS", "")
 CORS_ORIGINS = [o.strip() for o in _CORS_ORIGINS.split(",") if o.strip()] or [
@@ -0,0 +1,90 @@
+"""
+Общие запросы для роутеров, работающих с записями пользователя.
+"""
+from typing import Any, Iterable, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import BATCH_MAX_ITEMS
+
+Model = TypeVar("Model")
+Schema = TypeVar("Schema", bound=BaseModel)
+
+
+async def update_owned(session: AsyncSession, model: type[Model], user_id: int,
+                       obj_id: int, values: dict[str, Any]) -> Model | None:
+    """
+    Изменить запись пользователя одним `UPDATE … WHERE user_id AND id RETURNING *`.
+    Вернуть обновлённую запись или None, если её нет (или она чужая).
+    """
+    owned = (model.user_id == user_id, model.id == obj_id)
+    if not values:
+        result = await session.execute(select(model).where(*owned))
+        return result.scalar_one_or_none()
+
+    result = await session.execute(
+        update(model).where(*owned)
+        .values({getattr(model, k): v for k, v in values.items()})
+        .returning(model)
+        .execution_options(synchronize_session=False)
+    )
+    return result.scalar_one_or_none()
+
+
+def check_batch_size(items: list) -> None:
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Не больше {BATCH_MAX_ITEMS} элементов за запрос",
+        )
+
+
+def validate_batch(schema: type[Schema], items: list) -> tuple[list[tuple[int, Schema]], list[dict]]:
+    """Провалидировать элементы по одному: вернуть [(индекс, модель)] и ошибки по индексам."""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            errors.append({"index": index, "detail": e.errors(include_url=False, include_context=False)})
+    return valid, errors
+
+
+async def owned_ids(session: AsyncSession, model, user_id: int, ids: Iterable[int]) -> set[int]:
+    """Какие из ids принадлежат пользователю — одним запросом."""
+    ids = set(ids)
+    if not ids:
+        return set()
+    result = await session.execute(
+        select(model.id).where(model.user_id == user_id, model.id.in_(ids))
+    )
+    return set(result.scalars())
+
+
+async def bulk_insert(session: AsyncSession, model: type[Model], rows: list[dict]) -> list[Model]:
+    """Многострочный INSERT … RETURNING; записи возвращаются в порядке rows."""
+    if not rows:
+        return []
+    result = await session.scalars(
+        insert(model).returning(model, sort_by_parameter_order=True), rows
+    )
+    return list(result)
+
+
+async def bulk_update(session: AsyncSession, model: type[Model], rows: list[dict]) -> list[Model]:
+    """
+    UPDATE по первичному ключу для пачки строк (в каждой есть id).
+    Принадлежность строк пользователю должна быть проверена заранее.
+    """
+    if not rows:
+        return []
+    changed = [r for r in rows if len(r) > 1]
+    if changed:
+        await session.execute(update(model), changed)
+    result = await session.scalars(
+        select(model).where(model.id.in_([r["id"] for r in rows])).order_by(model.id)
+    )
+    return list(result)
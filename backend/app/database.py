@@ -1,15 +1,246 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from sqlalchemy.orm import declarative_base
-from app.config import DATABASE_URL
+"""
+Движки и сессии БД.
 
-engine = create_async_engine(DATABASE_URL, echo=False)
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+Если задан DATABASE_REPLICA_URL, рядом с основным движком создаётся движок
+реплики, и сессия сама выбирает, куда идти (RoutingSession.get_bind):
+SELECT из сессии GET/HEAD-запроса или загрузчика кэша уходит на реплику,
+всё остальное (запись, SELECT ... FOR UPDATE, flush, сырой SQL) — на
+основную базу. На основную же идут чтения, если:
+- пользователь недавно писал (после commit он закрепляется за основной
+  базой на DB_REPLICA_PIN_SECONDS — read-your-writes; закрепление живёт в
+  памяти процесса, при нескольких инстансах нужна липкая балансировка);
+- реплика не ответила на проверку или отстаёт больше DB_REPLICA_MAX_LAG.
+"""
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import AsyncIterator
+
+from fastapi import Request
+from sqlalchemy import Select, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, declarative_base
+from app.config import (
+    DATABASE_REPLICA_URL,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_REPLICA_CHECK_INTERVAL,
+    DB_REPLICA_MAX_LAG,
+    DB_REPLICA_PIN_SECONDS,
+    DB_STATEMENT_CACHE_SIZE,
+)
+from app.pool import InstrumentedPool
+
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={
+            # кэш asyncpg и кэш подготовленных запросов диалекта SQLAlchemy
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+engine = _create_engine(DATABASE_URL)
+replica_engine: AsyncEngine | None = _create_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+
+# user_id -> time.monotonic(), до которого чтения идут на основную базу
+_pinned_until: dict[int, float] = {}
+_replica = {"healthy": replica_engine is not None, "lag": None, "checks_failed": 0}
+_replica_monitor: asyncio.Task | None = None
+_reads = {"primary": 0, "replica": 0}
+
+_READ_METHODS = ("GET", "HEAD")
+
+
+class RoutingSession(Session):
+    """
+    Выбор движка на каждый запрос к БД. session.info:
+    read_only — сессию можно читать с реплики; user_id — чей это запрос
+    (для закрепления за основной базой после записи).
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            replica_engine is not None
+            and self.info.get("read_only")
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and _replica["healthy"]
+            and not _is_pinned(self.info.get("user_id"))
+        ):
+            _reads["replica"] += 1
+            return replica_engine.sync_engine
+        if isinstance(clause, Select):
+            _reads["primary"] += 1
+        return engine.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _pin_after_commit(session):
+    user_id = session.info.get("user_id")
+    if user_id is not None and replica_engine is not None:
+        _pinned_until[user_id] = time.monotonic() + DB_REPLICA_PIN_SECONDS
+
+
+def _is_pinned(user_id: int | None) -> bool:
+    if user_id is None:
+        return False
+    until = _pinned_until.get(user_id)
+    if until is None:
+        return False
+    if until > time.monotonic():
+        return True
+    del _pinned_until[user_id]
+    return False
+
+
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, sync_session_class=RoutingSession)
 Base = declarative_base()
 
-# Импорт моделей после Base, чтобы create_all видел все таблицы
-from app.models import user_table, client_table, orders_table, payments_table  # noqa: F401
+_checkouts = 0
+
+
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    global _checkouts
+    _checkouts += 1
+
+
+def _replica_error(context):
+    # обрыв соединения с репликой — сразу читать с основной, не дожидаясь проверки
+    if context.is_disconnect:
+        _replica["healthy"] = False
+
+
+event.listen(engine.sync_engine, "checkout", _count_checkout)
+if replica_engine is not None:
+    event.listen(replica_engine.sync_engine, "checkout", _count_checkout)
+    event.listen(replica_engine.sync_engine, "handle_error", _replica_error)
+
+
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Одна сессия на запрос: её получают и get_current_user_release, и хендлер
+    (FastAPI кэширует зависимость в пределах запроса). Соединение берётся из
+    пула только при первом запросе к БД, поэтому попадание в кэш пул не трогает.
+    Сессия GET/HEAD-запроса читает с реплики, если она настроена.
+    """
+    async with AsyncSessionLocal(info={"read_only": request.method in _READ_METHODS}) as session:
+        yield session
+
+
+def read_session(user_id: int) -> AsyncSession:
+    """Сессия для чтения вне запроса (загрузчики кэша, выгрузка) — тоже через реплику."""
+    return AsyncSessionLocal(info={"read_only": True, "user_id": user_id})
+
+
+def checkout_count() -> int:
+    return _checkouts
+
+
+async def warmup_pool(n: int) -> None:
+    """Открыть n соединений сразу и вернуть их в пул (не больше pool_size)."""
+    n = min(n, DB_POOL_SIZE)
+    if n <= 0:
+        return
+    async with AsyncExitStack() as stack:
+        await asyncio.gather(*(stack.enter_async_context(engine.connect()) for _ in range(n)))
+
+
+def pool_stats() -> dict:
+    return engine.pool.stats()
+
+
+# Отставание реплики: 0, если всё полученное WAL уже применено (иначе на
+# простаивающей основной базе время последней транзакции растёт без отставания)
+_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+async def check_replica() -> bool:
+    """Проверить реплику и обновить её состояние; вернуть, можно ли с неё читать."""
+    try:
+        async with replica_engine.connect() as conn:
+            lag = float((await asyncio.wait_for(conn.execute(_LAG_SQL), DB_REPLICA_CHECK_INTERVAL)).scalar_one())
+    except Exception as e:
+        # любая ошибка проверки (сеть, таймаут, реплика в рестарте) — читаем с основной
+        if _replica["healthy"]:
+            logger.warning("read replica unavailable, reading from primary: %r", e)
+        _replica.update(healthy=False, lag=None, checks_failed=_replica["checks_failed"] + 1)
+        return False
+    healthy = lag <= DB_REPLICA_MAX_LAG
+    if healthy != _replica["healthy"]:
+        logger.warning("read replica %s (lag %.1fs)", "is back" if healthy else "lags behind", lag)
+    _replica.update(healthy=healthy, lag=lag)
+    return healthy
+
+
+async def _monitor_replica() -> None:
+    while True:
+        await asyncio.sleep(DB_REPLICA_CHECK_INTERVAL)
+        await check_replica()
+        now = time.monotonic()
+        for user_id in [u for u, until in _pinned_until.items() if until <= now]:
+            del _pinned_until[user_id]
+
+
+async def start_replica_monitor() -> None:
+    """Первая проверка до приёма запросов; недоступная реплика старт не блокирует."""
+    global _replica_monitor
+    if replica_engine is not None and _replica_monitor is None:
+        await check_replica()
+        _replica_monitor = asyncio.create_task(_monitor_replica())
+
+
+async def stop_replica_monitor() -> None:
+    global _replica_monitor
+    if _replica_monitor is not None:
+        _replica_monitor.cancel()
+        try:
+            await _replica_monitor
+        except asyncio.CancelledError:
+            pass
+        _replica_monitor = None
+
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
+def replica_stats() -> dict:
+    if replica_engine is None:
+        return {"configured": False, "reads": dict(_reads)}
+    return {
+        "configured": True,
+        **_replica,
+        "pinned_users": sum(1 for until in _pinned_until.values() if until > time.monotonic()),
+        "reads": dict(_reads),
+        "pool": replica_engine.pool.stats(),
+    }
 
 
-async def create_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+# Импорт моделей после Base, чтобы метаданные видели все таблицы.
+# Схему создают и меняют миграции: python -m app.migrations upgrade
+from app.models import user_table, client_table, orders_table, payments_table, summary_table, job_table  # noqa: F401
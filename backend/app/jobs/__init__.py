@@ -0,0 +1,71 @@
+"""
+Фоновые задачи в Postgres вместо тяжёлой работы в обработчике запроса.
+
+Роутер ставит задачу в своей транзакции и сразу отвечает 202 со ссылкой
+на GET /jobs/{id}:
+
+    job = await jobs.enqueue(session, jobs.SUMMARY_REBUILD, user_id=current_user.id)
+    await session.commit()
+    return jobs.accepted(job)
+
+Задача видна воркерам только после commit — вместе с остальной записью
+запроса. Выполняют её воркеры (app/jobs/worker.py): отдельный процесс
+`python -m app.jobs.worker` и/или JOBS_EMBEDDED_WORKERS в веб-процессе.
+Обработчики регистрируются декоратором @handler(kind) в app/jobs/handlers.py
+и получают свою сессию, id пользователя и payload; возвращённый dict
+сохраняется в jobs.result.
+
+Выполнение at-least-once: задачу упавшего воркера повторит другой, поэтому
+обработчики должны быть идемпотентны.
+
+Кэш в памяти и CHANGEFEED_BACKEND=memory у каждого процесса свои, поэтому
+отдельный воркер требует CACHE_BACKEND=redis и CHANGEFEED_BACKEND=postgres и
+без них не запускается; по умолчанию тогда задачи выполняют воркеры внутри
+веб-процесса.
+"""
+from typing import Any, Awaitable, Callable
+
+from fastapi import Response, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import JOBS_MAX_ATTEMPTS
+from app.models.job_table import Job
+from app.responses import model_response
+from app.schemas.job_scheme import JobOutputData
+
+CHANNEL = "jobs"
+
+# Виды задач
+SUMMARY_REBUILD = "summary.rebuild"
+CLIENT_DELETE = "clients.delete"
+
+Handler = Callable[[AsyncSession, int | None, dict], Awaitable[dict | None]]
+HANDLERS: dict[str, Handler] = {}
+
+_NOTIFY = text("SELECT pg_notify(:channel, '')")
+
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    def register(fn: Handler) -> Handler:
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+async def enqueue(session: AsyncSession, kind: str, payload: dict[str, Any] | None = None,
+                  user_id: int | None = None, max_attempts: int = JOBS_MAX_ATTEMPTS) -> Job:
+    """Поставить задачу в текущей транзакции; коммитит вызывающий."""
+    job = Job(kind=kind, payload=payload or {}, user_id=user_id, max_attempts=max_attempts)
+    session.add(job)
+    await session.flush()
+    # NOTIFY уходит при commit и будит ждущих воркеров; потерянное
+    # уведомление стоит не больше JOBS_POLL_INTERVAL
+    await session.execute(_NOTIFY, {"channel": CHANNEL})
+    return job
+
+
+def accepted(job: Job) -> Response:
+    """Ответ 202 на постановку задачи: сама задача и Location для опроса статуса."""
+    return model_response(JobOutputData, job, status_code=status.HTTP_202_ACCEPTED,
+                          headers={"Location": f"/jobs/{job.id}"})
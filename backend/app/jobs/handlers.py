@@ -0,0 +1,22 @@
+"""
+Обработчики фоновых задач. Каждый сам коммитит свою сессию и должен быть
+идемпотентен: после падения воркера задача выполнится ещё раз.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import jobs
+from app.cascade import delete_client_cascade
+from app.summary import rebuild_summaries
+
+
+@jobs.handler(jobs.SUMMARY_REBUILD)
+async def rebuild_summary(session: AsyncSession, user_id: int | None, payload: dict) -> None:
+    await rebuild_summaries(session, user_id)
+    await session.commit()
+
+
+@jobs.handler(jobs.CLIENT_DELETE)
+async def delete_client(session: AsyncSession, user_id: int | None, payload: dict) -> dict:
+    deleted = await delete_client_cascade(session, user_id, payload["client_id"])
+    # повтор после удачной попытки, которую не успели отметить: клиента уже нет
+    return deleted or {"clients": 0, "orders": 0, "payments": 0}
@@ -0,0 +1,279 @@
+"""
+Воркеры очереди задач (app/jobs).
+
+    python -m app.jobs.worker                # JOBS_WORKERS задач одновременно
+    python -m app.jobs.worker --workers 8
+
+Каждый из N циклов забирает одну задачу коротким
+UPDATE … WHERE id = (SELECT … FOR UPDATE SKIP LOCKED LIMIT 1): параллельные
+воркеры, в том числе в других процессах, пропускают занятые строки, а не
+ждут их. Транзакция на время выполнения не держится — задача помечается
+running с арендой locked_until, которую воркер продлевает, пока работает.
+Все отметки о результате проверяют номер попытки: если аренда истекла и
+задачу уже взял другой воркер, опоздавший ничего не перезапишет.
+
+Ошибка обработчика — повтор через JOBS_BACKOFF_BASE * 2^(попытка-1) с
+(не больше JOBS_BACKOFF_MAX, со случайной долей, чтобы задачи, упавшие
+вместе, не повторялись вместе), после JOBS_MAX_ATTEMPTS — failed.
+
+Без задач циклы спят до NOTIFY jobs (шлёт enqueue при commit) или
+JOBS_POLL_INTERVAL — на случай потерянного уведомления и отложенных
+повторов. Уборка раз в JOBS_LEASE_SECONDS / 2 возвращает в очередь задачи
+с истёкшей арендой (воркер упал) и удаляет завершённые старше
+JOBS_RETENTION_HOURS.
+
+Отдельный процесс запускается только с общими с веб-процессами кэшем и
+лентой (CACHE_BACKEND=redis, CHANGEFEED_BACKEND=postgres); без них задачи
+выполняют воркеры внутри веб-процесса (JOBS_EMBEDDED_WORKERS).
+
+SIGTERM/SIGINT: новые задачи не берутся, текущие дорабатывают до
+JOBS_SHUTDOWN_TIMEOUT, потом отменяются и вернутся в очередь по аренде.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import signal
+from datetime import timedelta
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.cache import close_cache, init_cache
+from app.config import (
+    JOBS_BACKOFF_BASE,
+    JOBS_BACKOFF_MAX,
+    JOBS_LEASE_SECONDS,
+    JOBS_POLL_INTERVAL,
+    JOBS_RETENTION_HOURS,
+    JOBS_SHARED_BACKENDS,
+    JOBS_SHUTDOWN_TIMEOUT,
+    JOBS_WORKERS,
+)
+from app.database import AsyncSessionLocal, dispose_engines, engine
+from app.jobs import CHANNEL, HANDLERS
+from app.jobs import handlers  # noqa: F401  — регистрация обработчиков
+from app.migrations import check_schema_version
+from app.models.job_table import Job
+
+logger = logging.getLogger(__name__)
+
+_LEASE = timedelta(seconds=JOBS_LEASE_SECONDS)
+_MAX_ERROR_LEN = 1000
+
+_next_job = (
+    select(Job.id)
+    .where(Job.status == "queued", Job.run_at <= func.now())
+    .order_by(Job.run_at, Job.id)
+    .limit(1)
+    .with_for_update(skip_locked=True)
+    .scalar_subquery()
+)
+_CLAIM = (
+    update(Job).where(Job.id == _next_job)
+    .values(status="running", attempts=Job.attempts + 1, started_at=func.now(),
+            locked_until=func.now() + _LEASE)
+    .returning(Job.id, Job.user_id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+)
+
+_exhausted = Job.attempts >= Job.max_attempts
+_REQUEUE = (
+    update(Job).where(Job.status == "running", Job.locked_until < func.now())
+    .values(status=case((_exhausted, "failed"), else_="queued"),
+            finished_at=case((_exhausted, func.now())),
+            run_at=func.now(), locked_until=None, last_error="lease expired")
+)
+_PURGE = delete(Job).where(Job.finished_at < func.now() - timedelta(hours=JOBS_RETENTION_HOURS))
+
+_wakeup = asyncio.Event()
+_stopping = asyncio.Event()
+_loops: list[asyncio.Task] = []
+_service: list[asyncio.Task] = []
+
+stats = {"done": 0, "retried": 0, "failed": 0, "requeued": 0, "purged": 0, "running": 0}
+
+
+def _backoff(attempt: int) -> float:
+    delay = min(JOBS_BACKOFF_MAX, JOBS_BACKOFF_BASE * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def _execute_one(stmt):
+    # одиночный UPDATE атомарен и без BEGIN/COMMIT: на задачу на два обмена с базой меньше
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        return await conn.execute(stmt)
+
+
+async def _claim():
+    return (await _execute_one(_CLAIM)).first()
+
+
+async def _mark(job, **values) -> None:
+    """Отметить свою попытку задачи; чужую (аренда истекла, задачу взяли снова) не трогает."""
+    await _execute_one(
+        update(Job).where(Job.id == job.id, Job.status == "running", Job.attempts == job.attempts)
+        .values(**values)
+    )
+
+
+async def _heartbeat(job) -> None:
+    while True:
+        await asyncio.sleep(JOBS_LEASE_SECONDS / 3)
+        try:
+            await _mark(job, locked_until=func.now() + _LEASE)
+        except (OSError, SQLAlchemyError) as e:
+            logger.warning("job %s lease renewal failed: %s", job.id, e)
+
+
+async def _execute(job) -> tuple[dict | None, str | None]:
+    fn = HANDLERS.get(job.kind)
+    if fn is None:
+        return None, f"unknown job kind {job.kind!r}"
+    heartbeat = asyncio.create_task(_heartbeat(job))
+    try:
+        async with AsyncSessionLocal(info={"user_id": job.user_id}) as session:
+            return await fn(session, job.user_id, job.payload), None
+    except Exception as e:
+        logger.warning("job %s (%s) attempt %d failed", job.id, job.kind, job.attempts, exc_info=True)
+        return None, f"{type(e).__name__}: {e}"[:_MAX_ERROR_LEN]
+    finally:
+        heartbeat.cancel()
+        try:
+            await heartbeat
+        except asyncio.CancelledError:
+            pass
+
+
+async def _run(job) -> None:
+    stats["running"] += 1
+    try:
+        result, error = await _execute(job)
+    finally:
+        stats["running"] -= 1
+    if error is None:
+        await _mark(job, status="done", finished_at=func.now(), locked_until=None,
+                    last_error=None, result=result)
+        stats["done"] += 1
+    elif job.attempts < job.max_attempts and job.kind in HANDLERS:
+        await _mark(job, status="queued", locked_until=None, last_error=error,
+                    run_at=func.now() + timedelta(seconds=_backoff(job.attempts)))
+        stats["retried"] += 1
+    else:
+        await _mark(job, status="failed", finished_at=func.now(), locked_until=None, last_error=error)
+        stats["failed"] += 1
+
+
+async def _loop() -> None:
+    while not _stopping.is_set():
+        _wakeup.clear()
+        try:
+            job = await _claim()
+            if job is not None:
+                await _run(job)
+                continue
+        except (OSError, SQLAlchemyError) as e:
+            # база недоступна: задача, если её успели взять, вернётся по аренде
+            logger.warning("jobs worker loop failed: %s", e)
+        try:
+            await asyncio.wait_for(_wakeup.wait(), JOBS_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _sweep() -> None:
+    while True:
+        try:
+            async with engine.begin() as conn:
+                requeued = (await conn.execute(_REQUEUE)).rowcount
+                purged = (await conn.execute(_PURGE)).rowcount
+            stats["requeued"] += requeued
+            stats["purged"] += purged
+            if requeued:
+                logger.warning("requeued %d jobs with expired lease", requeued)
+        except (OSError, SQLAlchemyError) as e:
+            logger.warning("jobs sweep failed: %s", e)
+        await asyncio.sleep(JOBS_LEASE_SECONDS / 2)
+
+
+async def _listen() -> None:
+    import asyncpg
+
+    dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    while True:
+        try:
+            conn = await asyncpg.connect(dsn)
+            lost = asyncio.get_running_loop().create_future()
+            conn.add_termination_listener(lambda c: lost.done() or lost.set_result(None))
+            try:
+                await conn.add_listener(CHANNEL, lambda *args: _wakeup.set())
+                # пока не слушали, уведомления могли пропасть
+                _wakeup.set()
+                await lost
+                logger.warning("jobs listener connection lost")
+            finally:
+                if not conn.is_closed():
+                    await conn.close()
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            # без слушателя задачи подхватываются опросом раз в JOBS_POLL_INTERVAL
+            logger.warning("jobs listener failed: %s", e)
+        await asyncio.sleep(1)
+
+
+async def start(workers: int) -> None:
+    _stopping.clear()
+    _service.extend((asyncio.create_task(_listen()), asyncio.create_task(_sweep())))
+    _loops.extend(asyncio.create_task(_loop()) for _ in range(workers))
+
+
+async def stop() -> None:
+    """Дождаться текущих задач (не дольше JOBS_SHUTDOWN_TIMEOUT) и остановить воркеры."""
+    _stopping.set()
+    _wakeup.set()
+    if _loops:
+        _, pending = await asyncio.wait(_loops, timeout=JOBS_SHUTDOWN_TIMEOUT)
+        for task in pending:
+            task.cancel()
+    for task in _service:
+        task.cancel()
+    await asyncio.gather(*_loops, *_service, return_exceptions=True)
+    _loops.clear()
+    _service.clear()
+
+
+def jobs_stats() -> dict:
+    return {**stats, "workers": len(_loops)}
+
+
+async def _main():
+    parser = argparse.ArgumentParser(prog="python -m app.jobs.worker")
+    parser.add_argument("--workers", type=int, default=JOBS_WORKERS)
+    args = parser.parse_args()
+    if not JOBS_SHARED_BACKENDS:
+        # правки задач (кэш списков, события ленты) иначе не дойдут до веб-процессов
+        raise SystemExit(
+            "jobs worker needs CACHE_BACKEND=redis and CHANGEFEED_BACKEND=postgres; "
+            "without them jobs run inside the web process (JOBS_EMBEDDED_WORKERS)"
+        )
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    stop_requested = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop_requested.set)
+
+    try:
+        await check_schema_version()
+        await init_cache()
+        await start(args.workers)
+        logger.info("jobs worker started: %d workers", args.workers)
+        await stop_requested.wait()
+        await stop()
+        logger.info("jobs worker stopped: %s", jobs_stats())
+    finally:
+        await close_cache()
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
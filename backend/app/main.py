@@ -1,30 +1,87 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import create_db
-from app.config import CORS_ORIGINS
+from app.cache import init_cache, close_cache, cache_stats
+from app import admission, changefeed
+from app.migrations import check_schema_version
+from app.config import (
+    ADMISSION_ENABLED,
+    CORS_ORIGINS,
+    DB_POOL_WARMUP,
+    JOBS_EMBEDDED_WORKERS,
+    METRICS_ENABLED,
+)
+from app.database import (
+    dispose_engines,
+    engine,
+    pool_stats,
+    replica_engine,
+    replica_stats,
+    start_replica_monitor,
+    stop_replica_monitor,
+    warmup_pool,
+)
+from app.middleware import RequestCounterMiddleware, db_stats
+from app import metrics
+from app.security.principal_cache import principal_cache_stats
+from app.security.hash_password import hash_pool_stats, shutdown_hash_pool
 from app.routers.user_router import router as user_router
 from app.routers.auth_router import router as auth_router
 from app.routers.clients_router import router as clients_router
 from app.routers.orders_router import router as orders_router
 from app.routers.payments_router import router as payments_router
+from app.routers.transfer_router import router as transfer_router
+from app.routers.dashboard_router import router as dashboard_router
+from app.routers.changes_router import router as changes_router
+from app.routers.jobs_router import router as jobs_router
+from app.jobs import worker as jobs_worker
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await create_db()
+    await check_schema_version()
+    await warmup_pool(DB_POOL_WARMUP)
+    await start_replica_monitor()
+    await init_cache()
+    await changefeed.start()
+    if JOBS_EMBEDDED_WORKERS > 0:
+        await jobs_worker.start(JOBS_EMBEDDED_WORKERS)
+    if METRICS_ENABLED:
+        metrics.start_loop_lag_monitor()
     yield
+    await metrics.stop_loop_lag_monitor()
+    await jobs_worker.stop()
+    await changefeed.stop()
+    await close_cache()
+    await admission.close_admission()
+    shutdown_hash_pool()
+    await stop_replica_monitor()
+    await dispose_engines()
 
 
-app = FastAPI(title="Freelance CRM", lifespan=lifespan)
+# orjson по умолчанию для всех ответов, которые хендлеры не собрали сами
+app = FastAPI(title="Freelance CRM", lifespan=lifespan, default_response_class=ORJSONResponse)
+# допуск добавляется первым, чтобы оказаться внутри CORS: отказы 429/503
+# тоже получают CORS-заголовки, а preflight не расходует лимиты
+if ADMISSION_ENABLED:
+    app.add_middleware(admission.AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Retry-After отказов допуска (429/503), иначе браузер скроет его от фронтенда
+    expose_headers=["ETag", "X-Next-Cursor", "Retry-After"],
 )
+app.add_middleware(RequestCounterMiddleware)
+if METRICS_ENABLED:
+    metrics.instrument_engine(engine.sync_engine)
+    if replica_engine is not None:
+        metrics.instrument_engine(replica_engine.sync_engine)
+    app.add_middleware(metrics.MetricsMiddleware)
 
 
 @app.get("/health")
@@ -32,8 +89,51 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/health/principal-cache")
+def principal_cache_health():
+    return principal_cache_stats()
+
+
+@app.get("/health/cache")
+def cache_health():
+    return cache_stats()
+
+
+@app.get("/health/changefeed")
+def changefeed_health():
+    return changefeed.changefeed_stats()
+
+
+@app.get("/health/admission")
+def admission_health():
+    return admission.admission_stats()
+
+
+@app.get("/health/jobs")
+def jobs_health():
+    """Счётчики встроенных воркеров этого процесса (JOBS_EMBEDDED_WORKERS)."""
+    return jobs_worker.jobs_stats()
+
+
+@app.get("/health/db")
+def db_health():
+    return {**db_stats(), "pool": pool_stats(), "replica": replica_stats()}
+
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        body = metrics.render(cache_stats(), principal_cache_stats(), pool_stats(),
+                              hash_pool_stats(), replica_stats(), admission.admission_stats())
+        return Response(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 app.include_router(user_router)
 app.include_router(auth_router)
 app.include_router(clients_router)
 app.include_router(orders_router)
 app.include_router(payments_router)
+app.include_router(transfer_router)
+app.include_router(dashboard_router)
+app.include_router(changes_router)
+app.include_router(jobs_router)
@@ -0,0 +1,219 @@
+"""
+Метрики в текстовом формате Prometheus (GET /metrics).
+
+- латентность запросов по шаблону маршрута (/orders/get/{order_id}),
+  чтобы кардинальность не росла от id;
+- число SQL-запросов и время в БД на запрос — события SQLAlchemy
+  before/after_cursor_execute (упавший запрос — handle_error), накопитель
+  запроса лежит в contextvar;
+- время bcrypt и сериализации ответов для кэша;
+- кэш ответов (попадания, промахи, вытеснения), principal-кэш, пул БД;
+- лаг event loop: фоновая задача спит METRICS_LOOP_LAG_INTERVAL и
+  меряет, насколько позже она проснулась.
+
+Всё хранится в словарях процесса: у каждого воркера свои метрики.
+"""
+import asyncio
+import bisect
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.config import METRICS_LOOP_LAG_INTERVAL
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        # значения меток -> [счётчики по корзинам (не накопительные), сумма, количество]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in self._series.items():
+            labels = _labels(self.labels, label_values)
+            prefix = labels + "," if labels else ""
+            suffix = "{" + labels + "}" if labels else ""
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{suffix} {total}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{n}="{v}"' for n, v in zip(names, values))
+
+
+def _scalar(name: str, kind: str, help: str, value: float) -> list[str]:
+    return [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Время обработки запроса",
+                            LATENCY_BUCKETS, ("method", "route", "status"))
+REQUEST_DB_QUERIES = Histogram("http_request_db_queries", "SQL-запросов на HTTP-запрос",
+                               QUERY_COUNT_BUCKETS, ("route",))
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Время в БД на HTTP-запрос",
+                               LATENCY_BUCKETS, ("route",))
+HASH_SECONDS = Histogram("bcrypt_seconds", "Время bcrypt в пуле с учётом очереди",
+                         LATENCY_BUCKETS, ("op",))
+ENCODE_SECONDS = Histogram("response_encode_seconds", "Валидация и сериализация тела для кэша",
+                           LATENCY_BUCKETS)
+LOOP_LAG_SECONDS = Histogram("event_loop_lag_seconds", "Насколько позже планового просыпается event loop",
+                             LATENCY_BUCKETS)
+
+_db_totals = {"queries": 0, "seconds": 0.0}
+_last_loop_lag = 0.0
+_loop_lag_task: asyncio.Task | None = None
+
+# [число запросов, время в БД] текущего HTTP-запроса
+_request_db: ContextVar[list | None] = ContextVar("request_db", default=None)
+
+
+class MetricsMiddleware:
+    """Чистый ASGI: без BaseHTTPMiddleware и лишних задач на каждый запрос."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        db = [0, 0.0]
+        token = _request_db.set(db)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_db.reset(token)
+            # FastAPI кладёт сработавший маршрут в scope — берём его шаблон
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUEST_SECONDS.observe(elapsed, scope["method"], path, str(status_code))
+            REQUEST_DB_QUERIES.observe(db[0], path)
+            REQUEST_DB_SECONDS.observe(db[1], path)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish_query(conn)
+
+
+def _handle_error(context):
+    # after_cursor_execute для упавшего запроса не вызывается: снять его отметку здесь
+    conn = context.connection
+    if conn is not None and context.execution_context is not None and conn.info.get("query_start"):
+        _finish_query(conn)
+
+
+def _finish_query(conn) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    _db_totals["queries"] += 1
+    _db_totals["seconds"] += elapsed
+    db = _request_db.get()
+    if db is not None:
+        db[0] += 1
+        db[1] += elapsed
+
+
+def instrument_engine(engine) -> None:
+    """Подписаться на события sync-движка (для AsyncEngine — engine.sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+async def _measure_loop_lag() -> None:
+    global _last_loop_lag
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(METRICS_LOOP_LAG_INTERVAL)
+        _last_loop_lag = max(0.0, loop.time() - start - METRICS_LOOP_LAG_INTERVAL)
+        LOOP_LAG_SECONDS.observe(_last_loop_lag)
+
+
+def start_loop_lag_monitor() -> None:
+    global _loop_lag_task
+    if _loop_lag_task is None:
+        _loop_lag_task = asyncio.create_task(_measure_loop_lag())
+
+
+async def stop_loop_lag_monitor() -> None:
+    global _loop_lag_task
+    if _loop_lag_task is not None:
+        _loop_lag_task.cancel()
+        try:
+            await _loop_lag_task
+        except asyncio.CancelledError:
+            pass
+        _loop_lag_task = None
+
+
+def render(cache: dict, principal: dict, pool: dict, hash_pool: dict, replica: dict,
+           admission: dict) -> str:
+    """Собрать все метрики; сторонние счётчики передаются готовыми словарями."""
+    lines = []
+    for histogram in (REQUEST_SECONDS, REQUEST_DB_QUERIES, REQUEST_DB_SECONDS,
+                      HASH_SECONDS, ENCODE_SECONDS, LOOP_LAG_SECONDS):
+        lines += histogram.render()
+    lines += _scalar("db_queries_total", "counter", "Всего SQL-запросов", _db_totals["queries"])
+    lines += _scalar("db_query_seconds_total", "counter", "Всего времени в БД", _db_totals["seconds"])
+    lines += _scalar("event_loop_lag_last_seconds", "gauge", "Последний замер лага event loop", _last_loop_lag)
+    for key in ("hits", "stale_hits", "misses", "loads", "coalesced", "load_errors",
+                "patched", "invalidated_keys", "evictions"):
+        lines += _scalar(f"cache_{key}_total", "counter", f"Кэш ответов: {key}", cache[key])
+    lines += _scalar("cache_inflight", "gauge", "Загрузок кэша в процессе", cache["inflight"])
+    for key, value in principal.items():
+        kind = "gauge" if key in ("tokens", "users") else "counter"
+        name = f"principal_cache_{key}" + ("_total" if kind == "counter" else "")
+        lines += _scalar(name, kind, f"Principal-кэш: {key}", value)
+    for key in ("size", "checked_out", "checked_in", "overflow", "waiting"):
+        lines += _scalar(f"db_pool_{key}", "gauge", f"Пул БД: {key}", pool[key])
+    lines += _scalar("db_pool_timeouts_total", "counter", "Таймауты ожидания соединения", pool["timeouts"])
+    lines += _scalar("bcrypt_pending", "gauge", "Задач bcrypt в работе и в очереди", hash_pool["pending"])
+    for target, count in replica["reads"].items():
+        lines += _scalar(f"db_reads_{target}_total", "counter", f"SELECT на {target}", count)
+    if replica["configured"]:
+        lines += _scalar("db_replica_healthy", "gauge", "Чтения идут на реплику", int(replica["healthy"]))
+        lines += _scalar("db_replica_pinned_users", "gauge", "Пользователи, закреплённые за основной базой",
+                         replica["pinned_users"])
+        if replica["lag"] is not None:
+            lines += _scalar("db_replica_lag_seconds", "gauge", "Отставание реплики", replica["lag"])
+    for key in ("admitted", "rate_limited", "inflight_limited", "shed"):
+        lines += _scalar(f"admission_{key}_total", "counter", f"Допуск запросов: {key}", admission[key])
+    lines += _scalar("admission_limit", "gauge", "Адаптивный лимит одновременных запросов", admission["limit"])
+    lines += _scalar("admission_inflight", "gauge", "Запросов в работе под лимитом", admission["inflight"])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,32 @@
+"""
+ASGI-middleware приложения.
+
+Написаны как «чистые» ASGI-обёртки, а не через BaseHTTPMiddleware:
+тот гоняет ответ через лишнюю задачу и очередь, что заметно на быстрых
+ответах из кэша и ломает потоковую выгрузку.
+"""
+from app.database import checkout_count
+
+_requests = 0
+
+
+class RequestCounterMiddleware:
+    """Считает HTTP-запросы, чтобы сравнивать с числом выдач соединений из пула."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _requests
+        if scope["type"] == "http":
+            _requests += 1
+        await self.app(scope, receive, send)
+
+
+def db_stats() -> dict:
+    checkouts = checkout_count()
+    return {
+        "requests": _requests,
+        "checkouts": checkouts,
+        "checkouts_per_request": round(checkouts / _requests, 3) if _requests else 0.0,
+    }
@@ -0,0 +1,102 @@
+"""
+Версионированные миграции схемы.
+
+Каждая миграция — модуль с VERSION, DESCRIPTION и списками SQL-команд
+UPGRADE / DOWNGRADE. Применённые версии хранятся в schema_migrations.
+Миграции запускаются отдельной командой (см. MIGRATIONS_README.md),
+а приложение при старте только проверяет, что схема актуальна.
+
+    python -m app.migrations upgrade          # до последней версии
+    python -m app.migrations downgrade 1      # откатить до версии 1
+    python -m app.migrations current
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.database import engine
+from app.migrations import (
+    m0001_initial,
+    m0002_indexes_fk,
+    m0003_user_summaries,
+    m0004_search,
+    m0005_changefeed,
+    m0006_order_balance,
+    m0007_jobs,
+)
+
+MIGRATIONS = [m0001_initial, m0002_indexes_fk, m0003_user_summaries, m0004_search,
+              m0005_changefeed, m0006_order_balance, m0007_jobs]
+HEAD = MIGRATIONS[-1].VERSION
+
+# Ключ advisory lock, чтобы две реплики не мигрировали одновременно
+_LOCK_KEY = 727_001
+
+
+async def _ensure_table(conn: AsyncConnection) -> None:
+    await conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INTEGER PRIMARY KEY,"
+        " description VARCHAR NOT NULL,"
+        " applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+    )
+
+
+async def _current(conn: AsyncConnection) -> int:
+    result = await conn.execute(text("SELECT coalesce(max(version), 0) FROM schema_migrations"))
+    return result.scalar_one()
+
+
+async def current_version() -> int:
+    async with engine.connect() as conn:
+        exists = await conn.execute(text("SELECT to_regclass('schema_migrations') IS NOT NULL"))
+        if not exists.scalar_one():
+            return 0
+        return await _current(conn)
+
+
+async def upgrade(target: int = HEAD) -> list[int]:
+    """Применить миграции до target включительно, вернуть применённые версии."""
+    applied = []
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _LOCK_KEY})
+        await _ensure_table(conn)
+        current = await _current(conn)
+        for migration in MIGRATIONS:
+            if current < migration.VERSION <= target:
+                for stmt in migration.UPGRADE:
+                    await conn.exec_driver_sql(stmt)
+                await conn.execute(
+                    text("INSERT INTO schema_migrations (version, description) VALUES (:v, :d)"),
+                    {"v": migration.VERSION, "d": migration.DESCRIPTION},
+                )
+                applied.append(migration.VERSION)
+    return applied
+
+
+async def downgrade(target: int) -> list[int]:
+    """Откатить миграции с версией больше target, вернуть откаченные версии."""
+    reverted = []
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _LOCK_KEY})
+        await _ensure_table(conn)
+        current = await _current(conn)
+        for migration in reversed(MIGRATIONS):
+            if target < migration.VERSION <= current:
+                for stmt in migration.DOWNGRADE:
+                    await conn.exec_driver_sql(stmt)
+                await conn.execute(
+                    text("DELETE FROM schema_migrations WHERE version = :v"),
+                    {"v": migration.VERSION},
+                )
+                reverted.append(migration.VERSION)
+    return reverted
+
+
+async def check_schema_version() -> None:
+    """Проверка при старте: схема должна быть ровно на HEAD."""
+    version = await current_version()
+    if version != HEAD:
+        raise RuntimeError(
+            f"Database schema version is {version}, expected {HEAD}. "
+            "Run `python -m app.migrations upgrade`."
+        )
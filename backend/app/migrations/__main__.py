@@ -0,0 +1,29 @@
+import argparse
+import asyncio
+
+from app.database import engine
+from app.migrations import HEAD, current_version, downgrade, upgrade
+
+
+async def main():
+    parser = argparse.ArgumentParser(prog="python -m app.migrations")
+    sub = parser.add_subparsers(dest="command", required=True)
+    up = sub.add_parser("upgrade")
+    up.add_argument("target", type=int, nargs="?", default=HEAD)
+    down = sub.add_parser("downgrade")
+    down.add_argument("target", type=int)
+    sub.add_parser("current")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "upgrade":
+            print("applied:", await upgrade(args.target) or "nothing")
+        elif args.command == "downgrade":
+            print("reverted:", await downgrade(args.target) or "nothing")
+        print(f"schema version: {await current_version()} (head {HEAD})")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+Исходная схема — то, что раньше создавал Base.metadata.create_all.
+IF NOT EXISTS позволяет принять под миграции уже существующую базу.
+"""
+VERSION = 1
+DESCRIPTION = "initial schema"
+
+UPGRADE = [
+    """
+    DO $$ BEGIN
+        CREATE TYPE orderstatus AS ENUM ('NEW', 'ACTIVE', 'ARCHIVED');
+    EXCEPTION WHEN duplicate_object THEN NULL;
+    END $$
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        username VARCHAR NOT NULL,
+        email VARCHAR NOT NULL,
+        password_hash VARCHAR NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_users_username ON users (username)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    """
+    CREATE TABLE IF NOT EXISTS clients (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users (id),
+        name VARCHAR NOT NULL,
+        contact VARCHAR NOT NULL,
+        notes VARCHAR
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_clients_name ON clients (name)",
+    "CREATE INDEX IF NOT EXISTS ix_clients_contact ON clients (contact)",
+    """
+    CREATE TABLE IF NOT EXISTS orders (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users (id),
+        client_id INTEGER REFERENCES clients (id),
+        title VARCHAR NOT NULL,
+        description VARCHAR NOT NULL,
+        price INTEGER NOT NULL,
+        order_status_enum orderstatus NOT NULL,
+        notes VARCHAR,
+        is_paid BOOLEAN NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS payments (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users (id),
+        order_id INTEGER REFERENCES orders (id),
+        amount INTEGER NOT NULL,
+        is_paid BOOLEAN NOT NULL
+    )
+    """,
+]
+
+DOWNGRADE = [
+    "DROP TABLE IF EXISTS payments",
+    "DROP TABLE IF EXISTS orders",
+    "DROP TABLE IF EXISTS clients",
+    "DROP TABLE IF EXISTS users",
+    "DROP TYPE IF EXISTS orderstatus",
+]
@@ -0,0 +1,44 @@
+"""
+Составные индексы под горячие запросы (все выборки идут по user_id) и
+ON DELETE CASCADE на внешних ключах.
+
+Индексы по одиночным client_id / order_id нужны самим каскадам: без них
+удаление клиента или заказа сканирует orders / payments целиком.
+"""
+VERSION = 2
+DESCRIPTION = "composite indexes and ON DELETE CASCADE"
+
+_FKS = [
+    ("clients", "clients_user_id_fkey", "user_id", "users"),
+    ("orders", "orders_user_id_fkey", "user_id", "users"),
+    ("orders", "orders_client_id_fkey", "client_id", "clients"),
+    ("payments", "payments_user_id_fkey", "user_id", "users"),
+    ("payments", "payments_order_id_fkey", "order_id", "orders"),
+]
+
+_INDEXES = [
+    ("ix_clients_user_id_id", "clients (user_id, id)"),
+    ("ix_orders_user_id_id", "orders (user_id, id)"),
+    ("ix_orders_user_id_client_id_id", "orders (user_id, client_id, id)"),
+    ("ix_orders_client_id", "orders (client_id)"),
+    ("ix_payments_user_id_order_id", "payments (user_id, order_id)"),
+    ("ix_payments_order_id", "payments (order_id)"),
+]
+
+
+def _fk(table: str, name: str, column: str, ref: str, on_delete: str) -> str:
+    return (
+        f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}, "
+        f"ADD CONSTRAINT {name} FOREIGN KEY ({column}) REFERENCES {ref} (id){on_delete}"
+    )
+
+
+UPGRADE = (
+    [f"CREATE INDEX IF NOT EXISTS {name} ON {target}" for name, target in _INDEXES]
+    + [_fk(*fk, on_delete=" ON DELETE CASCADE") for fk in _FKS]
+)
+
+DOWNGRADE = (
+    [_fk(*fk, on_delete="") for fk in _FKS]
+    + [f"DROP INDEX IF EXISTS {name}" for name, _ in _INDEXES]
+)
@@ -0,0 +1,121 @@
+"""
+Таблица user_summaries с агрегатами для дашборда и триггеры, которые
+обновляют её инкрементально при каждой записи в orders и payments.
+
+Триггеры уровня оператора с transition tables: один INSERT/UPDATE/DELETE
+на тысячи строк (batch, импорт через COPY, каскадное удаление) даёт одно
+обновление сводки на пользователя, а не по одному на строку.
+"""
+VERSION = 3
+DESCRIPTION = "user_summaries with incremental triggers"
+
+_COLUMNS = "orders_new, orders_active, orders_archived, total_price, unpaid_price, paid_amount"
+
+
+def _upsert(source: str, orders: bool) -> str:
+    """Прибавить к сводке дельты из source: (user_id, status, price, is_paid, sign) или (user_id, amount, is_paid, sign)."""
+    if orders:
+        values = """
+            coalesce(sum(sign) FILTER (WHERE status = 'NEW'), 0),
+            coalesce(sum(sign) FILTER (WHERE status = 'ACTIVE'), 0),
+            coalesce(sum(sign) FILTER (WHERE status = 'ARCHIVED'), 0),
+            coalesce(sum(sign * price), 0),
+            coalesce(sum(sign * price) FILTER (WHERE NOT is_paid), 0),
+            0"""
+    else:
+        values = """
+            0, 0, 0, 0, 0,
+            coalesce(sum(sign * amount) FILTER (WHERE is_paid), 0)"""
+    return f"""
+        INSERT INTO user_summaries AS s (user_id, {_COLUMNS})
+        SELECT user_id, {values}
+        FROM ({source}) d
+        GROUP BY user_id
+        -- при каскадном удалении пользователя сводку уже не пишем
+        HAVING EXISTS (SELECT 1 FROM users u WHERE u.id = d.user_id)
+        ON CONFLICT (user_id) DO UPDATE SET
+            orders_new = s.orders_new + EXCLUDED.orders_new,
+            orders_active = s.orders_active + EXCLUDED.orders_active,
+            orders_archived = s.orders_archived + EXCLUDED.orders_archived,
+            total_price = s.total_price + EXCLUDED.total_price,
+            unpaid_price = s.unpaid_price + EXCLUDED.unpaid_price,
+            paid_amount = s.paid_amount + EXCLUDED.paid_amount;
+    """
+
+
+def _trigger_function(name: str, columns: str, orders: bool) -> str:
+    new = f"SELECT user_id, {columns}, 1 AS sign FROM new_rows"
+    old = f"SELECT user_id, {columns}, -1 AS sign FROM old_rows"
+    return f"""
+    CREATE OR REPLACE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_upsert(new, orders)}
+        ELSIF TG_OP = 'DELETE' THEN
+            {_upsert(old, orders)}
+        ELSE
+            {_upsert(new + " UNION ALL " + old, orders)}
+        END IF;
+        RETURN NULL;
+    END $$
+    """
+
+
+def _triggers(table: str, function: str) -> list[str]:
+    return [
+        f"CREATE TRIGGER {table}_summary_ins AFTER INSERT ON {table} "
+        f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}()",
+        f"CREATE TRIGGER {table}_summary_upd AFTER UPDATE ON {table} "
+        f"REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()",
+        f"CREATE TRIGGER {table}_summary_del AFTER DELETE ON {table} "
+        f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION {function}()",
+    ]
+
+
+UPGRADE = [
+    """
+    CREATE TABLE user_summaries (
+        user_id INTEGER PRIMARY KEY REFERENCES users (id) ON DELETE CASCADE,
+        orders_new BIGINT NOT NULL DEFAULT 0,
+        orders_active BIGINT NOT NULL DEFAULT 0,
+        orders_archived BIGINT NOT NULL DEFAULT 0,
+        total_price BIGINT NOT NULL DEFAULT 0,
+        unpaid_price BIGINT NOT NULL DEFAULT 0,
+        paid_amount BIGINT NOT NULL DEFAULT 0
+    )
+    """,
+    _trigger_function("user_summaries_orders", "order_status_enum AS status, price, is_paid", orders=True),
+    _trigger_function("user_summaries_payments", "amount, is_paid", orders=False),
+    *_triggers("orders", "user_summaries_orders"),
+    *_triggers("payments", "user_summaries_payments"),
+    # Начальное заполнение по уже существующим данным
+    f"""
+    INSERT INTO user_summaries (user_id, {_COLUMNS})
+    SELECT u.id,
+           coalesce(o.orders_new, 0), coalesce(o.orders_active, 0), coalesce(o.orders_archived, 0),
+           coalesce(o.total_price, 0), coalesce(o.unpaid_price, 0), coalesce(p.paid_amount, 0)
+    FROM users u
+    LEFT JOIN (
+        SELECT user_id,
+               count(*) FILTER (WHERE order_status_enum = 'NEW') AS orders_new,
+               count(*) FILTER (WHERE order_status_enum = 'ACTIVE') AS orders_active,
+               count(*) FILTER (WHERE order_status_enum = 'ARCHIVED') AS orders_archived,
+               sum(price) AS total_price,
+               sum(price) FILTER (WHERE NOT is_paid) AS unpaid_price
+        FROM orders GROUP BY user_id
+    ) o ON o.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, sum(amount) FILTER (WHERE is_paid) AS paid_amount
+        FROM payments GROUP BY user_id
+    ) p ON p.user_id = u.id
+    """,
+]
+
+DOWNGRADE = [
+    *[f"DROP TRIGGER IF EXISTS {t}_summary_{op} ON {t}"
+      for t in ("orders", "payments") for op in ("ins", "upd", "del")],
+    "DROP FUNCTION IF EXISTS user_summaries_orders()",
+    "DROP FUNCTION IF EXISTS user_summaries_payments()",
+    "DROP TABLE IF EXISTS user_summaries",
+]
@@ -0,0 +1,52 @@
+"""
+Полнотекстовый и нечёткий поиск по клиентам и заказам.
+
+- search_tsv — генерируемая tsvector-колонка (конфигурация 'simple': без
+  стемминга, одинаково для русского и английского) с весами A/B/C по
+  полям; GIN (user_id, search_tsv) через btree_gin, чтобы поиск сразу
+  ограничивался пользователем.
+- trigram GIN (pg_trgm) по склейке тех же полей — для опечаток и
+  подстрок. Выражение должно совпадать с app/search.py символ в символ,
+  иначе планировщик не узнает индекс.
+
+ADD COLUMN … STORED переписывает таблицу: на больших базах миграцию
+лучше запускать в окно низкой нагрузки.
+"""
+VERSION = 4
+DESCRIPTION = "full-text and trigram search on clients and orders"
+
+_TSV = {
+    "clients": (
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(contact, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(notes, '')), 'C')"
+    ),
+    "orders": (
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(notes, '')), 'C')"
+    ),
+}
+
+_TRGM = {
+    "clients": "(name || ' ' || contact || ' ' || coalesce(notes, ''))",
+    "orders": "(title || ' ' || description || ' ' || coalesce(notes, ''))",
+}
+
+UPGRADE = (
+    ["CREATE EXTENSION IF NOT EXISTS pg_trgm",
+     "CREATE EXTENSION IF NOT EXISTS btree_gin"]
+    + [f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_tsv tsvector "
+       f"GENERATED ALWAYS AS ({expr}) STORED" for table, expr in _TSV.items()]
+    + [f"CREATE INDEX IF NOT EXISTS ix_{table}_search_tsv ON {table} USING gin (user_id, search_tsv)"
+       for table in _TSV]
+    + [f"CREATE INDEX IF NOT EXISTS ix_{table}_search_trgm ON {table} USING gin ({expr} gin_trgm_ops)"
+       for table, expr in _TRGM.items()]
+)
+
+# Расширения не удаляются: ими могут пользоваться и другие объекты базы
+DOWNGRADE = (
+    [f"DROP INDEX IF EXISTS ix_{table}_search_trgm" for table in _TRGM]
+    + [f"DROP INDEX IF EXISTS ix_{table}_search_tsv" for table in _TSV]
+    + [f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_tsv" for table in _TSV]
+)
@@ -0,0 +1,15 @@
+"""
+Сквозной номер событий ленты изменений (app/changefeed.py) для
+CHANGEFEED_BACKEND=postgres: все реплики берут номера из одной
+последовательности, поэтому Last-Event-ID годится для любой из них.
+"""
+VERSION = 5
+DESCRIPTION = "change feed sequence"
+
+UPGRADE = [
+    "CREATE SEQUENCE IF NOT EXISTS changefeed_seq",
+]
+
+DOWNGRADE = [
+    "DROP SEQUENCE IF EXISTS changefeed_seq",
+]
@@ -0,0 +1,97 @@
+"""
+Баланс заказа: orders.paid_amount — сумма проведённых платежей (is_paid),
+её держит триггер на payments в той же транзакции, что и запись платежа.
+orders.is_paid больше не задаётся руками, а вычисляется базой:
+paid_amount >= price.
+
+Триггер уровня оператора с transition tables, как у сводки (миграция 3):
+пачка платежей или импорт через COPY дают один UPDATE заказов. Строки
+заказов блокируются по возрастанию id, чтобы параллельные пачки платежей
+по одним и тем же заказам не ловили deadlock. Изменение orders.paid_amount
+само запускает триггер сводки заказов, поэтому unpaid_price в
+user_summaries остаётся согласованной.
+
+Заказы, отмеченные оплаченными вручную, но без платежей на всю цену,
+получают доплату — проведённый платёж на price - оплачено, иначе они стали
+бы неоплаченными. ADD COLUMN … STORED переписывает таблицу orders.
+"""
+VERSION = 6
+DESCRIPTION = "order paid_amount maintained by payments trigger, derived is_paid"
+
+
+def _apply(source: str) -> str:
+    """Прибавить к paid_amount заказов дельты из source: (order_id, amount, is_paid, sign)."""
+    return f"""
+        WITH d AS (
+            SELECT order_id, sum(sign * amount) AS delta
+            FROM ({source}) s
+            WHERE is_paid
+            GROUP BY order_id
+            HAVING sum(sign * amount) <> 0
+        ), locked AS (
+            SELECT o.id FROM orders o JOIN d ON d.order_id = o.id
+            ORDER BY o.id FOR UPDATE OF o
+        )
+        UPDATE orders o SET paid_amount = o.paid_amount + d.delta
+        FROM d
+        WHERE o.id = d.order_id AND o.id IN (SELECT id FROM locked);
+    """
+
+
+_NEW = "SELECT order_id, amount, is_paid, 1 AS sign FROM new_rows"
+_OLD = "SELECT order_id, amount, is_paid, -1 AS sign FROM old_rows"
+
+UPGRADE = [
+    # до пересчёта is_paid: ручная отметка «оплачено» становится платежом;
+    # сводку по payments поправит её триггер (миграция 3)
+    """
+    INSERT INTO payments (user_id, order_id, amount, is_paid)
+    SELECT o.user_id, o.id, o.price - coalesce(p.paid, 0), true
+    FROM orders o
+    LEFT JOIN (SELECT order_id, sum(amount) AS paid FROM payments WHERE is_paid GROUP BY order_id) p
+        ON p.order_id = o.id
+    WHERE o.is_paid AND coalesce(p.paid, 0) < o.price
+    """,
+    "ALTER TABLE orders ADD COLUMN paid_amount BIGINT NOT NULL DEFAULT 0",
+    """
+    UPDATE orders o SET paid_amount = p.paid
+    FROM (SELECT order_id, sum(amount) AS paid FROM payments WHERE is_paid GROUP BY order_id) p
+    WHERE o.id = p.order_id
+    """,
+    "ALTER TABLE orders DROP COLUMN is_paid",
+    "ALTER TABLE orders ADD COLUMN is_paid BOOLEAN NOT NULL "
+    "GENERATED ALWAYS AS (paid_amount >= price) STORED",
+    # is_paid заказов поменялся без UPDATE — триггер сводки его не видел
+    """
+    UPDATE user_summaries s SET unpaid_price = coalesce(
+        (SELECT sum(price) FROM orders o WHERE o.user_id = s.user_id AND NOT o.is_paid), 0)
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION orders_paid_amount() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_apply(_NEW)}
+        ELSIF TG_OP = 'DELETE' THEN
+            {_apply(_OLD)}
+        ELSE
+            {_apply(_NEW + " UNION ALL " + _OLD)}
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    "CREATE TRIGGER payments_paid_ins AFTER INSERT ON payments "
+    "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION orders_paid_amount()",
+    "CREATE TRIGGER payments_paid_upd AFTER UPDATE ON payments "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION orders_paid_amount()",
+    "CREATE TRIGGER payments_paid_del AFTER DELETE ON payments "
+    "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION orders_paid_amount()",
+]
+
+# is_paid остаётся обычной колонкой с последними вычисленными значениями
+DOWNGRADE = [
+    *[f"DROP TRIGGER IF EXISTS payments_paid_{op} ON payments" for op in ("ins", "upd", "del")],
+    "DROP FUNCTION IF EXISTS orders_paid_amount()",
+    "ALTER TABLE orders ALTER COLUMN is_paid DROP EXPRESSION",
+    "ALTER TABLE orders DROP COLUMN paid_amount",
+]
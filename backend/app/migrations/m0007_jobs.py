@@ -0,0 +1,39 @@
+"""
+Очередь фоновых задач (app/jobs): строка jobs — одна задача.
+
+Воркеры забирают задачи через SELECT … FOR UPDATE SKIP LOCKED по частичному
+индексу ожидающих задач, поэтому несколько процессов не мешают друг другу.
+Выполненные задачи хранятся JOBS_RETENTION_HOURS для опроса статуса.
+"""
+VERSION = 7
+DESCRIPTION = "background jobs queue"
+
+UPGRADE = [
+    """
+    CREATE TABLE jobs (
+        id BIGSERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+        kind VARCHAR NOT NULL,
+        payload JSONB NOT NULL DEFAULT '{}',
+        status VARCHAR NOT NULL DEFAULT 'queued'
+            CHECK (status IN ('queued', 'running', 'done', 'failed')),
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        run_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        locked_until TIMESTAMPTZ,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        started_at TIMESTAMPTZ,
+        finished_at TIMESTAMPTZ,
+        last_error VARCHAR,
+        result JSONB
+    )
+    """,
+    "CREATE INDEX ix_jobs_queued ON jobs (run_at, id) WHERE status = 'queued'",
+    "CREATE INDEX ix_jobs_running ON jobs (locked_until) WHERE status = 'running'",
+    "CREATE INDEX ix_jobs_user_id_id ON jobs (user_id, id)",
+    "CREATE INDEX ix_jobs_finished_at ON jobs (finished_at) WHERE finished_at IS NOT NULL",
+]
+
+DOWNGRADE = [
+    "DROP TABLE IF EXISTS jobs",
+]
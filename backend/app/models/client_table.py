@@ -1,12 +1,17 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from app.database import Base
 
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        Index("ix_clients_user_id_id", "user_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     name =Column(String, index=True, nullable=False)
     contact = Column(String, index=True, nullable=False)
     notes = Column(String, nullable=True)
+    # search_tsv (миграция 4) генерирует база; в модели колонки нет намеренно,
+    # чтобы INSERT/COPY её не трогали — поиск см. app/search.py
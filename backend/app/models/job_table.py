@@ -0,0 +1,31 @@
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, String, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from app.database import Base
+
+
+class Job(Base):
+    """Фоновая задача (миграция 7). Ставится через app.jobs.enqueue, выполняется app.jobs.worker."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_queued", "run_at", "id", postgresql_where=text("status = 'queued'")),
+        Index("ix_jobs_running", "locked_until", postgresql_where=text("status = 'running'")),
+        Index("ix_jobs_user_id_id", "user_id", "id"),
+        Index("ix_jobs_finished_at", "finished_at", postgresql_where=text("finished_at IS NOT NULL")),
+    )
+    # статус и время постановки нужны в ответе 202 сразу после flush
+    __mapper_args__ = {"eager_defaults": True}
+
+    id = Column(BigInteger, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False, server_default="{}")
+    status = Column(String, nullable=False, server_default="queued")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+    result = Column(JSONB(none_as_null=True), nullable=True)
@@ -1,18 +1,26 @@
-from sqlalchemy import Column, Integer, String, Boolean, Enum as SqlEnum, ForeignKey
+from sqlalchemy import BigInteger, Column, Computed, Integer, String, Boolean, Enum as SqlEnum, ForeignKey, Index
 from app.database import Base
 from app.schemas.order_scheme import OrderStatus
 
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_user_id_id", "user_id", "id"),
+        Index("ix_orders_user_id_client_id_id", "user_id", "client_id", "id"),
+        Index("ix_orders_client_id", "client_id"),
+    )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    client_id = Column(Integer, ForeignKey("clients.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    client_id = Column(Integer, ForeignKey("clients.id", ondelete="CASCADE"))
     title = Column(String, nullable=False)
     description = Column(String, nullable=False)
     price = Column(Integer, nullable=False)
     status = Column(SqlEnum(OrderStatus), name="order_status_enum",
                     default=OrderStatus.NEW, nullable=False)
     notes = Column(String, nullable=True)
-    is_paid = Column(Boolean, nullable=False)
+    # сумма проведённых платежей; пишет только триггер на payments (миграция 6)
+    paid_amount = Column(BigInteger, nullable=False, server_default="0")
+    is_paid = Column(Boolean, Computed("paid_amount >= price"), nullable=False)
+    # search_tsv (миграция 4) генерирует база, см. app/search.py
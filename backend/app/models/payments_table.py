@@ -1,12 +1,16 @@
-from sqlalchemy import Column, Integer, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, Index
 from app.database import Base
 
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_user_id_order_id", "user_id", "order_id"),
+        Index("ix_payments_order_id", "order_id"),
+    )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"))
     amount = Column(Integer, nullable=False)
     is_paid = Column(Boolean, nullable=False)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, BigInteger, ForeignKey
+from app.database import Base
+
+
+class UserSummary(Base):
+    """Агрегаты для дашборда. Поддерживаются триггерами (миграция 3), из кода не пишутся."""
+    __tablename__ = "user_summaries"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    orders_new = Column(BigInteger, nullable=False, default=0)
+    orders_active = Column(BigInteger, nullable=False, default=0)
+    orders_archived = Column(BigInteger, nullable=False, default=0)
+    total_price = Column(BigInteger, nullable=False, default=0)
+    unpaid_price = Column(BigInteger, nullable=False, default=0)
+    paid_amount = Column(BigInteger, nullable=False, default=0)
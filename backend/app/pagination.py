@@ -0,0 +1,61 @@
+"""
+Keyset-пагинация: вместо OFFSET клиент передаёт непрозрачный курсор
+(значение колонки сортировки и id последней строки предыдущей страницы).
+Следующая страница ищется по индексу, поэтому скорость не зависит от
+того, насколько далеко пролистан список.
+"""
+import base64
+import json
+from typing import Any, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        values = None
+    if (not isinstance(values, list) or len(values) != len(types)
+            or not all(type(v) is t for v, t in zip(values, types))):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Некорректный курсор")
+    return values
+
+
+def paginate(stmt: Select, sort_col, id_col, descending: bool,
+             cursor: str | None, limit: int | None) -> Select:
+    """Добавить к запросу сортировку, условие курсора и LIMIT (+1 строка на проверку)."""
+    same = sort_col is id_col
+    if cursor:
+        if same:
+            (last_id,) = decode_cursor(cursor, [int])
+            cond = id_col < last_id if descending else id_col > last_id
+        else:
+            last_value, last_id = decode_cursor(cursor, [sort_col.type.python_type, int])
+            key = tuple_(sort_col, id_col)
+            bound = tuple_(last_value, last_id)
+            cond = key < bound if descending else key > bound
+        stmt = stmt.where(cond)
+    order = [id_col] if same else [sort_col, id_col]
+    stmt = stmt.order_by(*(c.desc() if descending else c.asc() for c in order))
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def split_page(rows: Sequence[Any], limit: int | None, sort_attr: str) -> tuple[Sequence[Any], str | None]:
+    """Отрезать лишнюю строку и вернуть (строки страницы, курсор следующей страницы)."""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    values = [last.id] if sort_attr == "id" else [getattr(last, sort_attr), last.id]
+    return rows, encode_cursor(values)
@@ -0,0 +1,61 @@
+"""
+Пул соединений с метриками ожидания.
+
+AsyncAdaptedQueuePool сам по себе не говорит, почему запросы упираются
+в `QueuePool limit ... timed out`. InstrumentedPool считает, сколько
+запросов сейчас ждут соединение, сколько ждали и сколько не дождались,
+и раскладывает время ожидания по корзинам гистограммы.
+"""
+import bisect
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Верхние границы корзин, мс; последняя корзина — всё, что дольше
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_stats()
+
+    def _init_stats(self) -> None:
+        self.waiting = 0
+        self.max_waiting = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def _do_get(self):
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+            elapsed = time.perf_counter() - start
+            self.wait_count += 1
+            self.wait_total += elapsed
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, elapsed * 1000)] += 1
+
+    def stats(self) -> dict:
+        histogram = {f"le_{b}ms": n for b, n in zip(WAIT_BUCKETS_MS, self.wait_buckets)}
+        histogram["gt_%dms" % WAIT_BUCKETS_MS[-1]] = self.wait_buckets[-1]
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.wait_count * 1000, 3) if self.wait_count else 0.0,
+            "wait_histogram": histogram,
+        }
@@ -0,0 +1,90 @@
+"""
+Готовые JSON-ответы из кэша и условные GET (ETag / If-None-Match -> 304),
+а также быстрый ответ по схеме без второго прохода FastAPI.
+"""
+import bisect
+import hashlib
+import time
+from functools import lru_cache
+from typing import Any, Iterable, NamedTuple
+
+import orjson
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+
+from app.metrics import ENCODE_SECONDS
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    next_cursor: str | None = None
+
+
+def encode_body(adapter: TypeAdapter, data: Any, next_cursor: str | None = None) -> CachedBody:
+    """Провалидировать data (в т.ч. ORM-объекты) и сразу сериализовать в JSON."""
+    start = time.perf_counter()
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    ENCODE_SECONDS.observe(time.perf_counter() - start)
+    return CachedBody(body, _etag(body, next_cursor), next_cursor)
+
+
+def patch_list_body(cached: CachedBody, removes: Iterable[int]) -> CachedBody:
+    """
+    Удалить строки с id из removes в закэшированном списке, отсортированном
+    по id. Годится только для полного списка без курсора: у страницы
+    сдвинулись бы границы.
+    """
+    rows = orjson.loads(cached.body)
+    ids = [row["id"] for row in rows]
+    for row_id in removes:
+        i = bisect.bisect_left(ids, row_id)
+        if i < len(ids) and ids[i] == row_id:
+            del ids[i], rows[i]
+    body = orjson.dumps(rows)
+    return CachedBody(body, _etag(body, cached.next_cursor), cached.next_cursor)
+
+
+def _etag(body: bytes, next_cursor: str | None) -> str:
+    etag = hashlib.blake2b(body, digest_size=16)
+    if next_cursor:
+        etag.update(next_cursor.encode())
+    return '"' + etag.hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def cached_json_response(request: Request, cached: CachedBody) -> Response:
+    # no-cache: браузер хранит ответ, но каждый раз сверяет ETag с сервером
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if cached.next_cursor:
+        headers["X-Next-Cursor"] = cached.next_cursor
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+@lru_cache(maxsize=None)
+def _adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def model_response(tp: Any, data: Any, status_code: int = status.HTTP_200_OK,
+                   headers: dict | None = None) -> Response:
+    """
+    Провалидировать data по схеме tp (например, List[OrderOutputData]) и сразу
+    отдать JSON-байты из pydantic-core. Если вернуть из хендлера Response,
+    FastAPI не валидирует response_model повторно и не гоняет результат через
+    dict -> json; сам response_model в декораторе остаётся для OpenAPI.
+    """
+    adapter = _adapter(tp)
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return Response(content=body, status_code=status_code,
+                    media_type="application/json", headers=headers)
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from app.database import AsyncSessionLocal
+from app.database import get_session
 from app.models.user_table import User
-from app.security.hash_password import verify_pwd
+from app.security.hash_password import verify_pwd_async
 from app.security.jwt import create_access_token, get_current_user_release
 from app.config import ACCESS_TOKEN_EXPIRE_MINUTES
 from app.schemas.auth_scheme import LoginOutputData, LoginInputData
@@ -14,29 +15,42 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @router.post("/login", response_model=LoginOutputData)
-async def login(data: LoginInputData, response: Response):
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(User).where(User.email == data.email)
+async def login(data: LoginInputData, response: Response,
+                session: AsyncSession = Depends(get_session)):
+    result = await session.execute(
+        select(User).where(User.email == data.email)
+    )
+    user = result.scalar_one_or_none()
+
+    # bcrypt считается после close(): соединение возвращается в пул, а сессия
+    # остаётся пригодной и возьмёт его снова только для пересохранения хэша
+    await session.close()
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_pwd_async(data.password, user.password_hash)
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Неверный username или пароль"
         )
-        user = result.scalar_one_or_none()
-        
-        if not user or not verify_pwd(data.password, user.password_hash):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Неверный username или пароль"
-            )
-
-        access_token = create_access_token(
-            data={"sub": str(user.id)},
-            expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+    # cost bcrypt поменялся — пересохраняем хэш, пока знаем пароль
+    if new_hash:
+        await session.execute(
+            update(User).where(User.id == user.id).values(password_hash=new_hash)
         )
-        response.set_cookie(key="access_token", value=f"Bearer {access_token}", httponly=True)
+        await session.commit()
+
+    access_token = create_access_token(
+        data={"sub": str(user.id)},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    response.set_cookie(key="access_token", value=f"Bearer {access_token}", httponly=True)
 
-        return {
-            "access_token": access_token,
-            "token_type": "bearer"
-        }
+    return {
+        "access_token": access_token,
+        "token_type": "bearer"
+    }
 
 
 @router.get("/me", response_model=UserOutputData)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import changefeed
+from app.database import get_session
+from app.models.user_table import User
+from app.security.jwt import get_current_user_release
+
+router = APIRouter(prefix="/changes", tags=["Changes"])
+
+
+@router.get("/stream")
+async def change_stream(since: int | None = None,
+                        last_event_id: str | None = Header(None),
+                        current_user: User = Depends(get_current_user_release),
+                        session: AsyncSession = Depends(get_session)):
+    """
+    Server-Sent Events с изменениями клиентов, заказов и платежей пользователя
+    (формат — app/changefeed.py). Продолжить с места обрыва: заголовок
+    Last-Event-ID (браузер шлёт его сам) или ?since=<id последнего события>.
+    """
+    # поток живёт долго: соединение, взятое для проверки пользователя, сразу вернуть в пул
+    await session.close()
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    return StreamingResponse(
+        changefeed.stream(current_user.id, since),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx и похожие прокси не копят поток в буфере
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
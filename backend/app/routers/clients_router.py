@@ -1,103 +1,235 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.client_table import Client
 from app.models.orders_table import Order
-from app.schemas.client_scheme import ClientInputData, ClientOutputData
+from app.models.payments_table import Payment
+from app.schemas.order_scheme import OrderOutputData
+from app.schemas.job_scheme import JobOutputData
+from app.schemas.client_scheme import (
+    ClientDeleteOutputData,
+    ClientDetailData,
+    ClientInputData,
+    ClientOutputData,
+    ClientPatchData,
+    ClientSearchData,
+    ClientSort,
+)
 from typing import List
 from app.models.user_table import User
 from app.security.jwt import get_current_user_release
-from app.database import AsyncSessionLocal
-from app.cache import get_cached, set_cached, invalidate_cached
+from app.database import get_session, read_session
+from app.crud import update_owned
+from app.cascade import delete_client_cascade
+from app.cache import get_or_load, keys
+from app.cache.lists import write_clients
+from app import changefeed, jobs
+from app.responses import CachedBody, cached_json_response, encode_body, model_response
+from app.pagination import paginate, split_page
+from app.search import search_clients
+from app.config import PAGE_SIZE_MAX
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
+_clients_adapter = TypeAdapter(List[ClientOutputData])
+_detail_adapter = TypeAdapter(ClientDetailData)
 
-@router.post("/add")
-async def add_client(data: ClientInputData, current_user: User = Depends(get_current_user_release)):
+
+@router.post("/add", response_model=ClientOutputData)
+async def add_client(data: ClientInputData, current_user: User = Depends(get_current_user_release),
+                     session: AsyncSession = Depends(get_session)):
     new_client = Client(user_id=current_user.id, name=data.name,
                         contact=data.contact, notes=data.notes)
-    async with AsyncSessionLocal() as session:
-        session.add(new_client)
-        await session.commit()
-        await session.refresh(new_client)
-    await invalidate_cached(f"clients_all:{current_user.id}")
-    return new_client
+    session.add(new_client)
+    await session.flush()
+    await changefeed.publish(session, current_user.id, changefeed.rows("clients", "insert", [new_client]))
+    await session.commit()
+    # карточка с этим id могла закэшироваться как «не найден»
+    await write_clients(current_user.id, upserts=[new_client],
+                        extra_tags=(keys.detail_tag(current_user.id, new_client.id),))
+    return model_response(ClientOutputData, new_client)
 
 
 @router.get("/get/{client_id}", response_model=ClientOutputData)
-async def get_client(client_id: int, current_user: User = Depends(get_current_user_release)):
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Client).where(Client.user_id == current_user.id, Client.id == client_id)
-        )
-        client = result.scalar_one_or_none()
+async def get_client(client_id: int, current_user: User = Depends(get_current_user_release),
+                     session: AsyncSession = Depends(get_session)):
+    result = await session.execute(
+        select(Client).where(Client.user_id == current_user.id, Client.id == client_id)
+    )
+    client = result.scalar_one_or_none()
 
-        if not client:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Клиент не найден!")
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Клиент не найден!")
 
-        return client
+    return model_response(ClientOutputData, client)
 
 
-@router.get("/all", response_model=List[ClientOutputData])
-async def get_all_clients(current_user: User = Depends(get_current_user_release)):
-    cache_key = f"clients_all:{current_user.id}"
-    cached = await get_cached(cache_key)
-    if cached is not None:
-        return [ClientOutputData(**d) for d in cached]
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Client).where(Client.user_id == current_user.id)
-        )
-        clients = result.scalars().all()
-        out = [ClientOutputData.model_validate(c).model_dump() for c in clients]
-        await set_cached(cache_key, out)
-        return [ClientOutputData.model_validate(c) for c in clients]
+_CLIENT_SORT_COLUMNS = {"id": Client.id, "name": Client.name}
 
 
-@router.put("/update/{client_id}", response_model=ClientOutputData)
-async def get_client(client_id: int, data: ClientInputData, current_user: User = Depends(get_current_user_release)):
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Client).where(Client.user_id == current_user.id, Client.id == client_id)
-        ) 
-        client = result.scalar_one_or_none()
+async def _load_clients(user_id: int, sort: ClientSort, cursor: str | None,
+                        limit: int | None) -> CachedBody:
+    sort_attr = sort.value.lstrip("-")
+    stmt = paginate(
+        select(Client).where(Client.user_id == user_id),
+        _CLIENT_SORT_COLUMNS[sort_attr], Client.id,
+        descending=sort.value.startswith("-"), cursor=cursor, limit=limit,
+    )
+    async with read_session(user_id) as session:
+        result = await session.execute(stmt)
+        clients, next_cursor = split_page(result.scalars().all(), limit, sort_attr)
+        return encode_body(_clients_adapter, clients, next_cursor)
 
-        if not client:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Клиент не найден!")
-
-        client.name = data.name
-        client.contact = data.contact
-        client.notes = data.notes
-
-        await session.commit()
-        await session.refresh(client)
-    await invalidate_cached(f"clients_all:{current_user.id}")
-    return client
-
-
-@router.delete("/delete/{client_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def get_client(client_id: int, current_user: User = Depends(get_current_user_release)):
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Order).where(Order.user_id == current_user.id, Order.client_id == client_id)
-        )
-        orders = result.scalars().all()
 
+@router.get("/all", response_model=List[ClientOutputData])
+async def get_all_clients(
+    request: Request,
+    sort: ClientSort = ClientSort.ID,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=PAGE_SIZE_MAX),
+    current_user: User = Depends(get_current_user_release),
+):
+    """
+    Без limit возвращает всех клиентов. С limit — страницу, а курсор
+    следующей страницы приходит в заголовке X-Next-Cursor.
+    """
+    cached = await get_or_load(
+        keys.clients_list(current_user.id, sort, cursor, limit),
+        lambda: _load_clients(current_user.id, sort, cursor, limit),
+        tags=keys.clients_list_tags(current_user.id))
+    return cached_json_response(request, cached)
+
+
+@router.get("/search", response_model=List[ClientSearchData])
+async def find_clients(
+    q: str = Query(..., min_length=2, max_length=200),
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=PAGE_SIZE_MAX),
+    current_user: User = Depends(get_current_user_release),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Поиск по имени, контакту и заметкам: слова ищутся как префиксы,
+    опечатки ловятся по триграммам. Самые релевантные — первыми, курсор
+    следующей страницы — в заголовке X-Next-Cursor. Не кэшируется.
+    """
+    result = await session.execute(search_clients(current_user.id, q, cursor, limit))
+    clients, next_cursor = split_page(result.all(), limit, "rank")
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return model_response(List[ClientSearchData], clients, headers=headers)
+
+
+async def _load_client_detail(user_id: int, client_id: int) -> CachedBody | None:
+    """
+    Клиент, его заказы и платежи по ним — ровно три запроса. None — клиента
+    нет: кэшируется так же, и повторные 404 не ходят в базу.
+    """
+    async with read_session(user_id) as session:
         result = await session.execute(
-            select(Client).where(Client.user_id == current_user.id, Client.id == client_id)
+            select(Client).where(Client.user_id == user_id, Client.id == client_id)
         )
-        client = result.scalars().all()
+        client = result.scalar_one_or_none()
 
         if not client:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Клиент не найден!")
+            return None
+
+        order_ids = select(Order.id).where(Order.user_id == user_id, Order.client_id == client_id)
+        orders = (await session.execute(
+            select(Order).where(Order.user_id == user_id, Order.client_id == client_id)
+            .order_by(Order.id)
+        )).scalars().all()
+        payments = (await session.execute(
+            select(Payment).where(Payment.user_id == user_id, Payment.order_id.in_(order_ids))
+            .order_by(Payment.id)
+        )).scalars().all()
+
+    by_order: dict[int, list[Payment]] = {}
+    for payment in payments:
+        by_order.setdefault(payment.order_id, []).append(payment)
+
+    detail = {name: getattr(client, name) for name in ClientOutputData.model_fields}
+    detail["orders"] = [
+        {
+            **{name: getattr(order, name) for name in OrderOutputData.model_fields},
+            "payments": by_order.get(order.id, []),
+            "paid_total": order.paid_amount,
+        }
+        for order in orders
+    ]
+    return encode_body(_detail_adapter, detail)
+
+
+@router.get("/detail/{client_id}", response_model=ClientDetailData)
+async def get_client_detail(client_id: int, request: Request,
+                            current_user: User = Depends(get_current_user_release)):
+    """
+    Клиент со всеми заказами и платежами одним ответом. Помечен тегами
+    заказов и карточки клиента, поэтому сбрасывается любой записью в заказы
+    или платежи этого клиента, а также изменением самого клиента.
+    """
+    cached = await get_or_load(
+        keys.client_detail(current_user.id, client_id),
+        lambda: _load_client_detail(current_user.id, client_id),
+        tags=keys.client_detail_tags(current_user.id, client_id))
+    if cached is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Клиент не найден!")
+    return cached_json_response(request, cached)
+
+
+async def _update_client(session: AsyncSession, user_id: int, client_id: int, values: dict) -> Client:
+    client = await update_owned(session, Client, user_id, client_id, values)
+
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Клиент не найден!")
+
+    await changefeed.publish(session, user_id, changefeed.rows("clients", "update", [client]))
+    await session.commit()
+    await write_clients(user_id, upserts=[client], extra_tags=(keys.detail_tag(user_id, client_id),))
+    return client
 
-        if orders:
-            for order in orders:
-                await session.delete(order)
 
-        await session.delete(client[0])
-        await session.commit()
-    await invalidate_cached(f"clients_all:{current_user.id}")
+@router.put("/update/{client_id}", response_model=ClientOutputData)
+async def update_client(client_id: int, data: ClientInputData, current_user: User = Depends(get_current_user_release),
+                        session: AsyncSession = Depends(get_session)):
+    client = await _update_client(session, current_user.id, client_id, data.model_dump())
+    return model_response(ClientOutputData, client)
+
+
+@router.patch("/update/{client_id}", response_model=ClientOutputData)
+async def patch_client(client_id: int, data: ClientPatchData, current_user: User = Depends(get_current_user_release),
+                       session: AsyncSession = Depends(get_session)):
+    client = await _update_client(session, current_user.id, client_id, data.model_dump(exclude_none=True))
+    return model_response(ClientOutputData, client)
+
+
+@router.delete("/delete/{client_id}", response_model=ClientDeleteOutputData)
+async def delete_client(client_id: int, current_user: User = Depends(get_current_user_release),
+                        session: AsyncSession = Depends(get_session)):
+    deleted = await delete_client_cascade(session, current_user.id, client_id)
+    if deleted is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Клиент не найден!")
+    return deleted
+
+
+@router.delete("/delete/{client_id}/background", response_model=JobOutputData,
+               status_code=status.HTTP_202_ACCEPTED)
+async def delete_client_background(client_id: int, current_user: User = Depends(get_current_user_release),
+                                   session: AsyncSession = Depends(get_session)):
+    """
+    То же удаление фоновой задачей — для клиентов с большим числом заказов
+    и платежей. Ответ 202 сразу, статус — GET /jobs/{id}.
+    """
+    exists = await session.execute(
+        select(Client.id).where(Client.user_id == current_user.id, Client.id == client_id)
+    )
+    if exists.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Клиент не найден!")
+    job = await jobs.enqueue(session, jobs.CLIENT_DELETE, {"client_id": client_id}, user_id=current_user.id)
+    await session.commit()
+    return jobs.accepted(job)
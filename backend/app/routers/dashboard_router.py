@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import jobs
+from app.database import get_session
+from app.models.user_table import User
+from app.schemas.dashboard_scheme import DashboardSummaryData
+from app.schemas.job_scheme import JobOutputData
+from app.security.jwt import get_current_user_release
+from app.summary import get_summary
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+
+@router.get("/summary", response_model=DashboardSummaryData)
+async def get_dashboard_summary(current_user: User = Depends(get_current_user_release),
+                                session: AsyncSession = Depends(get_session)):
+    return await get_summary(session, current_user.id)
+
+
+@router.post("/summary/rebuild", response_model=JobOutputData, status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_dashboard_summary(current_user: User = Depends(get_current_user_release),
+                                    session: AsyncSession = Depends(get_session)):
+    """Пересобрать сводку с нуля фоновой задачей (если она разошлась с данными)."""
+    job = await jobs.enqueue(session, jobs.SUMMARY_REBUILD, user_id=current_user.id)
+    await session.commit()
+    return jobs.accepted(job)
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.database import get_session
+from app.models.job_table import Job
+from app.models.user_table import User
+from app.responses import model_response
+from app.schemas.job_scheme import JobOutputData
+from app.security.jwt import get_current_user_release
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("", response_model=List[JobOutputData])
+async def list_jobs(limit: int = Query(20, ge=1, le=100),
+                    current_user: User = Depends(get_current_user_release),
+                    session: AsyncSession = Depends(get_session)):
+    """Последние задачи пользователя, новые первыми."""
+    result = await session.execute(
+        select(Job).where(Job.user_id == current_user.id).order_by(Job.id.desc()).limit(limit)
+    )
+    return model_response(List[JobOutputData], result.scalars().all())
+
+
+@router.get("/{job_id}", response_model=JobOutputData)
+async def get_job(job_id: int, current_user: User = Depends(get_current_user_release),
+                  session: AsyncSession = Depends(get_session)):
+    result = await session.execute(
+        select(Job).where(Job.user_id == current_user.id, Job.id == job_id)
+    )
+    job = result.scalar_one_or_none()
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Задача не найдена!")
+    return model_response(JobOutputData, job)
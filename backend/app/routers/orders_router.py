@@ -1,101 +1,271 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
-from app.database import AsyncSessionLocal
-from app.schemas.order_scheme import OrderInputData, OrderOutputData
-from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_session, read_session
+from app.crud import (
+    bulk_insert,
+    bulk_update,
+    check_batch_size,
+    owned_ids,
+    update_owned,
+    validate_batch,
+)
+from app.schemas.batch_scheme import BatchDeleteInputData, BatchDeleteOutputData
+from app.schemas.order_scheme import (
+    OrderBatchOutputData,
+    OrderBatchUpdateItem,
+    OrderDeleteOutputData,
+    OrderInputData,
+    OrderOutputData,
+    OrderPatchData,
+    OrderSearchData,
+    OrderSort,
+    OrderStatus,
+)
+from typing import Any, List
+from app.models.client_table import Client
 from app.models.orders_table import Order
+from app.models.payments_table import Payment
 from app.models.user_table import User
 from app.security.jwt import get_current_user_release
-from app.cache import get_cached, set_cached, invalidate_cached
+from app.cache import get_or_load, keys
+from app.cache.lists import write_orders, write_orders_batch
+from app import changefeed
+from app.responses import CachedBody, cached_json_response, encode_body, model_response
+from app.pagination import paginate, split_page
+from app.search import search_orders
+from app.config import PAGE_SIZE_MAX
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
+_orders_adapter = TypeAdapter(List[OrderOutputData])
 
-@router.post("/add")
-async def add_order(data: OrderInputData, current_user: User = Depends(get_current_user_release)):
+
+@router.post("/add", response_model=OrderOutputData)
+async def add_order(data: OrderInputData, current_user: User = Depends(get_current_user_release),
+                    session: AsyncSession = Depends(get_session)):
     new_order = Order(user_id=current_user.id, client_id=data.client_id,
                       title=data.title, description=data.description,
-                      price=data.price, status=data.status, notes=data.notes, is_paid=data.is_paid)
-    async with AsyncSessionLocal() as session:
-        session.add(new_order)
-        await session.commit()
-        await session.refresh(new_order)
-    await invalidate_cached(f"orders_all:{current_user.id}:")
-    return new_order
+                      price=data.price, status=data.status, notes=data.notes)
+    session.add(new_order)
+    await session.flush()
+    # paid_amount и is_paid заполняет база
+    await session.refresh(new_order)
+    await changefeed.publish(session, current_user.id, changefeed.rows("orders", "insert", [new_order]))
+    await session.commit()
+    await write_orders(current_user.id, new_order.client_id, upserts=[new_order])
+    return model_response(OrderOutputData, new_order)
 
 
 @router.get("/get/{order_id}", response_model=OrderOutputData)
-async def get_order(order_id: int, current_user: User = Depends(get_current_user_release)):
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Order).where(Order.user_id == current_user.id, Order.id == order_id)
-        )
-        order = result.scalar_one_or_none()
+async def get_order(order_id: int, current_user: User = Depends(get_current_user_release),
+                    session: AsyncSession = Depends(get_session)):
+    result = await session.execute(
+        select(Order).where(Order.user_id == current_user.id, Order.id == order_id)
+    )
+    order = result.scalar_one_or_none()
+
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Заказ не найден!")
+
+    return model_response(OrderOutputData, order)
+
+
+_ORDER_SORT_COLUMNS = {"id": Order.id, "price": Order.price, "title": Order.title}
 
-        if not order:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Заказ не найден!")
 
-        return order
+async def _load_orders(user_id: int, client_id: int, query: dict) -> CachedBody:
+    stmt = select(Order).where(Order.user_id == user_id, Order.client_id == client_id)
+    if query["status"] is not None:
+        stmt = stmt.where(Order.status == query["status"])
+    if query["is_paid"] is not None:
+        stmt = stmt.where(Order.is_paid == query["is_paid"])
+    if query["min_price"] is not None:
+        stmt = stmt.where(Order.price >= query["min_price"])
+    if query["max_price"] is not None:
+        stmt = stmt.where(Order.price <= query["max_price"])
+
+    sort: OrderSort = query["sort"]
+    sort_attr = sort.value.lstrip("-")
+    limit = query["limit"]
+    stmt = paginate(stmt, _ORDER_SORT_COLUMNS[sort_attr], Order.id,
+                    descending=sort.value.startswith("-"), cursor=query["cursor"], limit=limit)
+    async with read_session(user_id) as session:
+        result = await session.execute(stmt)
+        orders, next_cursor = split_page(result.scalars().all(), limit, sort_attr)
+        return encode_body(_orders_adapter, orders, next_cursor)
 
 
 @router.get("/all/{client_id}", response_model=List[OrderOutputData])
-async def get_all_orders_by_client(client_id: int, current_user: User = Depends(get_current_user_release)):
-    cache_key = f"orders_all:{current_user.id}:{client_id}"
-    cached = await get_cached(cache_key)
-    if cached is not None:
-        return [OrderOutputData(**d) for d in cached]
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Order).where(Order.user_id == current_user.id, Order.client_id == client_id)
-        )
-        orders = result.scalars().all()
-        out = [OrderOutputData.model_validate(o).model_dump() for o in orders]
-        await set_cached(cache_key, out)
-        return orders
+async def get_all_orders_by_client(
+    client_id: int,
+    request: Request,
+    order_status: OrderStatus | None = Query(None, alias="status"),
+    is_paid: bool | None = None,
+    min_price: int | None = None,
+    max_price: int | None = None,
+    sort: OrderSort = OrderSort.ID,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=PAGE_SIZE_MAX),
+    current_user: User = Depends(get_current_user_release),
+):
+    """
+    Без limit возвращает все заказы клиента. С limit — страницу, а курсор
+    следующей страницы приходит в заголовке X-Next-Cursor.
+    """
+    query = {"status": order_status, "is_paid": is_paid, "min_price": min_price,
+             "max_price": max_price, "sort": sort, "cursor": cursor, "limit": limit}
+    cached = await get_or_load(
+        keys.orders_list(current_user.id, client_id, **query),
+        lambda: _load_orders(current_user.id, client_id, query),
+        tags=keys.orders_list_tags(current_user.id, client_id))
+    return cached_json_response(request, cached)
 
 
-@router.put("/update/{order_id}", response_model=OrderOutputData)
-async def update_order(order_id: int, data: OrderInputData, current_user: User = Depends(get_current_user_release)):
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Order).where(Order.user_id == current_user.id, Order.id == order_id)
+@router.get("/search", response_model=List[OrderSearchData])
+async def find_orders(
+    q: str = Query(..., min_length=2, max_length=200),
+    client_id: int | None = None,
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=PAGE_SIZE_MAX),
+    current_user: User = Depends(get_current_user_release),
+    session: AsyncSession = Depends(get_session),
+):
+    """
+    Поиск по названию, описанию и заметкам заказов (по всем клиентам или
+    по одному, если передан client_id). Порядок и курсор — как в /clients/search.
+    """
+    result = await session.execute(search_orders(current_user.id, q, client_id, cursor, limit))
+    orders, next_cursor = split_page(result.all(), limit, "rank")
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return model_response(List[OrderSearchData], orders, headers=headers)
+
+
+async def _update_order(session: AsyncSession, user_id: int, order_id: int, values: dict) -> Order:
+    order = await update_owned(session, Order, user_id, order_id, values)
+
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Заказ не найден!",
         )
-        order = result.scalar_one_or_none()
-
-        if not order:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Заказ не найден!",
-            )
-
-        order.title = data.title
-        order.description = data.description
-        order.price = data.price
-        order.status = data.status
-        order.notes = data.notes
-        order.is_paid = data.is_paid
-
-        await session.commit()
-        await session.refresh(order)
-    await invalidate_cached(f"orders_all:{current_user.id}:")
+
+    await changefeed.publish(session, user_id, changefeed.rows("orders", "update", [order]))
+    await session.commit()
+    await write_orders(user_id, order.client_id, upserts=[order])
     return order
 
 
-@router.delete("/delete/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_order(order_id: int, current_user: User = Depends(get_current_user_release)):
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Order).where(Order.user_id == current_user.id, Order.id == order_id)
+@router.put("/update/{order_id}", response_model=OrderOutputData)
+async def update_order(order_id: int, data: OrderInputData, current_user: User = Depends(get_current_user_release),
+                       session: AsyncSession = Depends(get_session)):
+    # client_id в PUT не меняется: заказ нельзя перенести к другому клиенту
+    order = await _update_order(session, current_user.id, order_id, data.model_dump(exclude={"client_id"}))
+    return model_response(OrderOutputData, order)
+
+
+@router.patch("/update/{order_id}", response_model=OrderOutputData)
+async def patch_order(order_id: int, data: OrderPatchData, current_user: User = Depends(get_current_user_release),
+                      session: AsyncSession = Depends(get_session)):
+    order = await _update_order(session, current_user.id, order_id, data.model_dump(exclude_none=True))
+    return model_response(OrderOutputData, order)
+
+
+@router.delete("/delete/{order_id}", response_model=OrderDeleteOutputData)
+async def delete_order(order_id: int, current_user: User = Depends(get_current_user_release),
+                       session: AsyncSession = Depends(get_session)):
+    payments = await session.execute(
+        delete(Payment).where(Payment.order_id.in_(
+            select(Order.id).where(Order.user_id == current_user.id, Order.id == order_id)
+        )).execution_options(synchronize_session=False)
+    )
+    result = await session.execute(
+        delete(Order).where(Order.user_id == current_user.id, Order.id == order_id)
+        .returning(Order.client_id).execution_options(synchronize_session=False)
+    )
+    client_id = result.scalar_one_or_none()
+
+    if client_id is None:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Заказ не найден!",
         )
-        order = result.scalar_one_or_none()
 
-        if not order:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Заказ не найден!",
-            )
+    await changefeed.publish(session, current_user.id, changefeed.deleted("orders", [order_id]))
+    await session.commit()
+    await write_orders(current_user.id, client_id, removes=[order_id])
+    return {"orders": 1, "payments": payments.rowcount}
+
+
+@router.post("/batch/add", response_model=OrderBatchOutputData)
+async def add_orders_batch(items: List[Any] = Body(...), current_user: User = Depends(get_current_user_release),
+                           session: AsyncSession = Depends(get_session)):
+    """
+    Создать пачку заказов одним многострочным INSERT. Невалидные элементы и
+    заказы к чужим клиентам не создаются и возвращаются в errors по индексу.
+    """
+    check_batch_size(items)
+    valid, errors = validate_batch(OrderInputData, items)
+    clients = await owned_ids(session, Client, current_user.id, (d.client_id for _, d in valid))
+    rows = []
+    for index, data in valid:
+        if data.client_id not in clients:
+            errors.append({"index": index, "detail": "Клиент не найден!"})
+            continue
+        rows.append({"user_id": current_user.id, **data.model_dump()})
+    orders = await bulk_insert(session, Order, rows)
+    await changefeed.publish(session, current_user.id, changefeed.rows("orders", "insert", orders))
+    await session.commit()
+    await write_orders_batch(current_user.id, orders)
+    return model_response(OrderBatchOutputData,
+                          {"items": orders, "errors": sorted(errors, key=lambda e: e["index"])})
+
+
+@router.patch("/batch/update", response_model=OrderBatchOutputData)
+async def update_orders_batch(items: List[Any] = Body(...), current_user: User = Depends(get_current_user_release),
+                              session: AsyncSession = Depends(get_session)):
+    """Частично изменить пачку заказов (в каждом элементе id и изменяемые поля)."""
+    check_batch_size(items)
+    valid, errors = validate_batch(OrderBatchUpdateItem, items)
+    owned = await owned_ids(session, Order, current_user.id, (d.id for _, d in valid))
+    rows, seen = [], set()
+    for index, data in valid:
+        if data.id not in owned:
+            errors.append({"index": index, "detail": "Заказ не найден!"})
+        elif data.id in seen:
+            errors.append({"index": index, "detail": "Заказ уже есть в этом пакете"})
+        else:
+            seen.add(data.id)
+            rows.append(data.model_dump(exclude_none=True))
+    orders = await bulk_update(session, Order, rows)
+    await changefeed.publish(session, current_user.id, changefeed.rows("orders", "update", orders))
+    await session.commit()
+    await write_orders_batch(current_user.id, orders)
+    return model_response(OrderBatchOutputData,
+                          {"items": orders, "errors": sorted(errors, key=lambda e: e["index"])})
+
 
-        await session.delete(order)
-        await session.commit()
-    await invalidate_cached(f"orders_all:{current_user.id}:")
+@router.post("/batch/delete", response_model=BatchDeleteOutputData)
+async def delete_orders_batch(data: BatchDeleteInputData, current_user: User = Depends(get_current_user_release),
+                              session: AsyncSession = Depends(get_session)):
+    check_batch_size(data.ids)
+    owned = select(Order.id).where(Order.user_id == current_user.id, Order.id.in_(data.ids))
+    payments = await session.execute(
+        delete(Payment).where(Payment.order_id.in_(owned))
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(
+        delete(Order).where(Order.user_id == current_user.id, Order.id.in_(data.ids))
+        .returning(Order.id, Order.client_id).execution_options(synchronize_session=False)
+    )
+    deleted = result.all()
+    deleted_ids = {row.id for row in deleted}
+    await changefeed.publish(session, current_user.id, changefeed.deleted("orders", deleted_ids))
+    await session.commit()
+    await write_orders_batch(current_user.id, removed=deleted)
+    errors = [{"index": index, "detail": "Заказ не найден!"}
+              for index, order_id in enumerate(data.ids) if order_id not in deleted_ids]
+    return {"deleted": len(deleted), "payments": payments.rowcount, "errors": errors}
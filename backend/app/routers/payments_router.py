@@ -1,32 +1,223 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
-from app.database import AsyncSessionLocal
-from app.schemas.payment_scheme import PaymentInputData, PaymentOutputData
-from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, status
+from pydantic import TypeAdapter
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_session, read_session
+from app.crud import (
+    bulk_insert,
+    bulk_update,
+    check_batch_size,
+    owned_ids,
+    update_owned,
+    validate_batch,
+)
+from app.schemas.batch_scheme import BatchDeleteInputData, BatchDeleteOutputData
+from app.schemas.payment_scheme import (
+    OrderBalanceBatchData,
+    OrderBalanceInputData,
+    PaymentBatchOutputData,
+    PaymentBatchUpdateItem,
+    PaymentInputData,
+    PaymentLedgerData,
+    PaymentOutputData,
+    PaymentPatchData,
+)
+from typing import Any, List
+from app.models.orders_table import Order
 from app.models.payments_table import Payment
 from app.models.user_table import User
 from app.security.jwt import get_current_user_release
+from app.responses import CachedBody, cached_json_response, encode_body, model_response
+from app.cache import get_or_load, keys
+from app.cache.lists import write_orders_batch
+from app import changefeed
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
+_ledger_adapter = TypeAdapter(PaymentLedgerData)
 
-@router.post("/add")
-async def add_payment(data: PaymentInputData, current_user: User = Depends(get_current_user_release)):
+
+async def _orders(session: AsyncSession, user_id: int, order_ids) -> list[Order]:
+    """Заказы платежей после записи: paid_amount и is_paid уже пересчитал триггер (миграция 6)."""
+    order_ids = set(order_ids)
+    if not order_ids:
+        return []
+    result = await session.execute(
+        select(Order).where(Order.user_id == user_id, Order.id.in_(order_ids))
+        .execution_options(populate_existing=True)
+    )
+    return list(result.scalars())
+
+
+async def _commit(session: AsyncSession, user_id: int, changes: list[dict], orders: list[Order]) -> None:
+    """Закоммитить запись платежей: у заказов поменялся баланс — в ленту, затем их списки, карточки и выписки."""
+    await changefeed.publish(session, user_id, changes + changefeed.rows("orders", "update", orders))
+    await session.commit()
+    await write_orders_batch(user_id, orders)
+
+
+def _balance(order_id: int, price: int, paid_amount: int, is_paid: bool) -> dict:
+    return {"order_id": order_id, "price": price, "paid_amount": paid_amount,
+            "outstanding": max(price - paid_amount, 0), "is_paid": is_paid}
+
+
+@router.post("/add", response_model=PaymentOutputData)
+async def add_payment(data: PaymentInputData, current_user: User = Depends(get_current_user_release),
+                      session: AsyncSession = Depends(get_session)):
     new_payment = Payment(user_id=current_user.id, order_id=data.order_id,
                           amount=data.amount, is_paid=data.is_paid)
-    
-    async with AsyncSessionLocal() as session:
-        session.add(new_payment)
-        await session.commit()
-        await session.refresh(new_payment)
-        return new_payment
+
+    if not await owned_ids(session, Order, current_user.id, [data.order_id]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Заказ не найден!")
+
+    session.add(new_payment)
+    await session.flush()
+    orders = await _orders(session, current_user.id, [data.order_id])
+    await _commit(session, current_user.id, changefeed.rows("payments", "insert", [new_payment]), orders)
+    return model_response(PaymentOutputData, new_payment)
 
 
 @router.get("/all/{order_id}", response_model=List[PaymentOutputData])
-async def get_payment_by_order(order_id: int, current_user: User = Depends(get_current_user_release)):
-    async with AsyncSessionLocal() as session:
+async def get_payment_by_order(order_id: int, current_user: User = Depends(get_current_user_release),
+                               session: AsyncSession = Depends(get_session)):
+    result = await session.execute(
+        select(Payment).where(Payment.user_id == current_user.id, Payment.order_id == order_id)
+        .order_by(Payment.id)
+    )
+    return model_response(List[PaymentOutputData], result.scalars().all())
+
+
+async def _load_ledger(user_id: int, order_id: int) -> CachedBody | None:
+    """Баланс заказа из orders.paid_amount и все его платежи — два запроса. None — заказа нет."""
+    async with read_session(user_id) as session:
         result = await session.execute(
-            select(Payment).where(Payment.user_id == current_user.id, Payment.order_id == order_id)
+            select(Order.price, Order.paid_amount, Order.is_paid)
+            .where(Order.user_id == user_id, Order.id == order_id)
         )
-        payment = result.scalar_one_or_none()
-        return payment
+        order = result.one_or_none()
+
+        if order is None:
+            return None
+
+        payments = (await session.execute(
+            select(Payment).where(Payment.user_id == user_id, Payment.order_id == order_id)
+            .order_by(Payment.id)
+        )).scalars().all()
+    return encode_body(_ledger_adapter, {**_balance(order_id, *order), "payments": payments})
+
+
+@router.get("/ledger/{order_id}", response_model=PaymentLedgerData)
+async def get_order_ledger(order_id: int, request: Request,
+                           current_user: User = Depends(get_current_user_release)):
+    """
+    Выписка по заказу: все платежи, оплачено и остаток. Кэшируется и
+    сбрасывается любой записью в платежи заказа или в сам заказ.
+    """
+    cached = await get_or_load(
+        keys.order_ledger(current_user.id, order_id),
+        lambda: _load_ledger(current_user.id, order_id),
+        tags=keys.order_ledger_tags(current_user.id, order_id))
+    if cached is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Заказ не найден!")
+    return cached_json_response(request, cached)
+
+
+@router.post("/balances", response_model=OrderBalanceBatchData)
+async def get_order_balances(data: OrderBalanceInputData, current_user: User = Depends(get_current_user_release),
+                             session: AsyncSession = Depends(get_session)):
+    """
+    Оплачено и остаток по пачке заказов одним запросом по orders: баланс
+    хранится в заказе, платежи не читаются. Чужие и несуществующие заказы —
+    в errors по индексу.
+    """
+    check_batch_size(data.ids)
+    result = await session.execute(
+        select(Order.id, Order.price, Order.paid_amount, Order.is_paid)
+        .where(Order.user_id == current_user.id, Order.id.in_(data.ids))
+        .order_by(Order.id)
+    )
+    items = [_balance(*row) for row in result]
+    found = {item["order_id"] for item in items}
+    errors = [{"index": index, "detail": "Заказ не найден!"}
+              for index, order_id in enumerate(data.ids) if order_id not in found]
+    return model_response(OrderBalanceBatchData, {"items": items, "errors": errors})
+
+
+@router.patch("/update/{payment_id}", response_model=PaymentOutputData)
+async def patch_payment(payment_id: int, data: PaymentPatchData, current_user: User = Depends(get_current_user_release),
+                        session: AsyncSession = Depends(get_session)):
+    payment = await update_owned(session, Payment, current_user.id, payment_id,
+                                 data.model_dump(exclude_none=True))
+
+    if not payment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Платёж не найден!")
+
+    orders = await _orders(session, current_user.id, [payment.order_id])
+    await _commit(session, current_user.id, changefeed.rows("payments", "update", [payment]), orders)
+    return model_response(PaymentOutputData, payment)
+
+
+@router.post("/batch/add", response_model=PaymentBatchOutputData)
+async def add_payments_batch(items: List[Any] = Body(...), current_user: User = Depends(get_current_user_release),
+                             session: AsyncSession = Depends(get_session)):
+    """
+    Создать пачку платежей одним многострочным INSERT. Невалидные элементы и
+    платежи по чужим заказам не создаются и возвращаются в errors по индексу.
+    """
+    check_batch_size(items)
+    valid, errors = validate_batch(PaymentInputData, items)
+    orders = await owned_ids(session, Order, current_user.id, (d.order_id for _, d in valid))
+    rows = []
+    for index, data in valid:
+        if data.order_id not in orders:
+            errors.append({"index": index, "detail": "Заказ не найден!"})
+            continue
+        rows.append({"user_id": current_user.id, **data.model_dump()})
+    payments = await bulk_insert(session, Payment, rows)
+    orders = await _orders(session, current_user.id, (p.order_id for p in payments))
+    await _commit(session, current_user.id, changefeed.rows("payments", "insert", payments), orders)
+    return model_response(PaymentBatchOutputData,
+                          {"items": payments, "errors": sorted(errors, key=lambda e: e["index"])})
+
+
+@router.patch("/batch/update", response_model=PaymentBatchOutputData)
+async def update_payments_batch(items: List[Any] = Body(...), current_user: User = Depends(get_current_user_release),
+                                session: AsyncSession = Depends(get_session)):
+    """Частично изменить пачку платежей (в каждом элементе id и изменяемые поля)."""
+    check_batch_size(items)
+    valid, errors = validate_batch(PaymentBatchUpdateItem, items)
+    owned = await owned_ids(session, Payment, current_user.id, (d.id for _, d in valid))
+    rows, seen = [], set()
+    for index, data in valid:
+        if data.id not in owned:
+            errors.append({"index": index, "detail": "Платёж не найден!"})
+        elif data.id in seen:
+            errors.append({"index": index, "detail": "Платёж уже есть в этом пакете"})
+        else:
+            seen.add(data.id)
+            rows.append(data.model_dump(exclude_none=True))
+    payments = await bulk_update(session, Payment, rows)
+    orders = await _orders(session, current_user.id, (p.order_id for p in payments))
+    await _commit(session, current_user.id, changefeed.rows("payments", "update", payments), orders)
+    return model_response(PaymentBatchOutputData,
+                          {"items": payments, "errors": sorted(errors, key=lambda e: e["index"])})
+
+
+@router.post("/batch/delete", response_model=BatchDeleteOutputData)
+async def delete_payments_batch(data: BatchDeleteInputData, current_user: User = Depends(get_current_user_release),
+                                session: AsyncSession = Depends(get_session)):
+    check_batch_size(data.ids)
+    result = await session.execute(
+        delete(Payment).where(Payment.user_id == current_user.id, Payment.id.in_(data.ids))
+        .returning(Payment.id, Payment.order_id).execution_options(synchronize_session=False)
+    )
+    deleted = result.all()
+    orders = await _orders(session, current_user.id, (row.order_id for row in deleted))
+    deleted_ids = {row.id for row in deleted}
+    await _commit(session, current_user.id, changefeed.deleted("payments", deleted_ids), orders)
+    errors = [{"index": index, "detail": "Платёж не найден!"}
+              for index, payment_id in enumerate(data.ids) if payment_id not in deleted_ids]
+    return {"deleted": len(deleted_ids), "errors": errors}
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_session
+from app.models.user_table import User
+from app.schemas.transfer_scheme import ImportOutputData, TransferEntity, TransferFormat
+from app.security.jwt import get_current_user_release
+from app.transfer import export_rows, import_rows
+from app.cache import invalidate_tags, keys
+from app import changefeed
+
+router = APIRouter(prefix="/transfer", tags=["Transfer"])
+
+_MEDIA_TYPES = {
+    TransferFormat.NDJSON: "application/x-ndjson",
+    TransferFormat.CSV: "text/csv; charset=utf-8",
+}
+
+
+@router.post("/import/{entity}", response_model=ImportOutputData)
+async def import_entity(entity: TransferEntity, request: Request,
+                        format: TransferFormat = TransferFormat.NDJSON,
+                        current_user: User = Depends(get_current_user_release),
+                        session: AsyncSession = Depends(get_session)):
+    """
+    Импорт из тела запроса: NDJSON (объект на строку) или CSV с заголовком.
+    Поля — как в /add соответствующей сущности. Валидные строки заливаются
+    одной транзакцией, невалидные пропускаются и возвращаются в errors.
+    """
+    report = await import_rows(session, entity, format, current_user.id, request.stream())
+    await changefeed.publish(session, current_user.id, changefeed.reload(entity.value))
+    await session.commit()
+    await invalidate_tags(keys.user_tag(current_user.id))
+    return report
+
+
+@router.get("/export/{entity}")
+async def export_entity(entity: TransferEntity, format: TransferFormat = TransferFormat.NDJSON,
+                        current_user: User = Depends(get_current_user_release)):
+    filename = f"{entity.value}.{format.value}"
+    return StreamingResponse(
+        export_rows(entity, format, current_user.id),
+        media_type=_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
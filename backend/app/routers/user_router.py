@@ -1,29 +1,29 @@
 from fastapi import APIRouter, Depends
-from app.database import AsyncSessionLocal
-from app.security.hash_password import hash_pwd
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_session
+from app.security.hash_password import hash_pwd_async
 from app.models.user_table import User
-from app.schemas.user_scheme import UserInputData, UserOutputData
+from app.schemas.user_scheme import UserCreatedOutputData, UserInputData, UserOutputData
 from app.security.jwt import get_current_user_release
 
 router = APIRouter(prefix="/user", tags=["User"])
 
 
-@router.post("/register")
-async def create_user(user: UserInputData):
-    hashed_password = hash_pwd(user.password)
+@router.post("/register", response_model=UserCreatedOutputData)
+async def create_user(user: UserInputData, session: AsyncSession = Depends(get_session)):
+    hashed_password = await hash_pwd_async(user.password)
     new_user = User(username=user.username, email=user.email,
                     password_hash=hashed_password)
-    
-    async with AsyncSessionLocal() as session:
-        session.add(new_user)
-        await session.commit()
-        await session.refresh(new_user)
 
-        return {
-            "id": new_user.id,
-            "username": new_user.username,
-            "email": new_user.email
-        }
+    session.add(new_user)
+    await session.commit()
+    await session.refresh(new_user)
+
+    return {
+        "id": new_user.id,
+        "username": new_user.username,
+        "email": new_user.email
+    }
 
 
 @router.get("/me", response_model=UserOutputData)
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Any, List
+
+
+class BatchErrorData(BaseModel):
+    index: int
+    detail: Any
+
+
+class BatchDeleteInputData(BaseModel):
+    ids: List[int]
+
+
+class BatchDeleteOutputData(BaseModel):
+    deleted: int
+    payments: int = 0
+    errors: List[BatchErrorData]
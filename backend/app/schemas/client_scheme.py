@@ -1,4 +1,8 @@
 from pydantic import BaseModel, EmailStr, ConfigDict
+from enum import Enum
+from typing import List
+
+from app.schemas.order_scheme import OrderDetailData
 
 
 class ClientInputData(BaseModel):
@@ -7,6 +11,12 @@ class ClientInputData(BaseModel):
     notes: str
 
 
+class ClientPatchData(BaseModel):
+    name: str | None = None
+    contact: str | None = None
+    notes: str | None = None
+
+
 class ClientOutputData(BaseModel):
     id: int
     user_id: int
@@ -15,3 +25,24 @@ class ClientOutputData(BaseModel):
     notes: str
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ClientSearchData(ClientOutputData):
+    rank: float
+
+
+class ClientDetailData(ClientOutputData):
+    orders: List[OrderDetailData]
+
+
+class ClientDeleteOutputData(BaseModel):
+    clients: int
+    orders: int
+    payments: int
+
+
+class ClientSort(str, Enum):
+    ID = "id"
+    ID_DESC = "-id"
+    NAME = "name"
+    NAME_DESC = "-name"
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+
+
+class OrdersByStatusData(BaseModel):
+    new: int
+    active: int
+    archived: int
+
+
+class DashboardSummaryData(BaseModel):
+    orders_by_status: OrdersByStatusData
+    total_price: int
+    unpaid_price: int
+    paid_amount: int
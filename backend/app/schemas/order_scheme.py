@@ -1,5 +1,9 @@
 from pydantic import BaseModel, ConfigDict
 from enum import Enum
+from typing import List
+
+from app.schemas.batch_scheme import BatchErrorData
+from app.schemas.payment_scheme import PaymentOutputData
 
 
 class OrderStatus(str, Enum):
@@ -15,7 +19,14 @@ class OrderInputData(BaseModel):
     price: int
     status: OrderStatus
     notes: str
-    is_paid: bool
+
+
+class OrderPatchData(BaseModel):
+    title: str | None = None
+    description: str | None = None
+    price: int | None = None
+    status: OrderStatus | None = None
+    notes: str | None = None
 
 
 class OrderOutputData(BaseModel):
@@ -27,6 +38,40 @@ class OrderOutputData(BaseModel):
     price: int
     status: OrderStatus
     notes: str
+    # оплачено платежами; is_paid = paid_amount >= price, считает база
+    paid_amount: int
     is_paid: bool
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class OrderSearchData(OrderOutputData):
+    rank: float
+
+
+class OrderDetailData(OrderOutputData):
+    payments: List[PaymentOutputData]
+    paid_total: int
+
+
+class OrderBatchUpdateItem(OrderPatchData):
+    id: int
+
+
+class OrderBatchOutputData(BaseModel):
+    items: List[OrderOutputData]
+    errors: List[BatchErrorData]
+
+
+class OrderDeleteOutputData(BaseModel):
+    orders: int
+    payments: int
+
+
+class OrderSort(str, Enum):
+    ID = "id"
+    ID_DESC = "-id"
+    PRICE = "price"
+    PRICE_DESC = "-price"
+    TITLE = "title"
+    TITLE_DESC = "-title"
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, ConfigDict
-from enum import Enum
+from typing import List
+
+from app.schemas.batch_scheme import BatchErrorData
 
 
 class PaymentInputData(BaseModel):
@@ -8,6 +10,11 @@ class PaymentInputData(BaseModel):
     is_paid: bool
 
 
+class PaymentPatchData(BaseModel):
+    amount: int | None = None
+    is_paid: bool | None = None
+
+
 class PaymentOutputData(BaseModel):
     id: int
     user_id: int
@@ -16,3 +23,34 @@ class PaymentOutputData(BaseModel):
     is_paid: bool
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class PaymentBatchUpdateItem(PaymentPatchData):
+    id: int
+
+
+class PaymentBatchOutputData(BaseModel):
+    items: List[PaymentOutputData]
+    errors: List[BatchErrorData]
+
+
+class OrderBalanceData(BaseModel):
+    order_id: int
+    price: int
+    paid_amount: int
+    # сколько осталось оплатить; переплата даёт 0
+    outstanding: int
+    is_paid: bool
+
+
+class PaymentLedgerData(OrderBalanceData):
+    payments: List[PaymentOutputData]
+
+
+class OrderBalanceInputData(BaseModel):
+    ids: List[int]
+
+
+class OrderBalanceBatchData(BaseModel):
+    items: List[OrderBalanceData]
+    errors: List[BatchErrorData]
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from enum import Enum
+from typing import Any, List
+
+
+class TransferEntity(str, Enum):
+    CLIENTS = "clients"
+    ORDERS = "orders"
+    PAYMENTS = "payments"
+
+
+class TransferFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ImportRowError(BaseModel):
+    row: int
+    detail: Any
+
+
+class ImportOutputData(BaseModel):
+    imported: int
+    rejected: int
+    errors: List[ImportRowError]
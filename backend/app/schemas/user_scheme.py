@@ -8,6 +8,11 @@ class UserInputData(BaseModel):
 
 class UserOutputData(BaseModel):
     username: str
-    email: EmailStr
+    # на выходе email уже проверен при регистрации — EmailStr тут только тормозит
+    email: str
+
+    model_config = ConfigDict(from_attributes=True)
+
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+class UserCreatedOutputData(UserOutputData):
+    id: int
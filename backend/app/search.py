@@ -0,0 +1,70 @@
+"""
+Поиск по клиентам и заказам (индексы — миграция 4).
+
+Строка ищется двумя способами сразу:
+- полнотекстово по search_tsv, каждое слово как префикс ("ива" найдёт
+  "Иванов"), ранг — ts_rank с весами полей;
+- по триграммам (word_similarity, оператор <%) — ловит опечатки и куски
+  слов внутри контакта или заметок.
+Итоговый ранг — сумма двух оценок; сортировка по (rank, id) по убыванию,
+курсор — как в остальных списках (app/pagination.py).
+"""
+import re
+
+from sqlalchemy import Float, Select, cast, func, literal_column, or_, select
+
+from app.models.client_table import Client
+from app.models.orders_table import Order
+from app.pagination import paginate
+
+# Колонки search_tsv в моделях не объявлены: их считает сама база
+_CLIENT_TSV = literal_column("clients.search_tsv")
+_ORDER_TSV = literal_column("orders.search_tsv")
+# Должны совпадать с выражениями trigram-индексов из миграции 4
+_CLIENT_TEXT = literal_column(
+    "(clients.name || ' ' || clients.contact || ' ' || coalesce(clients.notes, ''))")
+_ORDER_TEXT = literal_column(
+    "(orders.title || ' ' || orders.description || ' ' || coalesce(orders.notes, ''))")
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def prefix_tsquery(q: str) -> str | None:
+    """'Иван Петр' -> 'Иван:* & Петр:*'; только буквы и цифры, без синтаксиса tsquery."""
+    words = _WORD.findall(q)
+    return " & ".join(f"{w}:*" for w in words) if words else None
+
+
+def _match_and_rank(tsv, text_expr, q: str) -> tuple:
+    similarity = func.word_similarity(q, text_expr)
+    # text %> q — то же, что q <% text: слово из q похоже на слово в тексте
+    match = text_expr.bool_op("%>")(q)
+    tsquery = prefix_tsquery(q)
+    if tsquery is None:
+        return match, cast(similarity, Float)
+    query = func.to_tsquery(literal_column("'simple'::regconfig"), tsquery)
+    return or_(tsv.bool_op("@@")(query), match), cast(func.ts_rank(tsv, query) + similarity, Float)
+
+
+def search_clients(user_id: int, q: str, cursor: str | None, limit: int) -> Select:
+    match, rank = _match_and_rank(_CLIENT_TSV, _CLIENT_TEXT, q)
+    stmt = (
+        select(Client.id, Client.user_id, Client.name, Client.contact, Client.notes,
+               rank.label("rank"))
+        .where(Client.user_id == user_id, match)
+    )
+    return paginate(stmt, rank, Client.id, descending=True, cursor=cursor, limit=limit)
+
+
+def search_orders(user_id: int, q: str, client_id: int | None,
+                  cursor: str | None, limit: int) -> Select:
+    match, rank = _match_and_rank(_ORDER_TSV, _ORDER_TEXT, q)
+    stmt = (
+        select(Order.id, Order.user_id, Order.client_id, Order.title, Order.description,
+               Order.price, Order.status, Order.notes, Order.paid_amount, Order.is_paid,
+               rank.label("rank"))
+        .where(Order.user_id == user_id, match)
+    )
+    if client_id is not None:
+        stmt = stmt.where(Order.client_id == client_id)
+    return paginate(stmt, rank, Order.id, descending=True, cursor=cursor, limit=limit)
@@ -1,10 +1,90 @@
+"""
+Хэширование паролей (bcrypt).
+
+bcrypt — CPU-bound и занимает сотни миллисекунд, поэтому в async-хендлерах
+используются `hash_pwd_async` / `verify_pwd_async`: работа уходит в пул
+потоков или процессов (HASH_EXECUTOR), одновременно выполняется не больше
+HASH_WORKERS задач, а при очереди длиннее HASH_MAX_QUEUE отдаётся 503.
+"""
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.config import BCRYPT_ROUNDS, HASH_EXECUTOR, HASH_MAX_QUEUE, HASH_WORKERS
+from app.metrics import HASH_SECONDS
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto",
+                           bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor: Executor | None = None
+_semaphore: asyncio.Semaphore | None = None
+_pending = 0
+
 
 def hash_pwd(password: str) -> str:
     return pwd_context.hash(password)
 
 
 def verify_pwd(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
\ No newline at end of file
+    return pwd_context.verify(password, password_hash)
+
+
+def verify_and_update_pwd(password: str, password_hash: str) -> tuple[bool, str | None]:
+    """Проверить пароль; если хэш сделан с другим cost — вернуть новый хэш."""
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+def _get_executor() -> Executor:
+    global _executor, _semaphore
+    if _executor is None:
+        if HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=HASH_WORKERS,
+                                           thread_name_prefix="bcrypt")
+        _semaphore = asyncio.Semaphore(HASH_WORKERS)
+    return _executor
+
+
+async def _run(fn, *args):
+    global _pending
+    executor = _get_executor()
+    if _pending >= HASH_WORKERS + HASH_MAX_QUEUE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер перегружен, повторите попытку позже",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    start = time.perf_counter()
+    try:
+        async with _semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, fn, *args)
+    finally:
+        _pending -= 1
+        HASH_SECONDS.observe(time.perf_counter() - start, fn.__name__)
+
+
+async def hash_pwd_async(password: str) -> str:
+    return await _run(hash_pwd, password)
+
+
+async def verify_pwd_async(password: str, password_hash: str) -> tuple[bool, str | None]:
+    """Вернуть (пароль верный, новый хэш или None)."""
+    return await _run(verify_and_update_pwd, password, password_hash)
+
+
+def hash_pool_stats() -> dict:
+    return {"workers": HASH_WORKERS, "max_queue": HASH_MAX_QUEUE, "pending": _pending}
+
+
+def shutdown_hash_pool() -> None:
+    global _executor, _semaphore
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _semaphore = None
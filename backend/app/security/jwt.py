@@ -3,10 +3,17 @@ from fastapi import Depends, HTTPException, Cookie
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import SECRET_KEY, ALGORITHM
-from app.database import AsyncSessionLocal
+from app.database import get_session
 from app.models.user_table import User
+from app.security.principal_cache import (
+    get_principal,
+    get_token_payload,
+    set_principal,
+    set_token_payload,
+)
 
 http_bearer = HTTPBearer(auto_error=False)
 
@@ -21,6 +28,7 @@ def create_access_token(data: dict, expires_delta: timedelta) -> str:
 async def get_current_user_release(
     credentials: HTTPAuthorizationCredentials | None = Depends(http_bearer),
     access_token: str | None = Cookie(None),
+    session: AsyncSession = Depends(get_session),
 ) -> User:
     token = None
     if credentials:
@@ -31,7 +39,10 @@ async def get_current_user_release(
     try:
         if not token:
             raise HTTPException(status_code=401, detail="Not logged in")
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = get_token_payload(token)
+        if payload is None:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            set_token_payload(token, payload)
 
         user_id: str | None = payload.get("sub")
         if user_id is None:
@@ -40,13 +51,30 @@ async def get_current_user_release(
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(User).where(User.id == int(user_id))
-        )
+    # по user_id сессия решает, можно ли читать с реплики (app/database.py)
+    session.info["user_id"] = int(user_id)
+    user = get_principal(int(user_id))
+    if user is not None:
+        return user
+
+    # сессия та же, что у хендлера; при попадании в кэш соединение не берётся
+    result = await session.execute(
+        select(User).where(User.id == int(user_id))
+    )
+    user = result.scalar_one_or_none()
+
+    if not user and session.info.get("read_only"):
+        # реплика могла ещё не получить только что созданного пользователя
+        session.info["read_only"] = False
+        result = await session.execute(select(User).where(User.id == int(user_id)))
         user = result.scalar_one_or_none()
+        session.info["read_only"] = True
 
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
 
-        return user
+    # в кэш — отсоединённый объект: rollback этой сессии в хендлере
+    # (404 при удалении) иначе пометил бы его expired для всех запросов
+    session.expunge(user)
+    set_principal(user, payload.get("exp"))
+    return user
@@ -0,0 +1,80 @@
+"""
+Кэш аутентифицированного пользователя (principal) и декодированных JWT.
+
+Без него каждый запрос к /clients, /orders, /payments делает лишний
+SELECT по users. Записи живут не дольше, чем действует токен (`exp`),
+и не дольше PRINCIPAL_CACHE_TTL секунд.
+"""
+import time
+
+from cachetools import TLRUCache
+from sqlalchemy import event
+
+from app.config import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
+from app.models.user_table import User
+
+
+def _ttu(_key, value, now):
+    # value — (данные, expires_at); запись умирает в момент expires_at
+    return value[1]
+
+
+# token -> (payload, exp)
+_tokens: TLRUCache = TLRUCache(maxsize=PRINCIPAL_CACHE_SIZE, ttu=_ttu, timer=time.time)
+# user_id -> (User, expires_at)
+_principals: TLRUCache = TLRUCache(maxsize=PRINCIPAL_CACHE_SIZE, ttu=_ttu, timer=time.time)
+
+stats = {"token_hits": 0, "token_misses": 0, "user_hits": 0, "user_misses": 0}
+
+
+def get_token_payload(token: str) -> dict | None:
+    entry = _tokens.get(token)
+    if entry is None:
+        stats["token_misses"] += 1
+        return None
+    stats["token_hits"] += 1
+    return entry[0]
+
+
+def set_token_payload(token: str, payload: dict) -> None:
+    exp = payload.get("exp")
+    if exp is None:
+        return
+    _tokens[token] = (payload, float(exp))
+
+
+def get_principal(user_id: int) -> User | None:
+    entry = _principals.get(user_id)
+    if entry is None:
+        stats["user_misses"] += 1
+        return None
+    stats["user_hits"] += 1
+    return entry[0]
+
+
+def set_principal(user: User, token_exp: float | None) -> None:
+    """Закэшировать пользователя до истечения токена, но не дольше TTL."""
+    expires_at = time.time() + PRINCIPAL_CACHE_TTL
+    if token_exp is not None:
+        expires_at = min(expires_at, float(token_exp))
+    _principals[user.id] = (user, expires_at)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Вызывать при изменении или удалении пользователя."""
+    _principals.pop(user_id, None)
+
+
+def clear() -> None:
+    _tokens.clear()
+    _principals.clear()
+
+
+def principal_cache_stats() -> dict:
+    return {**stats, "tokens": len(_tokens), "users": len(_principals)}
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _on_user_change(_mapper, _connection, target: User) -> None:
+    invalidate_principal(target.id)
@@ -0,0 +1,130 @@
+"""
+Сводка для дашборда (user_summaries).
+
+Таблицу инкрементально обновляют триггеры на orders и payments
+(миграция 3). Здесь — чтение сводки, «честный» агрегат по исходным
+таблицам и пересборка сводки, если она разошлась с данными:
+
+    python -m app.summary rebuild            # все пользователи
+    python -m app.summary rebuild --user 42
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal, engine
+from app.models.orders_table import Order
+from app.models.payments_table import Payment
+from app.models.summary_table import UserSummary
+from app.schemas.order_scheme import OrderStatus
+
+_REBUILD_SQL = """
+    INSERT INTO user_summaries AS s (user_id, orders_new, orders_active, orders_archived,
+                                     total_price, unpaid_price, paid_amount)
+    SELECT u.id,
+           coalesce(o.orders_new, 0), coalesce(o.orders_active, 0), coalesce(o.orders_archived, 0),
+           coalesce(o.total_price, 0), coalesce(o.unpaid_price, 0), coalesce(p.paid_amount, 0)
+    FROM users u
+    LEFT JOIN (
+        SELECT user_id,
+               count(*) FILTER (WHERE order_status_enum = 'NEW') AS orders_new,
+               count(*) FILTER (WHERE order_status_enum = 'ACTIVE') AS orders_active,
+               count(*) FILTER (WHERE order_status_enum = 'ARCHIVED') AS orders_archived,
+               sum(price) AS total_price,
+               sum(price) FILTER (WHERE NOT is_paid) AS unpaid_price
+        FROM orders {orders_where} GROUP BY user_id
+    ) o ON o.user_id = u.id
+    LEFT JOIN (
+        SELECT user_id, sum(amount) FILTER (WHERE is_paid) AS paid_amount
+        FROM payments {payments_where} GROUP BY user_id
+    ) p ON p.user_id = u.id
+    {users_where}
+    ON CONFLICT (user_id) DO UPDATE SET
+        orders_new = EXCLUDED.orders_new,
+        orders_active = EXCLUDED.orders_active,
+        orders_archived = EXCLUDED.orders_archived,
+        total_price = EXCLUDED.total_price,
+        unpaid_price = EXCLUDED.unpaid_price,
+        paid_amount = EXCLUDED.paid_amount
+"""
+
+
+def _summary_dict(new: int, active: int, archived: int, total_price: int,
+                  unpaid_price: int, paid_amount: int) -> dict:
+    return {
+        "orders_by_status": {"new": new, "active": active, "archived": archived},
+        "total_price": total_price,
+        "unpaid_price": unpaid_price,
+        "paid_amount": paid_amount,
+    }
+
+
+async def get_summary(session: AsyncSession, user_id: int) -> dict:
+    """Одно чтение по первичному ключу."""
+    summary = await session.get(UserSummary, user_id)
+    if summary is None:
+        return _summary_dict(0, 0, 0, 0, 0, 0)
+    return _summary_dict(summary.orders_new, summary.orders_active, summary.orders_archived,
+                         summary.total_price, summary.unpaid_price, summary.paid_amount)
+
+
+async def compute_summary(session: AsyncSession, user_id: int) -> dict:
+    """Та же сводка агрегатом по orders и payments — эталон для сверки и бенчмарка."""
+    orders = (await session.execute(
+        select(
+            func.count().filter(Order.status == OrderStatus.NEW),
+            func.count().filter(Order.status == OrderStatus.ACTIVE),
+            func.count().filter(Order.status == OrderStatus.ARCHIVED),
+            func.coalesce(func.sum(Order.price), 0),
+            func.coalesce(func.sum(Order.price).filter(Order.is_paid.is_(False)), 0),
+        ).where(Order.user_id == user_id)
+    )).one()
+    paid = (await session.execute(
+        select(func.coalesce(func.sum(Payment.amount).filter(Payment.is_paid.is_(True)), 0))
+        .where(Payment.user_id == user_id)
+    )).scalar_one()
+    return _summary_dict(*orders, paid)
+
+
+async def rebuild_summaries(session: AsyncSession, user_id: int | None = None) -> None:
+    """
+    Пересчитать сводку с нуля. Перед агрегатом берётся блокировка, чтобы
+    дождаться незакоммиченных записей и не потерять их дельты.
+    """
+    if user_id is None:
+        await session.execute(text("LOCK TABLE user_summaries IN EXCLUSIVE MODE"))
+        sql = _REBUILD_SQL.format(orders_where="", payments_where="", users_where="")
+        await session.execute(text(sql))
+        return
+
+    await session.execute(
+        text("INSERT INTO user_summaries (user_id) VALUES (:u) ON CONFLICT DO NOTHING"), {"u": user_id}
+    )
+    await session.execute(
+        text("SELECT 1 FROM user_summaries WHERE user_id = :u FOR UPDATE"), {"u": user_id}
+    )
+    sql = _REBUILD_SQL.format(orders_where="WHERE user_id = :u", payments_where="WHERE user_id = :u",
+                              users_where="WHERE u.id = :u")
+    await session.execute(text(sql), {"u": user_id})
+
+
+async def _main():
+    parser = argparse.ArgumentParser(prog="python -m app.summary")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebuild = sub.add_parser("rebuild")
+    rebuild.add_argument("--user", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        async with AsyncSessionLocal() as session:
+            await rebuild_summaries(session, args.user)
+            await session.commit()
+        print("rebuilt:", "all users" if args.user is None else f"user {args.user}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
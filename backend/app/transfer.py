@@ -0,0 +1,236 @@
+"""
+Потоковый импорт и экспорт клиентов, заказов и платежей (NDJSON / CSV).
+
+Импорт читает тело запроса по кусочкам, валидирует строки по одной и
+отдаёт их прямо в asyncpg COPY, поэтому память не зависит от размера файла.
+Заказы и платежи сначала копируются во временную таблицу и переносятся
+одним INSERT … SELECT с JOIN на clients / orders пользователя — так чужие
+client_id / order_id отсекаются без загрузки списка id в память.
+
+Экспорт читает серверным курсором пачками по EXPORT_CHUNK_ROWS строк.
+"""
+import codecs
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import EXPORT_CHUNK_ROWS, IMPORT_MAX_ERRORS
+from app.database import read_session
+from app.models.client_table import Client
+from app.models.orders_table import Order
+from app.models.payments_table import Payment
+from app.schemas.client_scheme import ClientInputData
+from app.schemas.order_scheme import OrderInputData
+from app.schemas.payment_scheme import PaymentInputData
+from app.schemas.transfer_scheme import TransferEntity, TransferFormat
+
+
+@dataclass
+class ImportReport:
+    copied: int = 0
+    rejected: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def reject(self, row: int, detail: Any) -> None:
+        self.rejected += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "detail": detail})
+
+
+@dataclass(frozen=True)
+class _ImportSpec:
+    schema: type[BaseModel]
+    # имя целевой (или временной) таблицы и колонки COPY
+    copy_table: str
+    copy_columns: list[str]
+    to_record: Callable[[int, Any], tuple]
+    temp_table_ddl: str | None = None
+    move_sql: str | None = None
+
+
+_IMPORTS = {
+    TransferEntity.CLIENTS: _ImportSpec(
+        schema=ClientInputData,
+        copy_table="clients",
+        copy_columns=["user_id", "name", "contact", "notes"],
+        to_record=lambda user_id, d: (user_id, d.name, d.contact, d.notes),
+    ),
+    TransferEntity.ORDERS: _ImportSpec(
+        schema=OrderInputData,
+        copy_table="import_orders",
+        # is_paid заказа не импортируется: его считает база по платежам
+        copy_columns=["client_id", "title", "description", "price", "status", "notes"],
+        # в БД enum хранит имена (NEW), а в API — значения (new)
+        to_record=lambda _user_id, d: (d.client_id, d.title, d.description, d.price,
+                                       d.status.name, d.notes),
+        temp_table_ddl=(
+            "CREATE TEMP TABLE import_orders (client_id INTEGER, title TEXT, description TEXT,"
+            " price INTEGER, status TEXT, notes TEXT) ON COMMIT DROP"
+        ),
+        move_sql=(
+            "INSERT INTO orders (user_id, client_id, title, description, price,"
+            " order_status_enum, notes) "
+            "SELECT :user_id, t.client_id, t.title, t.description, t.price,"
+            " t.status::orderstatus, t.notes "
+            "FROM import_orders t JOIN clients c ON c.id = t.client_id AND c.user_id = :user_id"
+        ),
+    ),
+    TransferEntity.PAYMENTS: _ImportSpec(
+        schema=PaymentInputData,
+        copy_table="import_payments",
+        copy_columns=["order_id", "amount", "is_paid"],
+        to_record=lambda _user_id, d: (d.order_id, d.amount, d.is_paid),
+        temp_table_ddl=(
+            "CREATE TEMP TABLE import_payments (order_id INTEGER, amount INTEGER,"
+            " is_paid BOOLEAN) ON COMMIT DROP"
+        ),
+        move_sql=(
+            "INSERT INTO payments (user_id, order_id, amount, is_paid) "
+            "SELECT :user_id, t.order_id, t.amount, t.is_paid "
+            "FROM import_payments t JOIN orders o ON o.id = t.order_id AND o.user_id = :user_id"
+        ),
+    ),
+}
+
+_EXPORT_COLUMNS = {
+    TransferEntity.CLIENTS: [Client.id, Client.name, Client.contact, Client.notes],
+    TransferEntity.ORDERS: [Order.id, Order.client_id, Order.title, Order.description,
+                            Order.price, Order.status, Order.notes, Order.paid_amount, Order.is_paid],
+    TransferEntity.PAYMENTS: [Payment.id, Payment.order_id, Payment.amount, Payment.is_paid],
+}
+
+_EXPORT_MODELS = {
+    TransferEntity.CLIENTS: Client,
+    TransferEntity.ORDERS: Order,
+    TransferEntity.PAYMENTS: Payment,
+}
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    tail = ""
+    async for chunk in chunks:
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line.removesuffix("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.removesuffix("\r")
+
+
+async def _ndjson_rows(lines: AsyncIterator[str], report: ImportReport) -> AsyncIterator[tuple[int, Any]]:
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            yield row, json.loads(line)
+        except ValueError as e:
+            report.reject(row, f"Некорректный JSON: {e}")
+
+
+async def _csv_rows(lines: AsyncIterator[str], _report: ImportReport) -> AsyncIterator[tuple[int, Any]]:
+    header = None
+    pending = None
+    row = 0
+    async for line in lines:
+        # Поле в кавычках может содержать перевод строки — копим до чётного числа кавычек
+        pending = line if pending is None else pending + "\n" + line
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, None
+        if not record.strip():
+            continue
+        (values,) = csv.reader([record])
+        if header is None:
+            header = values
+            continue
+        row += 1
+        yield row, dict(zip(header, values))
+
+
+async def _records(rows: AsyncIterator[tuple[int, Any]], spec: _ImportSpec, user_id: int,
+                   report: ImportReport) -> AsyncIterator[tuple]:
+    async for row, raw in rows:
+        try:
+            data = spec.schema.model_validate(raw)
+        except ValidationError as e:
+            report.reject(row, e.errors(include_url=False, include_context=False))
+            continue
+        report.copied += 1
+        yield spec.to_record(user_id, data)
+
+
+async def import_rows(session: AsyncSession, entity: TransferEntity, fmt: TransferFormat,
+                      user_id: int, chunks: AsyncIterator[bytes]) -> dict:
+    """Залить строки из потока в одной транзакции. Коммит — на вызывающем."""
+    spec = _IMPORTS[entity]
+    report = ImportReport()
+    parse = _ndjson_rows if fmt == TransferFormat.NDJSON else _csv_rows
+    records = _records(parse(_lines(chunks), report), spec, user_id, report)
+
+    if spec.temp_table_ddl:
+        await session.execute(text(spec.temp_table_ddl))
+    conn = await session.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        spec.copy_table, records=records, columns=spec.copy_columns
+    )
+
+    imported = report.copied
+    if spec.move_sql:
+        result = await session.execute(text(spec.move_sql), {"user_id": user_id})
+        imported = result.rowcount
+        skipped = report.copied - imported
+        if skipped:
+            report.rejected += skipped
+            parent = "client_id" if entity == TransferEntity.ORDERS else "order_id"
+            if len(report.errors) < IMPORT_MAX_ERRORS:
+                report.errors.append({"row": 0, "detail": f"{skipped} строк ссылаются на чужой или несуществующий {parent}"})
+
+    return {"imported": imported, "rejected": report.rejected, "errors": report.errors}
+
+
+def _jsonable(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def _encode_chunk(rows, names: list[str], fmt: TransferFormat, with_header: bool) -> bytes:
+    if fmt == TransferFormat.NDJSON:
+        return "".join(
+            json.dumps(dict(zip(names, map(_jsonable, row))), ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode()
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if with_header:
+        writer.writerow(names)
+    writer.writerows([_jsonable(v) for v in row] for row in rows)
+    return buf.getvalue().encode()
+
+
+async def export_rows(entity: TransferEntity, fmt: TransferFormat, user_id: int) -> AsyncIterator[bytes]:
+    """Отдавать выгрузку кусками; сессия живёт столько же, сколько поток ответа."""
+    columns = _EXPORT_COLUMNS[entity]
+    names = [c.key for c in columns]
+    model = _EXPORT_MODELS[entity]
+    stmt = (
+        select(*columns).where(model.user_id == user_id).order_by(model.id)
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    )
+    async with read_session(user_id) as session:
+        result = await session.stream(stmt)
+        first = True
+        async for partition in result.partitions():
+            yield _encode_chunk(partition, names, fmt, with_header=first)
+            first = False
+        if first and fmt == TransferFormat.CSV:
+            yield _encode_chunk([], names, fmt, with_header=True)
@@ -0,0 +1,92 @@
+"""
+Шумный сосед против допуска запросов (app/admission.py): --noisy-concurrency
+параллельных циклов одного пользователя по /orders/get (каждый — запрос
+в БД) и тихий пользователь, который в это же время делает запросы по одному.
+Меряет задержку тихого пользователя и коды ответов шумного; --off —
+тот же прогон без middleware допуска для сравнения.
+
+    cd backend && DB_POOL_SIZE=5 DB_MAX_OVERFLOW=0 \\
+        python -m benchmarks.bench_admission --noisy-concurrency 64 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+
+os.environ["ADMISSION_ENABLED"] = "false" if "--off" in sys.argv else "true"
+
+from benchmarks import _common  # noqa: E402
+from app.admission import admission_stats  # noqa: E402
+from app.database import pool_stats  # noqa: E402
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000, 2)
+
+
+async def _noisy(http, url: str, headers: dict, deadline: float, statuses: dict[int, int]) -> None:
+    while time.perf_counter() < deadline:
+        response = await http.get(url, headers=headers)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code in (429, 503):
+            # как клиент, который уважает Retry-After, но не дольше 50 мс для прогона
+            await asyncio.sleep(min(0.05, float(response.headers.get("retry-after", 1))))
+
+
+async def _quiet(http, url: str, headers: dict, deadline: float) -> tuple[list[float], int]:
+    latencies, rejected = [], 0
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        response = await http.get(url, headers=headers)
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - t0)
+        else:
+            rejected += 1
+        await asyncio.sleep(0.01)
+    return latencies, rejected
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--noisy-concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--off", action="store_true", help="без middleware допуска")
+    args = parser.parse_args()
+
+    await _common.setup()
+    urls, auths = [], []
+    for _ in range(2):
+        user_id, auth = await _common.create_user()
+        client_id = await _common.create_client(user_id)
+        await _common.seed_orders(user_id, client_id, 10)
+        urls.append(f"/orders/get/{(await _common.order_ids(user_id, client_id))[0]}")
+        auths.append({"Authorization": auth})
+
+    statuses: dict[int, int] = {}
+    async with _common.client() as http:
+        deadline = time.perf_counter() + args.duration
+        noisy = [asyncio.create_task(_noisy(http, urls[0], auths[0], deadline, statuses))
+                 for _ in range(args.noisy_concurrency)]
+        latencies, rejected = await _quiet(http, urls[1], auths[1], deadline)
+        await asyncio.gather(*noisy)
+
+    print(json.dumps({
+        "admission": not args.off,
+        "noisy_statuses": statuses,
+        "quiet": {
+            "requests": len(latencies) + rejected,
+            "rejected": rejected,
+            "p50_ms": _percentile(latencies, 50) if latencies else None,
+            "p99_ms": _percentile(latencies, 99) if latencies else None,
+        },
+        "pool": {k: v for k, v in pool_stats().items() if k in ("max_waiting", "timeouts", "wait_avg_ms")},
+        "admission_stats": admission_stats(),
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
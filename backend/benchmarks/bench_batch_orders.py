@@ -0,0 +1,61 @@
+"""
+Создание N заказов: цикл POST /orders/add против POST /orders/batch/add.
+
+    cd backend && python -m benchmarks.bench_batch_orders --orders 10000 --batch 500
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import _common
+
+
+def _order(client_id: int, i: int) -> dict:
+    return {"client_id": client_id, "title": f"Order {i}", "description": "Imported",
+            "price": 100 + i, "status": "new", "notes": ""}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    await _common.setup()
+    user_id, auth = await _common.create_user()
+    client_id = await _common.create_client(user_id)
+    headers = {"Authorization": auth}
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async with _common.client() as http:
+        async def _single(i: int) -> None:
+            async with sem:
+                (await http.post("/orders/add", json=_order(client_id, i), headers=headers)).raise_for_status()
+
+        async def _batch(start: int) -> None:
+            items = [_order(client_id, i) for i in range(start, min(start + args.batch, args.orders))]
+            async with sem:
+                resp = await http.post("/orders/batch/add", json=items, headers=headers)
+            resp.raise_for_status()
+            assert not resp.json()["errors"]
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(_single(i) for i in range(args.orders)))
+        single_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(_batch(i) for i in range(0, args.orders, args.batch)))
+        batch_s = time.perf_counter() - t0
+
+    print(json.dumps({
+        "orders": args.orders,
+        "single_orders_per_s": round(args.orders / single_s),
+        "batch_orders_per_s": round(args.orders / batch_s),
+        "speedup": round(single_s / batch_s, 1),
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
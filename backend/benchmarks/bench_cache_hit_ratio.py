@@ -0,0 +1,116 @@
+"""
+Доля попаданий в кэш списков при нагрузке с большим числом записей:
+чтения /clients/all, /orders/all/{client} (целиком и с фильтром),
+/clients/detail/{client} вперемешку с правками, добавлением и удалением
+заказов, правками клиентов и платежами. Запросы идут последовательно, выбор —
+детерминирован --seed, поэтому прогоны сравнимы между собой.
+
+    cd backend && python -m benchmarks.bench_cache_hit_ratio --writes 0.3
+    cd backend && CACHE_WRITE_THROUGH=false python -m benchmarks.bench_cache_hit_ratio --writes 0.3
+
+Первый прогон убирает удалённые заказы из полных списков на месте, второй
+сбрасывает списки и после удалений.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks import _common
+from app.cache import cache_stats
+from app.config import CACHE_BACKEND, CACHE_WRITE_THROUGH
+
+READS = {
+    "clients_all": 3,
+    "orders_all": 6,
+    "orders_all_filtered": 2,
+    "clients_detail": 2,
+}
+WRITES = {
+    "orders_patch": 6,
+    "orders_add": 2,
+    "orders_delete": 2,
+    "clients_patch": 1,
+    "payments_add": 1,
+}
+
+
+def _request(http, op: str, client_id: int, order_id: int, headers: dict, i: int):
+    if op == "clients_all":
+        return http.get("/clients/all", headers=headers)
+    if op == "orders_all":
+        return http.get(f"/orders/all/{client_id}", headers=headers)
+    if op == "orders_all_filtered":
+        return http.get(f"/orders/all/{client_id}?status=new", headers=headers)
+    if op == "clients_detail":
+        return http.get(f"/clients/detail/{client_id}", headers=headers)
+    if op == "orders_patch":
+        return http.patch(f"/orders/update/{order_id}", json={"price": 100 + i % 5000}, headers=headers)
+    if op == "orders_add":
+        return http.post("/orders/add", headers=headers, json={
+            "client_id": client_id, "title": f"Bench order {i}", "description": "Cache bench",
+            "price": 500, "status": "new", "notes": "",
+        })
+    if op == "orders_delete":
+        return http.delete(f"/orders/delete/{order_id}", headers=headers)
+    if op == "clients_patch":
+        return http.patch(f"/clients/update/{client_id}", json={"notes": f"note {i}"}, headers=headers)
+    return http.post("/payments/add", json={"order_id": order_id, "amount": 100, "is_paid": True},
+                     headers=headers)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=200, help="заказов на клиента")
+    parser.add_argument("--hot", type=int, default=10, help="клиентов, к которым идут запросы")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--writes", type=float, default=0.3, help="доля запросов-записей")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    await _common.setup()
+    user_id, auth = await _common.create_user()
+    client_ids = await _common.seed_clients(user_id, args.clients)
+    hot = client_ids[:args.hot]
+    orders = {}
+    for client_id in hot:
+        await _common.seed_orders(user_id, client_id, args.orders)
+        orders[client_id] = await _common.order_ids(user_id, client_id)
+    headers = {"Authorization": auth}
+    rnd = random.Random(args.seed)
+
+    before = cache_stats()
+    counts = {op: 0 for op in (*READS, *WRITES)}
+    t0 = time.perf_counter()
+    async with _common.client() as http:
+        for i in range(args.requests):
+            mix = WRITES if rnd.random() < args.writes else READS
+            op = rnd.choices(list(mix), weights=list(mix.values()))[0]
+            client_id = rnd.choice(hot)
+            order_id = rnd.choice(orders[client_id])
+            resp = await _request(http, op, client_id, order_id, headers, i)
+            resp.raise_for_status()
+            if op == "orders_delete":
+                orders[client_id].remove(order_id)
+            counts[op] += 1
+    elapsed = time.perf_counter() - t0
+
+    after = cache_stats()
+    delta = {key: after[key] - before[key]
+             for key in ("hits", "stale_hits", "misses", "loads", "patched", "invalidated_keys")}
+    lookups = delta["hits"] + delta["stale_hits"] + delta["misses"]
+    print(json.dumps({
+        "write_through": CACHE_WRITE_THROUGH,
+        "cache_backend": CACHE_BACKEND,
+        "writes": args.writes,
+        "requests": counts,
+        **delta,
+        "hit_ratio": round((delta["hits"] + delta["stale_hits"]) / lookups, 4) if lookups else None,
+        "mean_ms": round(elapsed / args.requests * 1000, 3),
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
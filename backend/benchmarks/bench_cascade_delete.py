@@ -0,0 +1,70 @@
+"""
+Удаление клиента с N заказами (и по платежу на заказ):
+старый способ (session.delete на каждый заказ) против DELETE /clients/delete.
+
+    cd backend && python -m benchmarks.bench_cascade_delete --orders 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import select
+
+from benchmarks import _common
+from app.database import AsyncSessionLocal
+from app.models.client_table import Client
+from app.models.orders_table import Order
+from app.models.payments_table import Payment
+
+
+async def _seed(user_id: int, n: int) -> int:
+    client_id = await _common.create_client(user_id)
+    await _common.seed_orders(user_id, client_id, n)
+    await _common.seed_payments(user_id, await _common.order_ids(user_id, client_id))
+    return client_id
+
+
+async def _old_delete(user_id: int, client_id: int) -> None:
+    async with AsyncSessionLocal() as session:
+        orders = (await session.execute(
+            select(Order).where(Order.user_id == user_id, Order.client_id == client_id)
+        )).scalars().all()
+        payments = (await session.execute(
+            select(Payment).where(Payment.order_id.in_([o.id for o in orders]))
+        )).scalars().all()
+        client = (await session.execute(select(Client).where(Client.id == client_id))).scalar_one()
+        for payment in payments:
+            await session.delete(payment)
+        for order in orders:
+            await session.delete(order)
+        await session.delete(client)
+        await session.commit()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=10_000)
+    args = parser.parse_args()
+
+    await _common.setup()
+    user_id, auth = await _common.create_user()
+
+    client_id = await _seed(user_id, args.orders)
+    t0 = time.perf_counter()
+    await _old_delete(user_id, client_id)
+    old_ms = (time.perf_counter() - t0) * 1000
+
+    client_id = await _seed(user_id, args.orders)
+    async with _common.client() as http:
+        t0 = time.perf_counter()
+        resp = await http.delete(f"/clients/delete/{client_id}", headers={"Authorization": auth})
+        new_ms = (time.perf_counter() - t0) * 1000
+    resp.raise_for_status()
+
+    print(json.dumps({"orders": args.orders, "per_row_delete_ms": round(old_ms, 1),
+                      "set_based_delete_ms": round(new_ms, 1), "affected": resp.json()}))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
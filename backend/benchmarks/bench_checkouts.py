@@ -0,0 +1,60 @@
+"""
+Сколько раз запрос берёт соединение из пула.
+
+Сценарии гоняются через приложение в том же процессе; выдачи считает
+слушатель "checkout" на engine. С общей на запрос сессией ожидается:
+попадание в кэш — 0, чтение/запись — 1, в том числе когда пользователя
+приходится читать из БД (cold_principal; раньше там было 2).
+
+    cd backend && python -m benchmarks.bench_checkouts --requests 200
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks import _common
+from app.database import checkout_count
+from app.security.principal_cache import clear as clear_principals
+
+
+async def _measure(http, requests: int, call, cold_principal: bool = False) -> float:
+    before = checkout_count()
+    for i in range(requests):
+        if cold_principal:
+            clear_principals()
+        response = await call(http, i)
+        response.raise_for_status()
+    return round((checkout_count() - before) / requests, 3)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    await _common.setup()
+    user_id, auth = await _common.create_user()
+    client_id = await _common.create_client(user_id)
+    await _common.seed_orders(user_id, client_id, 100)
+    order_id = (await _common.order_ids(user_id, client_id))[0]
+    headers = {"Authorization": auth}
+
+    scenarios = {
+        "list_cache_hit": lambda http, i: http.get(f"/orders/all/{client_id}", headers=headers),
+        "get_order": lambda http, i: http.get(f"/orders/get/{order_id}", headers=headers),
+        "patch_order": lambda http, i: http.patch(f"/orders/update/{order_id}", headers=headers,
+                                                  json={"price": 100 + i}),
+    }
+    async with _common.client() as http:
+        # прогрев: principal и список заказов попадают в кэш
+        await scenarios["list_cache_hit"](http, 0)
+        result = {"requests": args.requests}
+        for name, call in scenarios.items():
+            result[name] = await _measure(http, args.requests, call)
+        result["get_order_cold_principal"] = await _measure(
+            http, args.requests, scenarios["get_order"], cold_principal=True)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
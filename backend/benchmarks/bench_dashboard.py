@@ -0,0 +1,57 @@
+"""
+GET /dashboard/summary (чтение user_summaries) против агрегата по orders
+и payments, плюс сверка, что инкрементальная сводка совпадает с агрегатом.
+
+    cd backend && python -m benchmarks.bench_dashboard --orders 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import _common
+from app.database import AsyncSessionLocal
+from app.summary import compute_summary, get_summary
+
+
+async def _time(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - t0) / repeat * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    await _common.setup()
+    user_id, auth = await _common.create_user()
+    client_id = await _common.create_client(user_id)
+    await _common.seed_orders(user_id, client_id, args.orders)
+    await _common.seed_payments(user_id, await _common.order_ids(user_id, client_id))
+
+    async with AsyncSessionLocal() as session:
+        incremental = await get_summary(session, user_id)
+        naive = await compute_summary(session, user_id)
+        summary_ms = await _time(lambda: get_summary(session, user_id), args.repeat)
+        naive_ms = await _time(lambda: compute_summary(session, user_id), args.repeat)
+
+    async with _common.client() as http:
+        async def _endpoint():
+            (await http.get("/dashboard/summary", headers={"Authorization": auth})).raise_for_status()
+        endpoint_ms = await _time(_endpoint, args.repeat)
+
+    print(json.dumps({
+        "orders": args.orders,
+        "consistent": incremental == naive,
+        "summary_table_ms": round(summary_ms, 3),
+        "naive_aggregate_ms": round(naive_ms, 3),
+        "endpoint_ms": round(endpoint_ms, 3),
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
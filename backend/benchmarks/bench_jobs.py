@@ -0,0 +1,168 @@
+"""
+Очередь фоновых задач (app/jobs) с --workers воркерами в том же процессе:
+
+- throughput — --jobs задач с обработчиком на --work-ms мс ставятся заранее,
+  затем воркеры запускаются и разбирают очередь (задач/с);
+- latency — воркеры простаивают, задачи ставятся по одной: от commit
+  постановки до начала выполнения (started_at - created_at), то есть
+  NOTIFY + захват через SKIP LOCKED;
+- retries — обработчик падает с вероятностью --fail-rate: сколько задач
+  дошли до done после повторов и сколько стали failed;
+- rebuild — POST /dashboard/summary/rebuild (ответ 202) против пересборки
+  сводки внутри запроса на пользователе с --orders заказами, медиана
+  --repeats замеров после прогревочного запроса.
+
+    cd backend && python -m benchmarks.bench_jobs --jobs 5000 --workers 8
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+
+# повторы в прогоне не должны ждать секунды
+os.environ.setdefault("JOBS_BACKOFF_BASE", "0.01")
+os.environ.setdefault("JOBS_BACKOFF_MAX", "0.1")
+
+from sqlalchemy import delete, func, select  # noqa: E402
+
+from benchmarks import _common  # noqa: E402
+from app import jobs  # noqa: E402
+from app.database import AsyncSessionLocal  # noqa: E402
+from app.jobs import worker  # noqa: E402
+from app.models.job_table import Job  # noqa: E402
+from app.summary import rebuild_summaries  # noqa: E402
+
+NOOP = "bench.noop"
+FLAKY = "bench.flaky"
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000, 2)
+
+
+async def _enqueue(user_id: int, kind: str, n: int, batch: int) -> float:
+    t0 = time.perf_counter()
+    for start in range(0, n, batch):
+        async with AsyncSessionLocal() as session:
+            for _ in range(min(batch, n - start)):
+                await jobs.enqueue(session, kind, user_id=user_id)
+            await session.commit()
+    return time.perf_counter() - t0
+
+
+async def _counts(user_id: int, kind: str) -> dict[str, int]:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Job.status, func.count()).where(Job.user_id == user_id, Job.kind == kind)
+            .group_by(Job.status)
+        )
+        return dict(result.all())
+
+
+async def _wait_finished(user_id: int, kind: str, n: int, timeout: float = 300) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        counts = await _counts(user_id, kind)
+        if counts.get("done", 0) + counts.get("failed", 0) >= n:
+            return
+        await asyncio.sleep(0.05)
+    raise SystemExit(f"{kind}: jobs not finished in {timeout}s: {await _counts(user_id, kind)}")
+
+
+async def _start_latencies(user_id: int, kind: str) -> list[float]:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(func.extract("epoch", Job.started_at - Job.created_at))
+            .where(Job.user_id == user_id, Job.kind == kind, Job.started_at.is_not(None))
+        )
+        return [float(v) for v in result.scalars()]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--work-ms", type=float, default=1.0)
+    parser.add_argument("--batch", type=int, default=100, help="задач в одной транзакции постановки")
+    parser.add_argument("--latency-jobs", type=int, default=200)
+    parser.add_argument("--fail-rate", type=float, default=0.3)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=20, help="замеров rebuild после прогрева")
+    args = parser.parse_args()
+
+    @jobs.handler(NOOP)
+    async def noop(session, user_id, payload):
+        await asyncio.sleep(args.work_ms / 1000)
+
+    @jobs.handler(FLAKY)
+    async def flaky(session, user_id, payload):
+        if random.random() < args.fail_rate:
+            raise RuntimeError("bench failure")
+
+    await _common.setup()
+    user_id, auth = await _common.create_user()
+    result = {"workers": args.workers, "jobs": args.jobs, "work_ms": args.work_ms}
+
+    enqueue_s = await _enqueue(user_id, NOOP, args.jobs, args.batch)
+    result["enqueue_per_s"] = round(args.jobs / enqueue_s)
+    t0 = time.perf_counter()
+    await worker.start(args.workers)
+    await _wait_finished(user_id, NOOP, args.jobs)
+    drain_s = time.perf_counter() - t0
+    result["throughput_per_s"] = round(args.jobs / drain_s)
+    # идеал при полной загрузке воркеров ожиданием обработчика
+    result["handler_bound_per_s"] = round(args.workers * 1000 / args.work_ms) if args.work_ms else None
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(Job).where(Job.user_id == user_id))
+        await session.commit()
+    for _ in range(args.latency_jobs):
+        await _enqueue(user_id, NOOP, 1, 1)
+        await asyncio.sleep(0.005)
+    await _wait_finished(user_id, NOOP, args.latency_jobs)
+    latencies = await _start_latencies(user_id, NOOP)
+    result["start_latency_ms"] = {"p50": _percentile(latencies, 50), "p99": _percentile(latencies, 99)}
+
+    await _enqueue(user_id, FLAKY, args.jobs // 10, args.batch)
+    await _wait_finished(user_id, FLAKY, args.jobs // 10)
+    async with AsyncSessionLocal() as session:
+        attempts = (await session.execute(
+            select(func.sum(Job.attempts)).where(Job.user_id == user_id, Job.kind == FLAKY)
+        )).scalar_one()
+    result["retries"] = {**(await _counts(user_id, FLAKY)), "attempts": attempts}
+
+    client_id = await _common.create_client(user_id)
+    await _common.seed_orders(user_id, client_id, args.orders)
+    inline = []
+    for _ in range(args.repeats):
+        async with AsyncSessionLocal() as session:
+            t0 = time.perf_counter()
+            await rebuild_summaries(session, user_id)
+            await session.commit()
+            inline.append(time.perf_counter() - t0)
+    accepted = []
+    async with _common.client() as http:
+        # первый запрос прогревает пул соединений, кэш пользователя и сериализацию
+        for i in range(args.repeats + 1):
+            t0 = time.perf_counter()
+            response = await http.post("/dashboard/summary/rebuild", headers={"Authorization": auth})
+            response.raise_for_status()
+            if i:
+                accepted.append(time.perf_counter() - t0)
+    await _wait_finished(user_id, jobs.SUMMARY_REBUILD, args.repeats + 1)
+    result["rebuild"] = {"orders": args.orders, "repeats": args.repeats,
+                         "inline_ms_p50": _percentile(inline, 50),
+                         "accepted_202_ms_p50": _percentile(accepted, 50),
+                         "status": response.status_code}
+
+    result["worker_stats"] = worker.jobs_stats()
+    await worker.stop()
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
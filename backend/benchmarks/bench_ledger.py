@@ -0,0 +1,99 @@
+"""
+Выписка и балансы заказов на --payments платежей одного пользователя
+(по --per-order на заказ): /payments/ledger без кэша и из кэша,
+/payments/balances на --batch заказов против агрегата по payments, цена
+записи платежа с пересчётом orders.paid_amount триггером и сверка
+paid_amount с суммой платежей.
+
+    cd backend && python -m benchmarks.bench_ledger --payments 100000 --per-order 10
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import func, select
+
+from benchmarks import _common
+from app.cache import invalidate_tags, keys
+from app.database import AsyncSessionLocal
+from app.models.orders_table import Order
+from app.models.payments_table import Payment
+
+
+async def _time(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return round((time.perf_counter() - t0) / repeat * 1000, 3)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--payments", type=int, default=100_000)
+    parser.add_argument("--per-order", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    await _common.setup()
+    user_id, auth = await _common.create_user()
+    client_id = await _common.create_client(user_id)
+    await _common.seed_orders(user_id, client_id, args.payments // args.per_order)
+    order_ids = await _common.order_ids(user_id, client_id)
+    t0 = time.perf_counter()
+    # COPY — один оператор: триггер пересчитывает paid_amount одним UPDATE
+    await _common.seed_payments(user_id, order_ids, per_order=args.per_order)
+    seed_s = time.perf_counter() - t0
+
+    headers = {"Authorization": auth}
+    order_id = order_ids[len(order_ids) // 2]
+    batch = order_ids[:args.batch]
+    result = {"payments": args.payments, "orders": len(order_ids), "seed_payments_s": round(seed_s, 2)}
+
+    async with _common.client() as http:
+        async def ledger_cold():
+            await invalidate_tags(keys.ledger_tag(user_id, order_id))
+            (await http.get(f"/payments/ledger/{order_id}", headers=headers)).raise_for_status()
+
+        async def ledger_hit():
+            (await http.get(f"/payments/ledger/{order_id}", headers=headers)).raise_for_status()
+
+        async def payments_all():
+            (await http.get(f"/payments/all/{order_id}", headers=headers)).raise_for_status()
+
+        async def balances():
+            (await http.post("/payments/balances", headers=headers, json={"ids": batch})).raise_for_status()
+
+        async def add_payment():
+            (await http.post("/payments/add", headers=headers,
+                             json={"order_id": order_id, "amount": 1, "is_paid": True})).raise_for_status()
+
+        result["ledger_cold_ms"] = await _time(ledger_cold, args.repeat)
+        result["ledger_hit_ms"] = await _time(ledger_hit, args.repeat)
+        result["payments_all_ms"] = await _time(payments_all, args.repeat)
+        result[f"balances_{len(batch)}_ms"] = await _time(balances, args.repeat)
+        result["add_payment_ms"] = await _time(add_payment, args.repeat)
+
+    async with AsyncSessionLocal() as session:
+        async def naive_balances():
+            await session.execute(
+                select(Payment.order_id, func.sum(Payment.amount).filter(Payment.is_paid))
+                .where(Payment.user_id == user_id, Payment.order_id.in_(batch))
+                .group_by(Payment.order_id)
+            )
+
+        result[f"naive_aggregate_{len(batch)}_ms"] = await _time(naive_balances, args.repeat)
+        paid = (await session.execute(
+            select(func.coalesce(func.sum(Order.paid_amount), 0)).where(Order.user_id == user_id)
+        )).scalar_one()
+        expected = (await session.execute(
+            select(func.coalesce(func.sum(Payment.amount).filter(Payment.is_paid), 0))
+            .where(Payment.user_id == user_id)
+        )).scalar_one()
+    result["consistent"] = paid == expected
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
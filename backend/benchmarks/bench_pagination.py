@@ -0,0 +1,58 @@
+"""
+Время первой и «глубокой» страницы /orders/all/{client_id}?limit=N
+в зависимости от числа заказов клиента. Кэш не учитывается: каждый
+запрос идёт с новым курсором или сбросом.
+
+    cd backend && python -m benchmarks.bench_pagination --sizes 100 10000 1000000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import _common
+from app.cache import invalidate_tags, keys
+
+
+async def _timed_get(http, url: str, headers: dict) -> tuple[float, str | None]:
+    t0 = time.perf_counter()
+    resp = await http.get(url, headers=headers)
+    resp.raise_for_status()
+    return (time.perf_counter() - t0) * 1000, resp.headers.get("x-next-cursor")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    await _common.setup()
+    async with _common.client() as http:
+        for size in args.sizes:
+            user_id, auth = await _common.create_user()
+            client_id = await _common.create_client(user_id)
+            await _common.seed_orders(user_id, client_id, size)
+            headers = {"Authorization": auth}
+            url = f"/orders/all/{client_id}?limit={args.limit}"
+
+            timings = []
+            cursor = None
+            for _ in range(args.pages):
+                await invalidate_tags(keys.user_tag(user_id))
+                page_url = url + (f"&cursor={cursor}" if cursor else "")
+                ms, cursor = await _timed_get(http, page_url, headers)
+                timings.append(ms)
+                if not cursor:
+                    break
+            print(json.dumps({
+                "orders": size,
+                "first_page_ms": round(timings[0], 2),
+                "avg_page_ms": round(sum(timings) / len(timings), 2),
+                "pages": len(timings),
+            }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
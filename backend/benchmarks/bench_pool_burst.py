@@ -0,0 +1,56 @@
+"""
+Всплеск параллельных запросов к БД и что при этом видно в статистике пула:
+сколько ждали соединение, гистограмма ожидания, таймауты. Размер пула
+задаётся как обычно через окружение:
+
+    cd backend && DB_POOL_SIZE=5 DB_MAX_OVERFLOW=0 DB_POOL_TIMEOUT=2 \
+        python -m benchmarks.bench_pool_burst --concurrency 50 --rounds 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks import _common
+from app.database import pool_stats, warmup_pool
+from app.config import DB_POOL_WARMUP
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    await _common.setup()
+    user_id, auth = await _common.create_user()
+    client_id = await _common.create_client(user_id)
+    await _common.seed_orders(user_id, client_id, 100)
+    order_id = (await _common.order_ids(user_id, client_id))[0]
+    await warmup_pool(DB_POOL_WARMUP)
+    headers = {"Authorization": auth}
+
+    statuses: dict[int, int] = {}
+    async with _common.client() as http:
+        t0 = time.perf_counter()
+        for _ in range(args.rounds):
+            responses = await asyncio.gather(
+                *(http.get(f"/orders/get/{order_id}", headers=headers)
+                  for _ in range(args.concurrency)),
+                return_exceptions=True,
+            )
+            for r in responses:
+                code = r.status_code if hasattr(r, "status_code") else 0
+                statuses[code] = statuses.get(code, 0) + 1
+        elapsed = time.perf_counter() - t0
+
+    print(json.dumps({
+        "requests": args.concurrency * args.rounds,
+        "rps": round(args.concurrency * args.rounds / elapsed, 1),
+        "statuses": statuses,
+        "pool": pool_stats(),
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
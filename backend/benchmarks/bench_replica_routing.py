@@ -0,0 +1,91 @@
+"""
+Маршрутизация чтений на реплику (нужны DATABASE_URL и DATABASE_REPLICA_URL,
+см. README). Три фазы через приложение в том же процессе:
+
+- reads — только GET /orders/get: ожидается, что почти все SELECT уйдут на реплику;
+- read_your_writes — PATCH заказа и сразу GET: закреплённый за основной базой
+  пользователь должен увидеть свою правку (stale — сколько раз не увидел);
+- replica_lag_ms — через сколько правка видна на самой реплике (для выбора
+  DB_REPLICA_PIN_SECONDS).
+
+    cd backend && python -m benchmarks.bench_replica_routing --requests 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+if not os.getenv("DATABASE_REPLICA_URL"):
+    raise SystemExit("DATABASE_REPLICA_URL is not set (нужна вторая база, см. benchmarks/README.md)")
+
+from sqlalchemy import select  # noqa: E402
+
+from benchmarks import _common  # noqa: E402
+from app.database import replica_engine, replica_stats, start_replica_monitor  # noqa: E402
+from app.models.orders_table import Order  # noqa: E402
+
+
+def _reads_delta(before: dict) -> dict:
+    after = replica_stats()["reads"]
+    return {target: after[target] - before[target] for target in after}
+
+
+async def _replica_lag(order_id: int, price: int, timeout: float = 10.0) -> float | None:
+    t0 = time.perf_counter()
+    async with replica_engine.connect() as conn:
+        while time.perf_counter() - t0 < timeout:
+            seen = (await conn.execute(select(Order.price).where(Order.id == order_id))).scalar_one()
+            if seen == price:
+                return round((time.perf_counter() - t0) * 1000, 1)
+            await conn.rollback()
+            await asyncio.sleep(0.005)
+    return None
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--writes", type=int, default=50)
+    args = parser.parse_args()
+
+    await _common.setup()
+    await start_replica_monitor()
+    user_id, auth = await _common.create_user()
+    client_id = await _common.create_client(user_id)
+    await _common.seed_orders(user_id, client_id, 100)
+    order_id = (await _common.order_ids(user_id, client_id))[0]
+    headers = {"Authorization": auth}
+    # дождаться, пока пользователь и заказы доедут до реплики
+    await _replica_lag(order_id, 100)
+
+    result = {"requests": args.requests, "writes": args.writes}
+    async with _common.client() as http:
+        before = dict(replica_stats()["reads"])
+        for _ in range(args.requests):
+            (await http.get(f"/orders/get/{order_id}", headers=headers)).raise_for_status()
+        result["reads"] = _reads_delta(before)
+
+        before = dict(replica_stats()["reads"])
+        stale, lags = 0, []
+        for i in range(args.writes):
+            price = 10_000 + i
+            (await http.patch(f"/orders/update/{order_id}", headers=headers,
+                              json={"price": price})).raise_for_status()
+            response = await http.get(f"/orders/get/{order_id}", headers=headers)
+            stale += response.json()["price"] != price
+            lags.append(await _replica_lag(order_id, price))
+        result["read_your_writes"] = {"stale": stale, "reads": _reads_delta(before)}
+
+    seen = sorted(lag for lag in lags if lag is not None)
+    result["replica_lag_ms"] = {
+        "p50": seen[len(seen) // 2] if seen else None,
+        "max": seen[-1] if seen else None,
+        "timeouts": len(lags) - len(seen),
+    }
+    result["replica"] = {k: v for k, v in replica_stats().items() if k in ("healthy", "lag", "checks_failed")}
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
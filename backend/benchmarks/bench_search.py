@@ -0,0 +1,104 @@
+"""
+Задержка /clients/search и /orders/search на «толстом» пользователе:
+точное слово, префикс, опечатка, вторая страница по курсору. С --explain
+печатает план поиска клиентов, чтобы убедиться, что работают GIN-индексы.
+
+    cd backend && python -m benchmarks.bench_search --clients 1000000 --orders 1000000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from sqlalchemy.dialects import postgresql
+
+from benchmarks import _common
+from app.database import engine
+from app.search import search_clients
+
+_FIRST = ["Иван", "Пётр", "Анна", "Мария", "Олег", "Alice", "Bob", "Carol", "Dmitry", "Elena"]
+_LAST = ["Иванов", "Смирнова", "Кузнецов", "Попова", "Соколов",
+         "Smith", "Johnson", "Brown", "Miller", "Wilson"]
+_WORDS = ["лендинг", "редизайн", "логотип", "интернет-магазин", "телеграм-бот",
+          "landing", "redesign", "logo", "dashboard", "migration"]
+
+QUERIES = {
+    "word": "Кузнецов",
+    "prefix": "кузн",
+    "two_words": "Анна Попова",
+    "typo": "Кузнецав",
+    "contact": "wilson",
+}
+
+
+def _name(rnd: random.Random, i: int) -> str:
+    return f"{rnd.choice(_FIRST)} {rnd.choice(_LAST)} {i}"
+
+
+async def _seed(user_id: int, n_clients: int, n_orders: int) -> None:
+    rnd = random.Random(1)
+    await _common.copy_rows(
+        "clients", ["user_id", "name", "contact", "notes"],
+        ((user_id, _name(rnd, i), f"{rnd.choice(_LAST).lower()}{i}@example.com",
+          f"{rnd.choice(_WORDS)} {rnd.choice(_WORDS)}") for i in range(n_clients)),
+    )
+    client_id = await _common.create_client(user_id)
+    await _common.copy_rows(
+        "orders",
+        ["user_id", "client_id", "title", "description", "price",
+         "order_status_enum", "notes"],
+        ((user_id, client_id, f"{rnd.choice(_WORDS)} для {rnd.choice(_LAST)}",
+          f"{rnd.choice(_WORDS)} {rnd.choice(_WORDS)} {rnd.choice(_WORDS)}",
+          100 + i % 5000, "NEW", "") for i in range(n_orders)),
+    )
+
+
+async def _timed(http, url: str, params: dict, headers: dict) -> tuple[float, int, str | None]:
+    t0 = time.perf_counter()
+    resp = await http.get(url, params=params, headers=headers)
+    resp.raise_for_status()
+    return (time.perf_counter() - t0) * 1000, len(resp.json()), resp.headers.get("x-next-cursor")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--explain", action="store_true")
+    args = parser.parse_args()
+
+    await _common.setup()
+    user_id, auth = await _common.create_user()
+    await _seed(user_id, args.clients, args.orders)
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("ANALYZE clients")
+        await conn.exec_driver_sql("ANALYZE orders")
+    headers = {"Authorization": auth}
+
+    async with _common.client() as http:
+        for entity in ("clients", "orders"):
+            for name, q in QUERIES.items():
+                params = {"q": q, "limit": args.limit}
+                first_ms, found, cursor = await _timed(http, f"/{entity}/search", params, headers)
+                second_ms = None
+                if cursor:
+                    second_ms, _, _ = await _timed(http, f"/{entity}/search",
+                                                   {**params, "cursor": cursor}, headers)
+                print(json.dumps({
+                    "entity": entity, "query": name, "found": found,
+                    "first_page_ms": round(first_ms, 2),
+                    "second_page_ms": round(second_ms, 2) if second_ms is not None else None,
+                }))
+
+    if args.explain:
+        stmt = search_clients(user_id, QUERIES["prefix"], None, args.limit)
+        sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        async with engine.connect() as conn:
+            plan = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
+            print("\n".join(r[0] for r in plan))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
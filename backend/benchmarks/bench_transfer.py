@@ -0,0 +1,68 @@
+"""
+Пропускная способность потокового импорта и экспорта клиентов.
+Тело импорта генерируется на лету, поэтому 1M строк не держится в памяти
+ни на стороне бенчмарка, ни на стороне приложения.
+
+    cd backend && python -m benchmarks.bench_transfer --rows 1000000 --format ndjson
+"""
+import argparse
+import asyncio
+import json
+import resource
+import time
+
+from benchmarks import _common
+
+
+async def _body(rows: int, fmt: str, chunk_rows: int = 5000):
+    if fmt == "csv":
+        yield b"name,contact,notes\n"
+    for start in range(0, rows, chunk_rows):
+        end = min(start + chunk_rows, rows)
+        if fmt == "csv":
+            lines = (f"Client {i},client{i}@example.com,\n" for i in range(start, end))
+        else:
+            lines = (json.dumps({"name": f"Client {i}", "contact": f"client{i}@example.com",
+                                 "notes": ""}) + "\n" for i in range(start, end))
+        yield "".join(lines).encode()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    await _common.setup()
+    _user_id, auth = await _common.create_user()
+    headers = {"Authorization": auth}
+
+    async with _common.client() as http:
+        t0 = time.perf_counter()
+        resp = await http.post(f"/transfer/import/clients?format={args.format}",
+                               content=_body(args.rows, args.format), headers=headers, timeout=None)
+        import_s = time.perf_counter() - t0
+        resp.raise_for_status()
+        report = resp.json()
+
+        t0 = time.perf_counter()
+        exported = 0
+        async with http.stream("GET", f"/transfer/export/clients?format={args.format}",
+                               headers=headers, timeout=None) as stream:
+            async for chunk in stream.aiter_bytes():
+                exported += len(chunk)
+        export_s = time.perf_counter() - t0
+
+    print(json.dumps({
+        "rows": args.rows,
+        "format": args.format,
+        "imported": report["imported"],
+        "import_rows_per_s": round(report["imported"] / import_s),
+        "export_mb": round(exported / 2**20, 1),
+        "export_rows_per_s": round(args.rows / export_s),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+    }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Число SQL-запросов и задержка одной правки заказа:
+старый путь (SELECT -> изменить атрибуты -> COMMIT -> refresh) против
+PATCH /orders/update/{id} (один UPDATE … RETURNING).
+
+    cd backend && python -m benchmarks.bench_update_round_trips --edits 200
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from sqlalchemy import event, select
+
+from benchmarks import _common
+from app.database import AsyncSessionLocal, engine
+from app.models.orders_table import Order
+from app.schemas.order_scheme import OrderStatus
+
+_statements = 0
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count(*_args):
+    global _statements
+    _statements += 1
+
+
+async def _old_edit(user_id: int, order_id: int, n: int) -> None:
+    async with AsyncSessionLocal() as session:
+        order = (await session.execute(
+            select(Order).where(Order.user_id == user_id, Order.id == order_id)
+        )).scalar_one()
+        order.status = OrderStatus.ACTIVE if n % 2 else OrderStatus.NEW
+        await session.commit()
+        await session.refresh(order)
+
+
+async def _measure(edit, edits: int) -> dict:
+    global _statements
+    _statements = 0
+    t0 = time.perf_counter()
+    for n in range(edits):
+        await edit(n)
+    elapsed = time.perf_counter() - t0
+    return {"statements_per_edit": _statements / edits,
+            "ms_per_edit": round(elapsed / edits * 1000, 3)}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--edits", type=int, default=200)
+    args = parser.parse_args()
+
+    await _common.setup()
+    user_id, auth = await _common.create_user()
+    client_id = await _common.create_client(user_id)
+    await _common.seed_orders(user_id, client_id, 1)
+    (order_id,) = await _common.order_ids(user_id, client_id)
+    headers = {"Authorization": auth}
+
+    async with _common.client() as http:
+        # прогрев кэша пользователя, чтобы считать только запросы самой правки
+        await http.get(f"/orders/get/{order_id}", headers=headers)
+
+        async def _patch(n: int) -> None:
+            resp = await http.patch(f"/orders/update/{order_id}", headers=headers,
+                                    json={"status": "active" if n % 2 else "new"})
+            resp.raise_for_status()
+
+        print(json.dumps({
+            "select_mutate_refresh": await _measure(lambda n: _old_edit(user_id, order_id, n), args.edits),
+            "patch_update_returning": await _measure(_patch, args.edits),
+        }))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
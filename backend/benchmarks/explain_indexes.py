@@ -0,0 +1,40 @@
+"""
+EXPLAIN (ANALYZE, BUFFERS) для горячих запросов — до и после миграции 2.
+
+    python -m app.migrations downgrade 1 && python -m benchmarks.explain_indexes > before.txt
+    python -m app.migrations upgrade     && python -m benchmarks.explain_indexes > after.txt
+
+Данные берутся из базы как есть; для показательного плана сначала
+наполните её (например, python -m benchmarks.bench_pagination --sizes 1000000).
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from benchmarks import _common  # noqa: F401  (проверяет DATABASE_URL)
+from app.database import engine
+
+QUERIES = {
+    "orders by client": "SELECT * FROM orders WHERE user_id = :u AND client_id = :c ORDER BY id LIMIT 50",
+    "order by id": "SELECT * FROM orders WHERE user_id = :u AND id = :o",
+    "clients page": "SELECT * FROM clients WHERE user_id = :u ORDER BY id LIMIT 50",
+    "payments by order": "SELECT * FROM payments WHERE user_id = :u AND order_id = :o",
+}
+
+
+async def main():
+    async with engine.connect() as conn:
+        row = (await conn.execute(text(
+            "SELECT user_id, client_id, id FROM orders ORDER BY id DESC LIMIT 1"
+        ))).first()
+        if row is None:
+            raise SystemExit("orders is empty — seed data first")
+        params = {"u": row.user_id, "c": row.client_id, "o": row.id}
+        for name, sql in QUERIES.items():
+            plan = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)
+            print(f"-- {name}\n" + "\n".join(r[0] for r in plan) + "\n")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
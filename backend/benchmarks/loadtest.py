@@ -0,0 +1,202 @@
+"""
+Нагрузочный тест всего API: смешанная нагрузка на логин, списки, карточки
+и правки, приложение в том же процессе (см. benchmarks/README.md).
+
+    cd backend && python -m benchmarks.loadtest --users 5 --clients 1000 \\
+        --orders 20000 --concurrency 32 --duration 30 --out run.json
+
+Результат — JSON с p50/p95/p99 (мс), RPS и ошибками по каждому маршруту;
+два прогона сравниваются по одинаковым --seed и размерам данных.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import subprocess
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from sqlalchemy import select
+
+from benchmarks import _common
+from app.config import BCRYPT_ROUNDS, CACHE_BACKEND
+from app.database import AsyncSessionLocal
+from app.models.orders_table import Order
+
+PASSWORD = "loadtest-password"
+
+# маршрут -> вес в смеси; логин редкий и дорогой (bcrypt)
+MIX = {
+    "auth_login": 2,
+    "clients_all": 15,
+    "clients_get": 10,
+    "clients_detail": 8,
+    "orders_all": 20,
+    "orders_all_page": 10,
+    "orders_get": 20,
+    "orders_patch": 12,
+    "clients_patch": 3,
+}
+
+
+@dataclass
+class Tenant:
+    email: str
+    auth: dict
+    client_ids: list[int]
+    order_ids: list[int]
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+async def _seed_tenant(n_clients: int, n_orders: int) -> Tenant:
+    email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+    user_id, auth = await _common.create_user(PASSWORD, email=email)
+    client_ids = await _common.seed_clients(user_id, n_clients)
+    statuses = ["NEW", "ACTIVE", "ARCHIVED"]
+    await _common.copy_rows(
+        "orders",
+        ["user_id", "client_id", "title", "description", "price",
+         "order_status_enum", "notes"],
+        ((user_id, client_ids[i % len(client_ids)], f"Order {i}", "Load test order",
+          100 + i % 5000, statuses[i % 3], "")
+         for i in range(n_orders)),
+    )
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Order.id).where(Order.user_id == user_id).limit(10_000)
+        )
+        order_ids = list(result.scalars())
+    return Tenant(email, {"Authorization": auth}, client_ids, order_ids)
+
+
+def _request(http, route: str, tenant: Tenant, rnd: random.Random):
+    client_id = rnd.choice(tenant.client_ids)
+    order_id = rnd.choice(tenant.order_ids) if tenant.order_ids else 0
+    h = tenant.auth
+    if route == "auth_login":
+        return http.post("/auth/login", json={"email": tenant.email, "password": PASSWORD})
+    if route == "clients_all":
+        return http.get("/clients/all", headers=h, params={"limit": 50})
+    if route == "clients_get":
+        return http.get(f"/clients/get/{client_id}", headers=h)
+    if route == "clients_detail":
+        return http.get(f"/clients/detail/{client_id}", headers=h)
+    if route == "orders_all":
+        return http.get(f"/orders/all/{client_id}", headers=h)
+    if route == "orders_all_page":
+        return http.get(f"/orders/all/{client_id}", headers=h,
+                        params={"sort": "-price", "limit": 20})
+    if route == "orders_get":
+        return http.get(f"/orders/get/{order_id}", headers=h)
+    if route == "orders_patch":
+        return http.patch(f"/orders/update/{order_id}", headers=h,
+                          json={"price": rnd.randint(100, 10_000)})
+    if route == "clients_patch":
+        return http.patch(f"/clients/update/{client_id}", headers=h,
+                          json={"notes": f"touched {rnd.random():.6f}"})
+    raise ValueError(route)
+
+
+async def _worker(http, tenants: list[Tenant], stats: dict[str, RouteStats],
+                  rnd: random.Random, deadline: float, record_after: float) -> None:
+    routes, weights = list(MIX), list(MIX.values())
+    while time.perf_counter() < deadline:
+        route = rnd.choices(routes, weights)[0]
+        tenant = rnd.choice(tenants)
+        t0 = time.perf_counter()
+        try:
+            response = await _request(http, route, tenant, rnd)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - t0
+        if t0 < record_after:
+            continue  # прогрев: кэши и пул ещё холодные
+        st = stats[route]
+        st.latencies.append(elapsed)
+        if not ok:
+            st.errors += 1
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    """Перцентиль методом nearest-rank."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _summary(st: RouteStats, seconds: float) -> dict:
+    values = sorted(st.latencies)
+    return {
+        "requests": len(values),
+        "errors": st.errors,
+        "rps": round(len(values) / seconds, 1) if seconds else 0.0,
+        "p50_ms": _ms(_percentile(values, 50)),
+        "p95_ms": _ms(_percentile(values, 95)),
+        "p99_ms": _ms(_percentile(values, 99)),
+        "max_ms": _ms(values[-1]) if values else 0.0,
+    }
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--clients", type=int, default=100, help="клиентов на пользователя")
+    parser.add_argument("--orders", type=int, default=5000, help="заказов на пользователя")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="секунд с замером")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="записать JSON ещё и в файл")
+    args = parser.parse_args()
+
+    await _common.setup()
+    tenants = [await _seed_tenant(args.clients, args.orders) for _ in range(args.users)]
+
+    stats = {route: RouteStats() for route in MIX}
+    async with _common.client() as http:
+        start = time.perf_counter()
+        record_after = start + args.warmup
+        deadline = record_after + args.duration
+        await asyncio.gather(*(
+            _worker(http, tenants, stats, random.Random(args.seed * 1000 + i), deadline, record_after)
+            for i in range(args.concurrency)
+        ))
+
+    total = RouteStats([v for st in stats.values() for v in st.latencies],
+                       sum(st.errors for st in stats.values()))
+    report = {
+        "git_rev": _git_rev(),
+        "params": {**vars(args), "bcrypt_rounds": BCRYPT_ROUNDS, "cache_backend": CACHE_BACKEND},
+        "total": _summary(total, args.duration),
+        "routes": {route: _summary(st, args.duration) for route, st in stats.items()},
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+import { useEffect } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+import type { QueryClient } from "@tanstack/react-query";
+
+// Лента изменений бэкенда (GET /changes/stream, Server-Sent Events).
+// EventSource не умеет заголовок Authorization, поэтому поток читается через fetch.
+
+type Change = {
+  entity: "clients" | "orders" | "payments";
+  op: "insert" | "update" | "delete" | "reload";
+  id?: number;
+  data?: { id: number };
+};
+
+const RETRY_MS = 3000;
+
+function applyClients(queryClient: QueryClient, changes: Change[]) {
+  const clients = changes.filter((c) => c.entity === "clients");
+  if (clients.length === 0) return;
+  // без data строку не собрать — проще перечитать список
+  if (clients.some((c) => c.op === "reload" || (c.op !== "delete" && !c.data))) {
+    queryClient.invalidateQueries({ queryKey: ["clients"] });
+    return;
+  }
+  queryClient.setQueryData<{ id: number }[]>(["clients"], (old) => {
+    if (!old) return old;
+    let rows = old;
+    for (const c of clients) {
+      rows = rows.filter((row) => row.id !== c.id);
+      if (c.op !== "delete" && c.data) rows = [...rows, c.data];
+    }
+    return rows.sort((a, b) => a.id - b.id);
+  });
+}
+
+function onEvent(queryClient: QueryClient, event: string, data: string) {
+  if (event === "reset") {
+    // пропущенных событий уже нет на сервере — перечитать всё
+    queryClient.invalidateQueries();
+    return;
+  }
+  if (event !== "change") return;
+  const changes: Change[] = JSON.parse(data).changes;
+  applyClients(queryClient, changes);
+  for (const entity of new Set(changes.map((c) => c.entity))) {
+    if (entity !== "clients") queryClient.invalidateQueries({ queryKey: [entity] });
+  }
+}
+
+async function listen(queryClient: QueryClient, signal: AbortSignal) {
+  let lastId: string | null = null;
+  while (!signal.aborted) {
+    try {
+      const headers: Record<string, string> = {};
+      const token = localStorage.getItem("access_token");
+      if (token) headers.Authorization = `Bearer ${token}`;
+      if (lastId) headers["Last-Event-ID"] = lastId;
+      const resp = await fetch(`${import.meta.env.VITE_API_URL}/changes/stream`, { headers, signal });
+      if (!resp.ok || !resp.body) throw new Error(`change feed: ${resp.status}`);
+
+      const reader = resp.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let end;
+        while ((end = buffer.indexOf("\n\n")) >= 0) {
+          const block = buffer.slice(0, end);
+          buffer = buffer.slice(end + 2);
+          let event = "message";
+          let data = "";
+          for (const line of block.split("\n")) {
+            if (line.startsWith("id: ")) lastId = line.slice(4);
+            else if (line.startsWith("event: ")) event = line.slice(7);
+            else if (line.startsWith("data: ")) data = line.slice(6);
+          }
+          if (data) onEvent(queryClient, event, data);
+        }
+      }
+    } catch {
+      if (signal.aborted) return;
+    }
+    await new Promise((resolve) => setTimeout(resolve, RETRY_MS));
+  }
+}
+
+export function useChangeFeed() {
+  const queryClient = useQueryClient();
+  useEffect(() => {
+    const controller = new AbortController();
+    listen(queryClient, controller.signal);
+    return () => controller.abort();
+  }, [queryClient]);
+}
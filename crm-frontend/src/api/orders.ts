@@ -13,8 +13,7 @@ export const addOrder = async (
   description: string,
   price: number,
   status: OrderStatusType,
-  notes: string,
-  is_paid: boolean
+  notes: string
 ) => {
   await api.post("/orders/add", {
     client_id,
@@ -23,6 +22,5 @@ export const addOrder = async (
     price,
     status,
     notes,
-    is_paid,
   });
 };
\ No newline at end of file
@@ -0,0 +1,33 @@
+import { api } from "./http";
+
+export type Payment = {
+  id: number;
+  order_id: number;
+  amount: number;
+  is_paid: boolean;
+};
+
+export type Ledger = {
+  order_id: number;
+  price: number;
+  paid_amount: number;
+  payments: Payment[];
+};
+
+export const getLedger = async (order_id: number): Promise<Ledger> => {
+  const res = await api.get(`/payments/ledger/${order_id}`);
+  return res.data;
+};
+
+// paid_amount и is_paid заказа пересчитывает бэкенд по платежам
+export const addPayment = async (order_id: number, amount: number, is_paid: boolean) => {
+  await api.post("/payments/add", { order_id, amount, is_paid });
+};
+
+export const setPaymentPaid = async (payment_id: number, is_paid: boolean) => {
+  await api.patch(`/payments/update/${payment_id}`, { is_paid });
+};
+
+export const deletePayment = async (payment_id: number) => {
+  await api.post("/payments/batch/delete", { ids: [payment_id] });
+};
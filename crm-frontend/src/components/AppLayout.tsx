@@ -1,11 +1,13 @@
 import { useState } from "react";
 import { Outlet, useNavigate, useLocation } from "react-router-dom";
 import { LayoutDashboard, Users, LogOut, Menu, X } from "lucide-react";
+import { useChangeFeed } from "../api/changes";
 
 export default function AppLayout() {
   const navigate = useNavigate();
   const location = useLocation();
   const [sidebarOpen, setSidebarOpen] = useState(false);
+  useChangeFeed();
 
   const handleLogout = () => {
     localStorage.removeItem("access_token");
@@ -32,6 +32,8 @@ export default function Clients() {
   } = useQuery({
     queryKey: ["clients"],
     queryFn: () => api.get<Client[]>("/clients/all").then((res) => res.data),
+    // список держит актуальным лента изменений (useChangeFeed), перечитывать по таймеру не нужно
+    staleTime: Infinity,
   });
 
   function UpdateFields() {
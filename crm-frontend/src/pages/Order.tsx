@@ -1,8 +1,16 @@
 import { useEffect, useState } from "react";
 import { api } from "../api/http";
 import { useParams } from "react-router-dom";
+import { Trash2 } from "lucide-react";
 import Loader from "../components/Loader";
 import BackButton from "../components/BackButton";
+import {
+  addPayment,
+  deletePayment,
+  getLedger,
+  setPaymentPaid,
+  type Payment,
+} from "../api/payments";
 
 export const OrderStatus = {
   NEW: "new",
@@ -22,12 +30,16 @@ type Order = {
   price: number;
   status: OrderStatusType;
   notes: string;
+  paid_amount: number;
   is_paid: boolean;
 };
 
 export default function OrderPage() {
   const [order, setOrder] = useState<Order | null | undefined>(undefined);
+  const [payments, setPayments] = useState<Payment[]>([]);
   const [loading, setLoading] = useState(true);
+  const [amount, setAmount] = useState(0);
+  const [isPaid, setIsPaid] = useState(true);
   const { order_id } = useParams<{ order_id: string }>();
 
   if (!order_id) {
@@ -46,6 +58,44 @@ export default function OrderPage() {
       .then((res) => setOrder(res.data))
       .catch(() => setOrder(null))
       .finally(() => setLoading(false));
+    GetPayments();
+  }
+
+  // выписка отдаёт и платежи, и пересчитанный баланс заказа
+  function GetPayments() {
+    getLedger(Number(order_id))
+      .then((ledger) => {
+        setPayments(ledger.payments);
+        setOrder((prev) =>
+          prev
+            ? {
+                ...prev,
+                paid_amount: ledger.paid_amount,
+                is_paid: ledger.paid_amount >= ledger.price,
+              }
+            : prev
+        );
+        setAmount(Math.max(ledger.price - ledger.paid_amount, 0));
+      })
+      .catch(() => setPayments([]));
+  }
+
+  async function onAddPayment(e: React.FormEvent) {
+    e.preventDefault();
+    if (amount <= 0) return;
+    await addPayment(Number(order_id), amount, isPaid);
+    GetPayments();
+  }
+
+  async function onTogglePaid(payment: Payment) {
+    await setPaymentPaid(payment.id, !payment.is_paid);
+    GetPayments();
+  }
+
+  async function onDeletePayment(id: number) {
+    if (!confirm("Удалить платёж?")) return;
+    await deletePayment(id);
+    GetPayments();
   }
 
   useEffect(() => {
@@ -106,9 +156,70 @@ export default function OrderPage() {
               📌 {order.status}
             </span>
             <p className="text-sm">
-              {order.is_paid ? "✅ Оплачено" : "❌ Не оплачено"}
+              {order.is_paid ? "✅ Оплачено" : `❌ Оплачено ${order.paid_amount} из ${order.price} ₽`}
             </p>
           </div>
+          <div className="p-6 space-y-4 border-t border-slate-200 dark:border-slate-600">
+            <h3 className="font-semibold text-slate-800 dark:text-slate-100">
+              Платежи
+            </h3>
+            {payments.length === 0 ? (
+              <p className="text-sm text-slate-500 dark:text-slate-400">
+                Платежей пока нет
+              </p>
+            ) : (
+              <ul className="space-y-2">
+                {payments.map((payment) => (
+                  <li
+                    key={payment.id}
+                    className="flex items-center gap-3 text-sm text-slate-700 dark:text-slate-200"
+                  >
+                    <span className="flex-1 font-medium">{payment.amount} ₽</span>
+                    <label className="flex items-center gap-2 cursor-pointer">
+                      <input
+                        type="checkbox"
+                        checked={payment.is_paid}
+                        onChange={() => onTogglePaid(payment)}
+                        className="rounded border-slate-300 text-indigo-600 focus:ring-indigo-500"
+                      />
+                      Проведён
+                    </label>
+                    <button
+                      type="button"
+                      onClick={() => onDeletePayment(payment.id)}
+                      className="p-2 rounded-lg text-slate-500 hover:bg-red-50 dark:hover:bg-red-900/20 hover:text-red-600 dark:hover:text-red-400"
+                    >
+                      <Trash2 size={16} />
+                    </button>
+                  </li>
+                ))}
+              </ul>
+            )}
+            <form onSubmit={onAddPayment} className="flex flex-wrap items-center gap-3">
+              <input
+                type="number"
+                min={1}
+                value={amount}
+                onChange={(e) => setAmount(+e.target.value)}
+                className="flex-1 min-w-0 px-4 py-2 rounded-lg border border-slate-300 dark:border-slate-600 bg-white dark:bg-slate-700 text-slate-900 dark:text-slate-100 focus:outline-none focus:ring-2 focus:ring-indigo-500"
+              />
+              <label className="flex items-center gap-2 text-sm text-slate-700 dark:text-slate-200 cursor-pointer">
+                <input
+                  type="checkbox"
+                  checked={isPaid}
+                  onChange={(e) => setIsPaid(e.target.checked)}
+                  className="rounded border-slate-300 text-indigo-600 focus:ring-indigo-500"
+                />
+                Проведён
+              </label>
+              <button
+                type="submit"
+                className="px-4 py-2 rounded-lg bg-indigo-600 hover:bg-indigo-700 text-white font-semibold text-sm"
+              >
+                Добавить платёж
+              </button>
+            </form>
+          </div>
         </div>
     </div>
   );
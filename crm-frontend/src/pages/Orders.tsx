@@ -28,6 +28,8 @@ type Order = {
   price: number;
   status: OrderStatusType;
   notes: string;
+  // is_paid считает бэкенд по платежам: paid_amount >= price
+  paid_amount: number;
   is_paid: boolean;
 };
 
@@ -48,7 +50,6 @@ export default function Orders() {
   const [price, setPrice] = useState(0);
   const [status, setStatus] = useState<OrderStatusType>(OrderStatus.NEW);
   const [notes, setNotes] = useState("");
-  const [isPaid, setIsPaid] = useState(false);
 
   const fetchData = () => {
     setLoading(true);
@@ -70,7 +71,6 @@ export default function Orders() {
     setPrice(0);
     setStatus(OrderStatus.NEW);
     setNotes("");
-    setIsPaid(false);
   }
 
   async function onAddOrder(e: React.FormEvent) {
@@ -81,8 +81,7 @@ export default function Orders() {
       description,
       price,
       status,
-      notes,
-      isPaid
+      notes
     );
     api.get(`/orders/all/${client_id}`).then((r) => setOrders(r.data));
     resetForm();
@@ -185,7 +184,7 @@ export default function Orders() {
                     {order.status}
                   </span>
                   <p className="text-sm mt-2">
-                    {order.is_paid ? "✅ Оплачено" : "❌ Не оплачено"}
+                    {order.is_paid ? "✅ Оплачено" : `❌ Оплачено ${order.paid_amount} из ${order.price} ₽`}
                   </p>
                 </button>
                 <div className="p-2 flex gap-2 border-t border-slate-100 dark:border-slate-700">
@@ -309,24 +308,6 @@ export default function Orders() {
                 <option value={OrderStatus.ACTIVE}>Активный</option>
                 <option value={OrderStatus.ARCHIVED}>Архив</option>
               </select>
-              <label className="flex items-center gap-2 cursor-pointer">
-                <input
-                  type="checkbox"
-                  checked={editOrder?.is_paid ?? isPaid}
-                  onChange={(e) =>
-                    editOrder
-                      ? setEditOrder({
-                          ...editOrder,
-                          is_paid: e.target.checked,
-                        })
-                      : setIsPaid(e.target.checked)
-                  }
-                  className="rounded border-slate-300 text-indigo-600 focus:ring-indigo-500"
-                />
-                <span className="text-slate-700 dark:text-slate-300">
-                  Оплачено
-                </span>
-              </label>
               <button
                 type="submit"
                 className="w-full py-3 rounded-lg bg-indigo-600 hover:bg-indigo-700 text-white font-semibold focus:outline-none focus:ring-2 focus:ring-indigo-500 focus:ring-offset-2 dark:focus:ring-offset-slate-800"